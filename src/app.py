@@ -1,15 +1,28 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from flask_sqlalchemy.record_queries import get_recorded_queries
 from flasgger import Swagger
 from datetime import datetime, timezone
 import time
-import uuid
 import sys
 import os
 
 from config import config
 from models import db
+from migrations import run_migrations
+from events import init_events
+from converters import UUIDConverter
+from auth import token_in_scope
+from scheduler import init_scheduler, get_kitchen_scheduler
+from suggest import init_suggestions, get_menu_suggestions
+from json_provider import OrJSONProvider
+from compression import init_compression
+from slow_queries import init_slow_query_log
+from query_budget import init_query_budgets
+from profiler import init_profiler
+from metrics import init_metrics
+from timing import init_server_timing
 from swagger_config import swagger_template, swagger_config
 
 from models import User
@@ -56,7 +69,6 @@ def create_default_manager(app):
         # Create default manager
         try:
             manager = User(
-                id=str(uuid.uuid4()),
                 email=manager_email,
                 username=manager_email.split('@')[0],
                 full_name="System Manager",
@@ -78,19 +90,33 @@ def create_default_manager(app):
 def create_app(config_name='default'):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    app.url_map.converters['uuid'] = UUIDConverter
+    app.json_provider_class = OrJSONProvider
+    app.json = OrJSONProvider(app)
     
     # Initialize extensions
     db.init_app(app)
+    # after_request hooks run in reverse order of registration: these
+    # run after all the others, the Server-Timing header last
+    init_server_timing(app)
+    init_metrics(app)
+    init_compression(app)
+    init_slow_query_log(app)
+    init_query_budgets(app)
+    init_profiler(app)
     CORS(app, resources={
         r"/*": {
             "origins": "*",
             "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "If-Modified-Since", "X-Profile"],
+            "expose_headers": ["Content-Type", "Authorization", "ETag", "Last-Modified", "Server-Timing", "X-Profile", "X-Profile-Samples"],
             "supports_credentials": True
         }
     })
     jwt = JWTManager(app)
+    init_events(app)
+    init_scheduler(app)
+    init_suggestions(app)
     
     # Initialize Swagger
     Swagger(app, template=swagger_template, config=swagger_config)
@@ -120,6 +146,16 @@ def create_app(config_name='default'):
             'error': 'authorization_required'
         }), 401
     
+    jwt.token_verification_loader(token_in_scope)
+    
+    @jwt.token_verification_failed_loader
+    def token_out_of_scope_callback(jwt_header, jwt_payload):
+        return jsonify({
+            'success': False,
+            'message': 'Token not valid for this endpoint',
+            'error': 'invalid_token_scope'
+        }), 401
+    
     @jwt.revoked_token_loader
     def revoked_token_callback(jwt_header, jwt_payload):
         return jsonify({
@@ -134,12 +170,14 @@ def create_app(config_name='default'):
     from routes.orders import order_bp
     from routes.users import user_bp
     from routes.inventory import inventory_bp
+    from routes.diagnostics import diagnostics_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(menu_bp, url_prefix='/api/menu')
     app.register_blueprint(order_bp, url_prefix='/api/orders')
     app.register_blueprint(user_bp, url_prefix='/api/users')
     app.register_blueprint(inventory_bp, url_prefix='/api/inventory')
+    app.register_blueprint(diagnostics_bp, url_prefix='/api/diagnostics')
     
     # Root endpoint
     @app.route('/')
@@ -178,6 +216,8 @@ def create_app(config_name='default'):
                 'menu': {
                     'GET /api/menu/': 'Get all menu items (public)',
                     'GET /api/menu/available': 'Get available menu items (public)',
+                    'GET /api/menu/search?q=': 'Search menu items, typo tolerant (public)',
+                    'GET /api/menu/suggest?q=': 'Suggest available menu item names by prefix (public)',
                     'GET /api/menu/{id}': 'Get menu item by ID (public)',
                     'POST /api/menu/': 'Create menu item (chef, manager)',
                     'PUT /api/menu/{id}': 'Update menu item (chef, manager)',
@@ -186,9 +226,13 @@ def create_app(config_name='default'):
                 'orders': {
                     'GET /api/orders/': 'Get all orders',
                     'GET /api/orders/{id}': 'Get order by ID',
+                    'GET /api/orders/events': 'Order events stream for kitchen displays (SSE)',
+                    'POST /api/orders/events/token': 'Short-lived token for the order events stream',
                     'POST /api/orders/': 'Create new order (waiter, manager)',
+                    'POST /api/orders/bulk': 'Create a backlog of orders with idempotency keys (waiter, manager)',
                     'PUT /api/orders/{id}/status': 'Update order status (chef, manager)',
                     'PUT /api/orders/{id}/items/{item_id}/status': 'Update order item status (chef, manager)',
+                    'PUT /api/orders/items/status': 'Bulk update order items status (chef, manager)',
                     'POST /api/orders/{id}/pay': 'Process payment (cashier, manager)',
                     'DELETE /api/orders/{id}': 'Delete order'
                 },
@@ -196,10 +240,21 @@ def create_app(config_name='default'):
                     'GET /api/inventory/': 'Get all products',
                     'GET /api/inventory/{id}': 'Get product by ID',
                     'GET /api/inventory/ean/{ean}': 'Search products by EAN',
+                    'GET /api/inventory/search?q=': 'Search products by name, description and category',
                     'POST /api/inventory/': 'Create new product',
                     'PUT /api/inventory/{id}': 'Update product',
                     'PATCH /api/inventory/{id}/quantity': 'Modify product quantity',
                     'DELETE /api/inventory/{id}': 'Delete product'
+                },
+                'metrics': {
+                    'GET /metrics': 'Prometheus metrics of all workers'
+                },
+                'diagnostics': {
+                    'GET /api/diagnostics/compression': 'Response compression statistics of a worker (manager only)',
+                    'GET /api/diagnostics/slow-queries': 'Slow SQL statements of a worker, with sampled query plans (manager only)',
+                    'GET /api/diagnostics/profiles': 'Stored request profiles; profile a request with X-Profile: 1 (manager only)',
+                    'GET /api/diagnostics/profiles/{name}': 'Download a request profile, collapsed stacks (manager only)',
+                    'GET /api/diagnostics/sampling': 'Stacks sampled per endpoint by a worker (manager only)'
                 }
             }
         })
@@ -213,6 +268,13 @@ def create_app(config_name='default'):
             'timestamp': datetime.now(timezone.utc).isoformat(),
             'uptime': time.process_time()
         })
+
+    if app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+        @app.after_request
+        def add_query_count_header(response):
+            response.headers['X-Query-Count'] = str(len(get_recorded_queries()))
+            return response
+
     @app.teardown_appcontext
     def shutdown_session(exception=None):
         try:
@@ -243,6 +305,14 @@ def create_app(config_name='default'):
         }), 500
     
     # Error handlers
+    @app.errorhandler(400)
+    def bad_request(error):
+        return jsonify({
+            'success': False,
+            'message': error.description if hasattr(error, 'description') else 'Bad request',
+            'error': 'bad_request'
+        }), 400
+    
     @app.errorhandler(404)
     def not_found(error):
         return jsonify({
@@ -280,9 +350,19 @@ def create_app(config_name='default'):
         
         db.create_all()
         print("Database tables created successfully")
-        
+
+        run_migrations()
+        print("Database migrations applied successfully")
+
         create_default_manager(app)
         
+        get_kitchen_scheduler().rebuild()
+        get_menu_suggestions().rebuild()
+        
+        # Drop the startup connections: with gunicorn --preload, workers are
+        # forked from this process and must not share its sockets
+        db.engine.dispose()
+        
     
     return app
 
@@ -0,0 +1,133 @@
+"""
+In-process caches for read-heavy endpoints.
+
+Every gunicorn worker keeps its own copy of the cached data. Writers bump a
+version counter in the cache_versions table inside the same transaction as
+their change, and readers compare it with the version their copy was built
+from, so after a commit all workers drop their stale entries on the next
+request.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+import pytz
+from flask import request, current_app, make_response
+from sqlalchemy.dialects.postgresql import insert
+from models import db, CacheVersion, italy_now, ITALY_TZ
+
+
+def get_version_info(name):
+    """Return (version, updated_at) of a cached dataset, (0, None) if never written"""
+    row = db.session.query(CacheVersion.version, CacheVersion.updated_at).filter_by(name=name).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def get_version(name):
+    """Return the current version of a cached dataset (0 if never written)"""
+    return get_version_info(name)[0]
+
+
+def bump_version(name):
+    """Increment the version of a cached dataset in the current transaction
+
+    Returns the new version.
+    """
+    now = italy_now()
+    stmt = insert(CacheVersion).values(name=name, version=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CacheVersion.name],
+        set_={'version': CacheVersion.version + 1, 'updated_at': now}
+    ).returning(CacheVersion.version)
+    return db.session.execute(stmt).scalar()
+
+
+class VersionedCache:
+    """Key/value cache dropped as a whole whenever its dataset version changes
+
+    At most max_entries keys are kept, least recently used evicted first:
+    keys built from query parameters must not grow the cache without bound.
+    """
+
+    def __init__(self, name, max_entries=128):
+        self.name = name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = OrderedDict()
+
+    def get_or_load(self, key, loader, version=None):
+        """Return the cached value for key, calling loader() on a miss
+
+        `version` can be passed when the caller already read it. None results
+        (e.g. unknown IDs) are not cached.
+        """
+        # Read the version before the data: a concurrent write can only make
+        # the loaded value newer than the version it is stored under
+        if version is None:
+            version = get_version(self.name)
+
+        with self._lock:
+            if version != self._version:
+                self._entries = OrderedDict()
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        value = loader()
+
+        if value is not None:
+            with self._lock:
+                if version == self._version:
+                    self._entries[key] = value
+                    if len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        return value
+
+
+def make_etag(name, version, variant):
+    """Strong ETag identifying a dataset version and a request variant (filters)"""
+    digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:16]
+    return f"{name}-{version}-{digest}"
+
+
+def versioned_response(name, variant, build, public=True):
+    """Serve a conditional GET on a versioned dataset
+
+    ETag and Last-Modified come from the dataset version, so a client whose
+    copy is current gets a bodyless 304 Not Modified at the cost of a single
+    primary-key lookup: build(version) is only called to produce a full
+    response.
+    """
+    version, updated_at = get_version_info(name)
+    etag = make_etag(name, version, variant)
+    modified = ITALY_TZ.localize(updated_at).astimezone(pytz.utc) if updated_at else None
+
+    if request.if_none_match:
+        # If-None-Match always uses the weak comparison (RFC 9110)
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        # Compared at full precision: Last-Modified drops the microseconds,
+        # so a second write within the same second must not answer 304
+        not_modified = (
+            modified is not None
+            and request.if_modified_since is not None
+            and modified <= request.if_modified_since
+        )
+
+    if not_modified:
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build(version))
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    if modified:
+        response.last_modified = modified.replace(microsecond=0)
+    response.cache_control.no_cache = True
+    if public:
+        response.cache_control.public = True
+    else:
+        response.cache_control.private = True
+    return response
@@ -0,0 +1,182 @@
+"""
+Response compression negotiated with Accept-Encoding.
+
+Responses whose mimetype is in COMPRESSION_MIMETYPES are compressed with
+brotli (when the `brotli` package is installed) or gzip, whichever the
+client prefers, brotli winning ties. Buffered responses smaller than
+COMPRESSION_MIN_SIZE are sent as they are: below a packet or two the CPU
+is not worth it. Streamed responses (e.g. GET /api/orders/?stream=true)
+are compressed chunk by chunk as they are produced, and the compressor is
+flushed every COMPRESSION_STREAM_FLUSH_SIZE input bytes (a gzip sync
+flush, a brotli flush), so the client still receives the payload
+progressively instead of all at once when the stream ends. Server-Sent Events are not in the default
+mimetypes: each event must reach the kitchen display as soon as it is
+written.
+
+A compressed body is a different representation of the resource, so
+strong ETags are turned into weak ones (W/"..."). If-None-Match uses the
+weak comparison, so conditional GETs keep answering 304.
+
+Each worker counts the responses, bytes before and after compression and
+the CPU time spent compressing, per encoding. The same figures are
+exported as Prometheus counters, aggregated across workers.
+"""
+import gzip
+import threading
+import time
+import zlib
+from flask import request, current_app
+from metrics import observe_compression
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+class CompressionStats:
+    """Per-encoding counters of this worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, encoding, bytes_in, bytes_out, cpu_seconds):
+        with self._lock:
+            stats = self._stats.setdefault(encoding, {
+                'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0
+            })
+            stats['responses'] += 1
+            stats['bytes_in'] += bytes_in
+            stats['bytes_out'] += bytes_out
+            stats['cpu_seconds'] += cpu_seconds
+        observe_compression(encoding, bytes_in, bytes_out, cpu_seconds)
+
+    def snapshot(self):
+        """Counters per encoding, with the compression ratio (bytes_in / bytes_out)"""
+        with self._lock:
+            stats = {encoding: dict(values) for encoding, values in self._stats.items()}
+        for values in stats.values():
+            values['ratio'] = round(values['bytes_in'] / values['bytes_out'], 2) if values['bytes_out'] else None
+        return stats
+
+
+def negotiate_encoding(accept_encodings, available):
+    """Best of the available encodings accepted by the client, or None"""
+    best = None
+    best_quality = 0
+    for encoding in available:
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compressor(encoding, config):
+    """(compress(chunk), flush(), finish()) for a streamed body"""
+    if encoding == 'br':
+        stream = brotli.Compressor(quality=config['COMPRESSION_BROTLI_LEVEL'])
+        return stream.process, stream.flush, stream.finish
+    # wbits 16 + MAX_WBITS: gzip header and trailer
+    stream = zlib.compressobj(config['COMPRESSION_GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return stream.compress, lambda: stream.flush(zlib.Z_SYNC_FLUSH), stream.flush
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESSION_BROTLI_LEVEL'])
+    return gzip.compress(data, compresslevel=config['COMPRESSION_GZIP_LEVEL'])
+
+
+def compress_stream(chunks, encoding, config, stats):
+    """Compress a streamed body, flushing every COMPRESSION_STREAM_FLUSH_SIZE input bytes"""
+    process, flush, finish = compressor(encoding, config)
+    flush_size = config['COMPRESSION_STREAM_FLUSH_SIZE']
+    bytes_in = bytes_out = 0
+    pending = 0
+    cpu_seconds = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            start = time.thread_time()
+            output = process(chunk)
+            pending += len(chunk)
+            if pending >= flush_size:
+                output += flush()
+                pending = 0
+            cpu_seconds += time.thread_time() - start
+            bytes_in += len(chunk)
+            if output:
+                bytes_out += len(output)
+                yield output
+        start = time.thread_time()
+        output = finish()
+        cpu_seconds += time.thread_time() - start
+        bytes_out += len(output)
+        yield output
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+        stats.record(encoding, bytes_in, bytes_out, cpu_seconds)
+
+
+def weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def init_compression(app):
+    """Register the compression hook configured by the COMPRESSION_* settings"""
+    stats = CompressionStats()
+    app.extensions['compression'] = stats
+    if not app.config['COMPRESSION_ENABLED']:
+        return stats
+
+    available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    mimetypes = set(app.config['COMPRESSION_MIMETYPES'])
+
+    @app.after_request
+    def compress_response(response):
+        encoding = negotiate_encoding(request.accept_encodings, available)
+        if response.status_code == 304:
+            if encoding:
+                # Same validator as the compressed 200 would carry
+                weaken_etag(response)
+            return response
+
+        if response.mimetype not in mimetypes or response.direct_passthrough:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (
+            encoding is None
+            or request.method == 'HEAD'
+            or response.status_code < 200
+            or response.status_code in (204, 206)
+            or 'Content-Encoding' in response.headers
+        ):
+            return response
+
+        config = current_app.config
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, config, stats)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESSION_MIN_SIZE']:
+                return response
+            start = time.thread_time()
+            compressed = compress(data, encoding, config)
+            stats.record(encoding, len(data), len(compressed), time.thread_time() - start)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        weaken_etag(response)
+        return response
+
+    return stats
+
+
+def get_compression_stats():
+    return current_app.extensions['compression']
@@ -67,6 +67,94 @@ class Config:
             'options': '-c statement_timeout=30000'  # 30s statement timeout
         }
 
+    # Orders listing: keyset pagination and streamed responses
+    ORDERS_PAGE_SIZE = int(os.getenv('ORDERS_PAGE_SIZE', 50))
+    ORDERS_MAX_PAGE_SIZE = int(os.getenv('ORDERS_MAX_PAGE_SIZE', 500))
+    ORDERS_STREAM_BATCH_SIZE = int(os.getenv('ORDERS_STREAM_BATCH_SIZE', 200))
+
+    # Bulk order creation (offline tablets replaying their backlog)
+    ORDERS_BULK_MAX_SIZE = int(os.getenv('ORDERS_BULK_MAX_SIZE', 200))
+
+    # Menu and product search
+    SEARCH_LIMIT = int(os.getenv('SEARCH_LIMIT', 20))
+    SEARCH_MAX_LIMIT = int(os.getenv('SEARCH_MAX_LIMIT', 100))
+
+    # Menu name suggestions (search-as-you-type): default/maximum results and
+    # how often each worker checks for menu changes made by other workers
+    # (seconds)
+    MENU_SUGGEST_LIMIT = int(os.getenv('MENU_SUGGEST_LIMIT', 8))
+    MENU_SUGGEST_MAX_LIMIT = int(os.getenv('MENU_SUGGEST_MAX_LIMIT', 25))
+    MENU_SUGGEST_MAX_AGE = float(os.getenv('MENU_SUGGEST_MAX_AGE', 5))
+
+    # Kitchen queue model for order ETAs: parallel stations and how often the
+    # queue is rebuilt from the database (seconds)
+    KITCHEN_STATIONS = int(os.getenv('KITCHEN_STATIONS', 4))
+    KITCHEN_SCHEDULER_REFRESH = int(os.getenv('KITCHEN_SCHEDULER_REFRESH', 30))
+
+    # Kitchen display push channel (SSE): 'postgres' (LISTEN/NOTIFY, all
+    # gunicorn workers) or 'memory' (single process)
+    EVENT_BROKER = os.getenv('EVENT_BROKER', 'postgres')
+    ORDER_EVENTS_QUEUE_SIZE = int(os.getenv('ORDER_EVENTS_QUEUE_SIZE', 100))
+    ORDER_EVENTS_KEEPALIVE = int(os.getenv('ORDER_EVENTS_KEEPALIVE', 15))
+    # Each stream holds a gunicorn thread (--threads 8): streams per worker
+    # above the cap are answered 503, leaving threads for the API
+    ORDER_EVENTS_MAX_STREAMS = int(os.getenv('ORDER_EVENTS_MAX_STREAMS', 4))
+    # Lifetime (seconds) of the stream token passed in the SSE URL
+    ORDER_EVENTS_TOKEN_EXPIRES = int(os.getenv('ORDER_EVENTS_TOKEN_EXPIRES', 60))
+
+    # Response compression (gzip, and brotli when installed): responses
+    # smaller than COMPRESSION_MIN_SIZE bytes are sent uncompressed; streamed
+    # ones are flushed every COMPRESSION_STREAM_FLUSH_SIZE input bytes
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_STREAM_FLUSH_SIZE = int(os.getenv('COMPRESSION_STREAM_FLUSH_SIZE', 16384))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_LEVEL = int(os.getenv('COMPRESSION_BROTLI_LEVEL', 4))
+    COMPRESSION_MIMETYPES = os.getenv('COMPRESSION_MIMETYPES', 'application/json,text/html,text/css,application/javascript').split(',')
+
+    # Prometheus instrumentation at /metrics. Under gunicorn, set
+    # PROMETHEUS_MULTIPROC_DIR to aggregate all workers (see metrics.py)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Server-Timing header with the auth/db/ser/app phases of each request
+    # (see timing.py); on by default in development only
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
+    # Slow-query log (see slow_queries.py): statements slower than
+    # SLOW_QUERY_THRESHOLD milliseconds are kept in a ring buffer of
+    # SLOW_QUERY_LOG_SIZE entries per worker, with a query plan at most every
+    # SLOW_QUERY_EXPLAIN_INTERVAL seconds (0 disables EXPLAIN): actual
+    # (EXPLAIN ANALYZE) for read-only SELECTs, estimated for other statements
+    SLOW_QUERY_LOG_ENABLED = os.getenv('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 250))
+    SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 100))
+    SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 60))
+
+    # SQL statement budgets per request (see query_budget.py): 'off', 'log'
+    # or 'raise' (tests/staging). QUERY_BUDGETS overrides the @query_budget
+    # of endpoints ('orders.get_all_orders=3,...'); QUERY_BUDGET_DEFAULT
+    # applies to endpoints without one (unset: unchecked)
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'off')
+    QUERY_BUDGETS = os.getenv('QUERY_BUDGETS', '')
+    QUERY_BUDGET_DEFAULT = int(os.environ['QUERY_BUDGET_DEFAULT']) if os.getenv('QUERY_BUDGET_DEFAULT') else None
+
+    # Sampling profiler (see profiler.py): managers profile a request with
+    # X-Profile: 1 (or ?profile=1) on the endpoints matching
+    # PROFILER_ENDPOINTS ('orders.*,menu.get_all_menu_items'), sampled every
+    # PROFILER_INTERVAL seconds; the last PROFILER_MAX_FILES profiles are kept
+    # in PROFILER_DIR. PROFILER_PERIODIC_ENABLED samples all requests every
+    # PROFILER_PERIODIC_INTERVAL seconds, aggregated per endpoint.
+    # The sampler needs the GIL, which a busy request thread only releases
+    # every 5 ms (sys.getswitchinterval()): shorter intervals do not add
+    # samples, they only slow the profiled request down
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() == 'true'
+    PROFILER_ENDPOINTS = os.getenv('PROFILER_ENDPOINTS', '*').split(',')
+    PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL', 0.01))
+    PROFILER_DIR = os.getenv('PROFILER_DIR', '/tmp/ristosmart-profiles')
+    PROFILER_MAX_FILES = int(os.getenv('PROFILER_MAX_FILES', 50))
+    PROFILER_PERIODIC_ENABLED = os.getenv('PROFILER_PERIODIC_ENABLED', 'false').lower() == 'true'
+    PROFILER_PERIODIC_INTERVAL = float(os.getenv('PROFILER_PERIODIC_INTERVAL', 0.1))
+
     PORT = int(os.environ.get('PORT', 3000))
     DEBUG = os.environ.get('FLASK_ENV') == 'development'
 
@@ -82,7 +170,14 @@ class Config:
     JWT_ALGORITHM = 'HS256'
 
 class DevelopmentConfig(Config):
+    # Local runs only: the Docker image sets FLASK_ENV=production
     DEBUG = True
+    # Record SQL statements per request and expose the count as X-Query-Count
+    SQLALCHEMY_RECORD_QUERIES = True
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'log')
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'true').lower() == 'true'
+    PROFILER_PERIODIC_ENABLED = os.getenv('PROFILER_PERIODIC_ENABLED', 'true').lower() == 'true'
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -0,0 +1,24 @@
+"""
+URL converters registered on the Flask app.
+"""
+import uuid
+from werkzeug.routing import BaseConverter, ValidationError
+
+
+class UUIDConverter(BaseConverter):
+    """`<uuid:name>` route segment, passed to the view as a canonical UUID string
+
+    A malformed value does not match the rule, so routing goes on to the
+    other rules (GET /api/orders/bulk answers 405, not a bad order ID) and
+    ends in 404 when none matches: before authentication and before the
+    view touches the database.
+    """
+
+    def to_python(self, value):
+        try:
+            return str(uuid.UUID(value))
+        except ValueError:
+            raise ValidationError()
+
+    def to_url(self, value):
+        return str(value)
@@ -0,0 +1,163 @@
+"""
+Swagger/OpenAPI documentation for Diagnostics endpoints
+"""
+
+get_compression_stats_spec = {
+    "tags": ["Diagnostics"],
+    "summary": "Response compression statistics",
+    "description": "Responses compressed, bytes before and after compression, compression ratio and CPU time spent compressing, per encoding, since the worker answering the request started (Manager only)",
+    "security": [{"Bearer": []}],
+    "responses": {
+        200: {
+            "description": "Compression statistics of this worker",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "worker": {"type": "integer", "description": "Process ID of the worker"},
+                    "data": {
+                        "type": "object",
+                        "example": {
+                            "gzip": {"responses": 120, "bytes_in": 5242880, "bytes_out": 655360, "ratio": 8.0, "cpu_seconds": 0.42}
+                        }
+                    }
+                }
+            }
+        },
+        403: {"description": "Manager role required"}
+    }
+}
+
+get_slow_queries_spec = {
+    "tags": ["Diagnostics"],
+    "summary": "Slow SQL statements",
+    "description": "SQL statements slower than SLOW_QUERY_THRESHOLD milliseconds issued by the worker answering the request, most recent first, with their bound parameters (passwords masked), the endpoint that issued them and, for sampled statements, their query plan: EXPLAIN (ANALYZE, BUFFERS) for read-only SELECTs, plain EXPLAIN (estimates only, not executed) for writes, locking SELECTs (FOR UPDATE/SHARE) and SELECTs calling nextval, pg_notify or advisory locks (Manager only)",
+    "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "limit",
+            "in": "query",
+            "type": "integer",
+            "required": False,
+            "description": "Return only the most recent statements"
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Slow statements of this worker",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "worker": {"type": "integer", "description": "Process ID of the worker"},
+                    "threshold_ms": {"type": "number", "example": 250},
+                    "count": {"type": "integer", "example": 1},
+                    "data": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "example": {
+                                "time": "2025-01-15T20:31:07.120000+01:00",
+                                "duration_ms": 412.3,
+                                "endpoint": "orders.get_all_orders",
+                                "method": "GET",
+                                "path": "/api/orders/",
+                                "statement": "SELECT orders.id, orders.created_at, ... FROM orders WHERE orders.status = %(status_1)s ORDER BY orders.created_at DESC",
+                                "parameters": {"status_1": "pending"},
+                                "explain": "Sort  (cost=... rows=...) (actual time=... rows=... loops=1)\n  Buffers: shared hit=..."
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        400: {"description": "Invalid limit"},
+        403: {"description": "Manager role required"}
+    }
+}
+
+get_profiles_spec = {
+    "tags": ["Diagnostics"],
+    "summary": "Stored request profiles",
+    "description": "Profiles taken on demand, newest first. A manager profiles a request by sending it with the `X-Profile: 1` header (or `?profile=1`) to an endpoint allowed by PROFILER_ENDPOINTS: the response names the stored profile in its X-Profile header. With `X-Profile: inline` the profile replaces the response body (Manager only)",
+    "security": [{"Bearer": []}],
+    "responses": {
+        200: {
+            "description": "Stored profiles, shared by all workers",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "enabled": {"type": "boolean", "description": "Whether on-demand profiling is enabled (PROFILER_ENABLED)"},
+                    "count": {"type": "integer", "example": 1},
+                    "data": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "example": {
+                                "name": "20250115T203107-orders.get_all_orders-4242-1f3a9c0e.collapsed",
+                                "size": 18234,
+                                "modified": "2025-01-15T19:31:07.512000+00:00"
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        403: {"description": "Manager role required"}
+    }
+}
+
+get_profile_spec = {
+    "tags": ["Diagnostics"],
+    "summary": "Download a request profile",
+    "description": "Profile in collapsed-stack format, one `frame;frame;... samples` line per distinct stack, outermost frame first: the input of flamegraph.pl, inferno or speedscope (Manager only)",
+    "security": [{"Bearer": []}],
+    "produces": ["text/plain"],
+    "parameters": [
+        {
+            "name": "name",
+            "in": "path",
+            "type": "string",
+            "required": True,
+            "description": "Profile name, as listed by GET /api/diagnostics/profiles"
+        }
+    ],
+    "responses": {
+        200: {"description": "Collapsed stacks"},
+        403: {"description": "Manager role required"},
+        404: {"description": "Profile not found"}
+    }
+}
+
+get_sampling_spec = {
+    "tags": ["Diagnostics"],
+    "summary": "Stacks sampled per endpoint",
+    "description": "With PROFILER_PERIODIC_ENABLED, each worker samples the stacks of all the requests it serves every PROFILER_PERIODIC_INTERVAL seconds. Without `endpoint`, returns the samples taken per endpoint by the worker answering the request; with `endpoint`, its aggregated stacks in collapsed-stack format (Manager only)",
+    "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "endpoint",
+            "in": "query",
+            "type": "string",
+            "required": False,
+            "description": "Endpoint whose stacks to return, e.g. orders.get_all_orders"
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Samples per endpoint, or the collapsed stacks of one endpoint (text/plain)",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "enabled": {"type": "boolean", "description": "Whether periodic sampling is enabled (PROFILER_PERIODIC_ENABLED)"},
+                    "worker": {"type": "integer", "description": "Process ID of the worker"},
+                    "data": {"type": "object", "example": {"orders.get_all_orders": 412, "menu.get_available_menu_items": 37}}
+                }
+            }
+        },
+        403: {"description": "Manager role required"},
+        404: {"description": "No samples for the endpoint"}
+    }
+}
@@ -15,6 +15,29 @@ get_all_products_spec = {
     "summary": "Get all products",
     "description": "Retrieve all products in inventory",
     "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "fields",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated fields to return, only these columns are selected. Takes precedence over view",
+            "example": "id,name,quantity"
+        },
+        {
+            "name": "view",
+            "in": "query",
+            "type": "string",
+            "enum": ["full", "summary"],
+            "default": "full",
+            "description": "summary: id, ean, name, price, quantity"
+        },
+        {
+            "name": "If-None-Match",
+            "in": "header",
+            "type": "string",
+            "description": "ETag of the cached copy; a 304 is returned if it is still current"
+        }
+    ],
     "responses": {
         200: {
             "description": "Products retrieved successfully",
@@ -44,6 +67,7 @@ get_all_products_spec = {
                 }
             }
         },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         401: {"description": "Unauthorized"}
     }
 }
@@ -95,6 +119,57 @@ get_product_ean_spec = {
     }
 }
 
+search_products_text_spec = {
+    "tags": ["Inventory"],
+    "summary": "Search products",
+    "description": "Full-text and typo-tolerant search over product names, descriptions and categories, ranked by relevance",
+    "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "q",
+            "in": "query",
+            "type": "string",
+            "required": True,
+            "description": "Search terms (at least 2 characters). Italian stemming, \"quoted phrases\" and -exclusions are supported, typos are tolerated on the name",
+            "example": "mozzarella"
+        },
+        {
+            "name": "limit",
+            "in": "query",
+            "type": "integer",
+            "default": 20,
+            "maximum": 100,
+            "description": "Maximum number of results"
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Matching products, best matches first",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "data": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string"},
+                                "ean": {"type": "string"},
+                                "name": {"type": "string"},
+                                "score": {"type": "number", "description": "Relevance, higher is better"}
+                            }
+                        }
+                    },
+                    "count": {"type": "integer"}
+                }
+            }
+        },
+        400: {"description": "Missing or too short q, or invalid limit"},
+        401: {"description": "Unauthorized"}
+    }
+}
+
 get_product_spec = {
     "tags": ["Inventory"],
     "summary": "Get product by ID",
@@ -135,8 +210,7 @@ get_product_spec = {
                 }
             }
         },
-        400: {"description": "Invalid UUID format"},
-        404: {"description": "Product not found"}
+        404: {"description": "Product not found, or malformed ID"}
     }
 }
 
@@ -382,7 +456,6 @@ delete_product_spec = {
                 }
             }
         },
-        400: {"description": "Invalid UUID format"},
-        404: {"description": "Product not found"}
+        404: {"description": "Product not found, or malformed ID"}
     }
 }
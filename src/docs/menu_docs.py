@@ -7,6 +7,21 @@ get_all_menu_items_spec = {
     "summary": "Get all menu items",
     "description": "Retrieve all menu items with optional filtering (PUBLIC endpoint - no authentication required)",
     "parameters": [
+        {
+            "name": "fields",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated fields to return, only these columns are selected. Takes precedence over view",
+            "example": "id,name,price"
+        },
+        {
+            "name": "view",
+            "in": "query",
+            "type": "string",
+            "enum": ["full", "summary"],
+            "default": "full",
+            "description": "summary: id, name, price, category, is_available"
+        },
         {
             "name": "category",
             "in": "query",
@@ -20,6 +35,21 @@ get_all_menu_items_spec = {
             "type": "string",
             "enum": ["true", "false"],
             "description": "Filter by availability"
+        },
+        {
+            "name": "exclude_allergens",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated allergens to exclude, e.g. gluten,dairy (case-insensitive). "
+                           "One of gluten, crustaceans, eggs, fish, peanuts, soy, dairy, nuts, celery, "
+                           "mustard, sesame, sulfites, lupin, molluscs",
+            "example": "gluten,lactose"
+        },
+        {
+            "name": "If-None-Match",
+            "in": "header",
+            "type": "string",
+            "description": "ETag of the cached copy; a 304 is returned if it is still current"
         }
     ],
     "responses": {
@@ -49,7 +79,9 @@ get_all_menu_items_spec = {
                     "count": {"type": "integer", "example": 15}
                 }
             }
-        }
+        },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid category, allergens, fields or view"}
     }
 }
 
@@ -57,6 +89,38 @@ get_available_menu_items_spec = {
     "tags": ["Menu"],
     "summary": "Get available menu items",
     "description": "Retrieve only available menu items for ordering (PUBLIC endpoint)",
+    "parameters": [
+        {
+            "name": "fields",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated fields to return, only these columns are selected. Takes precedence over view",
+            "example": "id,name,price"
+        },
+        {
+            "name": "view",
+            "in": "query",
+            "type": "string",
+            "enum": ["full", "summary"],
+            "default": "full",
+            "description": "summary: id, name, price, category, is_available"
+        },
+        {
+            "name": "exclude_allergens",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated allergens to exclude, e.g. gluten,dairy (case-insensitive). "
+                           "One of gluten, crustaceans, eggs, fish, peanuts, soy, dairy, nuts, celery, "
+                           "mustard, sesame, sulfites, lupin, molluscs",
+            "example": "gluten,lactose"
+        },
+        {
+            "name": "If-None-Match",
+            "in": "header",
+            "type": "string",
+            "description": "ETag of the cached copy; a 304 is returned if it is still current"
+        }
+    ],
     "responses": {
         200: {
             "description": "Available menu items retrieved successfully",
@@ -68,7 +132,119 @@ get_available_menu_items_spec = {
                     "count": {"type": "integer"}
                 }
             }
+        },
+        304: {"description": "Not modified since the ETag in If-None-Match"},
+        400: {"description": "Invalid allergens, fields or view"}
+    }
+}
+
+search_menu_items_spec = {
+    "tags": ["Menu"],
+    "summary": "Search menu items",
+    "description": "Full-text and typo-tolerant search over menu item names and descriptions, ranked by relevance (PUBLIC endpoint - no authentication required)",
+    "parameters": [
+        {
+            "name": "q",
+            "in": "query",
+            "type": "string",
+            "required": True,
+            "description": "Search terms (at least 2 characters). Italian stemming, \"quoted phrases\" and -exclusions are supported, typos are tolerated on the name",
+            "example": "margherita"
+        },
+        {
+            "name": "limit",
+            "in": "query",
+            "type": "integer",
+            "default": 20,
+            "maximum": 100,
+            "description": "Maximum number of results"
+        },
+        {
+            "name": "available",
+            "in": "query",
+            "type": "string",
+            "enum": ["true", "false"],
+            "description": "Filter by availability"
+        },
+        {
+            "name": "exclude_allergens",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated allergens to exclude, e.g. gluten,dairy (case-insensitive). "
+                           "One of gluten, crustaceans, eggs, fish, peanuts, soy, dairy, nuts, celery, "
+                           "mustard, sesame, sulfites, lupin, molluscs"
         }
+    ],
+    "responses": {
+        200: {
+            "description": "Matching menu items, best matches first",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "data": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string"},
+                                "name": {"type": "string"},
+                                "score": {"type": "number", "description": "Relevance, higher is better"}
+                            }
+                        }
+                    },
+                    "count": {"type": "integer"}
+                }
+            }
+        },
+        400: {"description": "Missing or too short q, invalid limit or unknown allergens"}
+    }
+}
+
+suggest_menu_items_spec = {
+    "tags": ["Menu"],
+    "summary": "Suggest menu item names",
+    "description": "Search-as-you-type suggestions: available menu items with a word of the name starting with q, case and accent insensitive. Served from an in-memory index (PUBLIC endpoint - no authentication required)",
+    "parameters": [
+        {
+            "name": "q",
+            "in": "query",
+            "type": "string",
+            "required": True,
+            "description": "Prefix typed so far",
+            "example": "marg"
+        },
+        {
+            "name": "limit",
+            "in": "query",
+            "type": "integer",
+            "default": 8,
+            "maximum": 25,
+            "description": "Maximum number of suggestions"
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Matching menu item names in alphabetical order of the matched word",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "data": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "id": {"type": "string"},
+                                "name": {"type": "string", "example": "Pizza Margherita"}
+                            }
+                        }
+                    },
+                    "count": {"type": "integer"}
+                }
+            }
+        },
+        400: {"description": "Missing q or invalid limit"}
     }
 }
 
@@ -97,8 +273,7 @@ get_menu_item_spec = {
                 }
             }
         },
-        400: {"description": "Invalid UUID format"},
-        404: {"description": "Menu item not found"}
+        404: {"description": "Menu item not found, or malformed ID"}
     }
 }
 
@@ -124,7 +299,11 @@ create_menu_item_spec = {
                     "category": {"type": "string", "enum": ["appetizer", "main", "dessert", "beverage", "side"], "example": "main"},
                     "is_available": {"type": "boolean", "example": True},
                     "preparation_time": {"type": "integer", "example": 15},
-                    "allergens": {"type": "array", "items": {"type": "string"}, "example": ["gluten", "dairy"]},
+                    "allergens": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["gluten", "crustaceans", "eggs", "fish", "peanuts", "soy", "dairy", "nuts", "celery", "mustard", "sesame", "sulfites", "lupin", "molluscs"]},
+                        "example": ["gluten", "dairy"]
+                    },
                     "nutritional_info": {"type": "object", "example": {"calories": 850, "protein": 35, "carbs": 100}}
                 }
             }
@@ -228,8 +407,7 @@ delete_menu_item_spec = {
                 }
             }
         },
-        400: {"description": "Invalid UUID format"},
-        404: {"description": "Menu item not found"},
+        404: {"description": "Menu item not found, or malformed ID"},
         403: {"description": "Forbidden - Manager role required"}
     }
 }
@@ -5,9 +5,24 @@ Swagger/OpenAPI documentation for Order endpoints
 get_all_orders_spec = {
     "tags": ["Orders"],
     "summary": "Get all orders",
-    "description": "Retrieve all orders with optional status filtering",
+    "description": "Retrieve all orders with optional status filtering and keyset pagination",
     "security": [{"Bearer": []}],
     "parameters": [
+        {
+            "name": "fields",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated fields to return, only these columns are selected. Takes precedence over view",
+            "example": "order_number,table_number,items.status"
+        },
+        {
+            "name": "view",
+            "in": "query",
+            "type": "string",
+            "enum": ["full", "summary"],
+            "default": "full",
+            "description": "summary: id, order_number, table_number, status and the id, menu_item_name, quantity and status of each item. Nested item fields are dotted (items.status)"
+        },
         {
             "name": "status",
             "in": "query",
@@ -27,17 +42,97 @@ get_all_orders_spec = {
             "type": "string",
             "enum": ["dine_in", "takeaway", "delivery"],
             "description": "Filter by order type"
+        },
+        {
+            "name": "limit",
+            "in": "query",
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 500,
+            "description": "Page size. Enables keyset pagination (default page size: 50)"
+        },
+        {
+            "name": "cursor",
+            "in": "query",
+            "type": "string",
+            "description": "Opaque cursor returned as next_cursor by the previous page"
+        },
+        {
+            "name": "stream",
+            "in": "query",
+            "type": "string",
+            "enum": ["true", "false"],
+            "description": "Send the response as a chunked stream, serialized one order at a time"
         }
     ],
     "responses": {
         200: {
-            "description": "Orders retrieved successfully",
+            "description": "Orders retrieved successfully, newest first",
             "schema": {
                 "type": "object",
                 "properties": {
                     "success": {"type": "boolean", "example": True},
                     "data": {"type": "array"},
-                    "count": {"type": "integer", "example": 25}
+                    "count": {"type": "integer", "example": 25},
+                    "next_cursor": {
+                        "type": "string",
+                        "x-nullable": True,
+                        "description": "Only present when paginating; null on the last page"
+                    }
+                }
+            }
+        },
+        400: {"description": "Invalid limit or cursor"},
+        401: {"description": "Unauthorized"}
+    }
+}
+
+order_events_spec = {
+    "tags": ["Orders"],
+    "summary": "Order events stream (Server-Sent Events)",
+    "description": "Long-lived text/event-stream pushing order.created, order.status_changed and "
+                   "order_item.status_changed events as they are committed, from every server worker. "
+                   "Replaces polling GET /orders/?status=active on kitchen displays. "
+                   "A keep-alive comment is sent every 15 seconds. "
+                   "Each server worker serves a limited number of streams (ORDER_EVENTS_MAX_STREAMS).",
+    "security": [{"Bearer": []}],
+    "produces": ["text/event-stream"],
+    "parameters": [
+        {
+            "name": "jwt",
+            "in": "query",
+            "type": "string",
+            "description": "Stream token from POST /orders/events/token, for clients (e.g. EventSource) "
+                           "that cannot set the Authorization header. Access tokens are refused here; "
+                           "the stream token is checked when connecting, so fetch a new one to reconnect"
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Event stream. Each event has an `event:` type line and a JSON `data:` line "
+                           "with order_id, order_number, table_number and status; item events add "
+                           "`item` {id, status}, creation events add order_type and items"
+        },
+        401: {"description": "Unauthorized, or an access token passed in the jwt parameter"},
+        503: {"description": "Too many open streams on this worker; retry after the Retry-After seconds"}
+    }
+}
+
+order_events_token_spec = {
+    "tags": ["Orders"],
+    "summary": "Create an order events stream token",
+    "description": "Short-lived token (ORDER_EVENTS_TOKEN_EXPIRES, 60 seconds by default) only valid for "
+                   "GET /orders/events, to pass in its jwt query parameter instead of the access token",
+    "security": [{"Bearer": []}],
+    "responses": {
+        201: {
+            "description": "Stream token created",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean"},
+                    "token": {"type": "string"},
+                    "expires_in": {"type": "integer", "description": "Seconds"}
                 }
             }
         },
@@ -71,8 +166,7 @@ get_order_spec = {
                 }
             }
         },
-        400: {"description": "Invalid UUID format"},
-        404: {"description": "Order not found"}
+        404: {"description": "Order not found, or malformed ID"}
     }
 }
 
@@ -128,6 +222,86 @@ create_order_spec = {
     }
 }
 
+bulk_create_orders_spec = {
+    "tags": ["Orders"],
+    "summary": "Bulk create orders",
+    "description": "Create a backlog of orders queued by an offline tablet in a single transaction (Waiter or Manager only). Orders with an idempotency_key that was already used are not created again and the existing order is returned, so a batch can be safely replayed. Each order gets its own result: created, existing, rejected (unavailable menu items) or invalid (validation errors).",
+    "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "body",
+            "in": "body",
+            "required": True,
+            "schema": {
+                "type": "object",
+                "required": ["orders"],
+                "properties": {
+                    "orders": {
+                        "type": "array",
+                        "maxItems": 200,
+                        "items": {
+                            "type": "object",
+                            "required": ["table_number", "order_type", "items"],
+                            "properties": {
+                                "idempotency_key": {"type": "string", "maxLength": 64, "example": "tablet-3-000128"},
+                                "table_number": {"type": "integer", "example": 5},
+                                "customer_name": {"type": "string", "example": "John Smith"},
+                                "order_type": {"type": "string", "enum": ["dine_in", "takeout", "delivery"], "example": "dine_in"},
+                                "special_instructions": {"type": "string"},
+                                "items": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "required": ["menu_item_id", "quantity"],
+                                        "properties": {
+                                            "menu_item_id": {"type": "string", "format": "uuid"},
+                                            "quantity": {"type": "integer", "example": 2},
+                                            "special_instructions": {"type": "string"}
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Batch processed, see the per-order results",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "message": {"type": "string"},
+                    "data": {
+                        "type": "object",
+                        "properties": {
+                            "results": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "index": {"type": "integer"},
+                                        "idempotency_key": {"type": "string"},
+                                        "status": {"type": "string", "enum": ["created", "existing", "rejected", "invalid"]},
+                                        "order": {"type": "object"}
+                                    }
+                                }
+                            },
+                            "summary": {"type": "object"}
+                        }
+                    }
+                }
+            }
+        },
+        400: {"description": "Missing or oversized orders list"},
+        401: {"description": "Unauthorized"},
+        403: {"description": "Forbidden - Waiter or Manager role required"}
+    }
+}
+
 update_order_status_spec = {
     "tags": ["Orders"],
     "summary": "Update order status",
@@ -171,8 +345,8 @@ update_order_status_spec = {
                 }
             }
         },
-        400: {"description": "Invalid status or UUID"},
-        404: {"description": "Order not found"}
+        400: {"description": "Invalid status"},
+        404: {"description": "Order not found, or malformed ID"}
     }
 }
 
@@ -227,8 +401,78 @@ update_order_item_status_spec = {
                 }
             }
         },
-        400: {"description": "Invalid status or UUID"},
-        404: {"description": "Order or item not found"}
+        400: {"description": "Invalid status"},
+        404: {"description": "Order or item not found, or malformed ID"}
+    }
+}
+
+bulk_update_order_item_status_spec = {
+    "tags": ["Orders"],
+    "summary": "Bulk update order item status",
+    "description": "Update the status of up to 500 order items, across any number of orders, in a single transaction (Chef or Manager only). Orders whose items are all ready or delivered are marked as ready. Only the changed items and orders are returned.",
+    "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "body",
+            "in": "body",
+            "required": True,
+            "schema": {
+                "type": "object",
+                "required": ["updates"],
+                "properties": {
+                    "updates": {
+                        "type": "array",
+                        "maxItems": 500,
+                        "items": {
+                            "type": "object",
+                            "required": ["order_id", "item_id", "status"],
+                            "properties": {
+                                "order_id": {"type": "string", "format": "uuid"},
+                                "item_id": {"type": "string", "format": "uuid"},
+                                "status": {
+                                    "type": "string",
+                                    "enum": ["preparing", "ready", "delivered", "cancelled"],
+                                    "example": "ready"
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    ],
+    "responses": {
+        200: {
+            "description": "Order items updated successfully",
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "success": {"type": "boolean", "example": True},
+                    "message": {"type": "string"},
+                    "data": {
+                        "type": "object",
+                        "properties": {
+                            "items": {
+                                "type": "array",
+                                "description": "Updated items with their new status",
+                                "items": {"type": "object"}
+                            },
+                            "orders": {
+                                "type": "array",
+                                "description": "Orders whose status changed as a result",
+                                "items": {"type": "object"}
+                            },
+                            "not_found": {
+                                "type": "array",
+                                "description": "Requested (order_id, item_id) pairs that do not exist",
+                                "items": {"type": "object"}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        400: {"description": "Validation error"}
     }
 }
 
@@ -277,7 +521,7 @@ process_payment_spec = {
             }
         },
         400: {"description": "Invalid payment data"},
-        404: {"description": "Order not found"}
+        404: {"description": "Order not found, or malformed ID"}
     }
 }
 
@@ -307,7 +551,6 @@ delete_order_spec = {
                 }
             }
         },
-        400: {"description": "Invalid UUID format"},
-        404: {"description": "Order not found"}
+        404: {"description": "Order not found, or malformed ID"}
     }
 }
@@ -7,6 +7,23 @@ get_all_users_spec = {
     "summary": "Get all users",
     "description": "Retrieve all users (Manager only)",
     "security": [{"Bearer": []}],
+    "parameters": [
+        {
+            "name": "fields",
+            "in": "query",
+            "type": "string",
+            "description": "Comma-separated fields to return, only these columns are selected. Takes precedence over view",
+            "example": "id,username,role"
+        },
+        {
+            "name": "view",
+            "in": "query",
+            "type": "string",
+            "enum": ["full", "summary"],
+            "default": "full",
+            "description": "summary: id, username, full_name, role, is_active"
+        }
+    ],
     "responses": {
         200: {
             "description": "Users retrieved successfully",
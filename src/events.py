@@ -0,0 +1,220 @@
+"""
+Order event fan-out for the kitchen display push channel (SSE).
+
+Routes publish events while their transaction is open and subscribers only
+see them once it commits. The broker is selected with EVENT_BROKER:
+- 'postgres': events are sent with pg_notify and every gunicorn worker
+  LISTENs on a dedicated connection, so SSE clients connected to any worker
+  receive events produced by all of them
+- 'memory': in-process fan-out, for single-process deployments
+"""
+import json
+import queue
+import select
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, text
+from models import db
+
+ORDER_EVENTS_CHANNEL = 'order_events'
+
+# pg_notify payloads must stay below 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7900
+
+
+class TooManySubscribers(Exception):
+    """The worker already serves ORDER_EVENTS_MAX_STREAMS streams"""
+
+
+class Subscription:
+    """Queue of events delivered to a single SSE client"""
+
+    def __init__(self, broker, maxsize):
+        self.broker = broker
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout):
+        """Return the next event, or None if none arrived within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process fan-out of committed events to subscribers"""
+
+    def __init__(self, queue_size=100, max_subscribers=None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def is_full(self):
+        """Whether the worker already serves max_subscribers streams"""
+        return self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self):
+        subscription = Subscription(self, self.queue_size)
+        with self._lock:
+            if self.is_full():
+                raise TooManySubscribers(f"{len(self._subscribers)} streams open")
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, event_data):
+        """Queue an event on the current transaction, delivered after commit"""
+        self.publish_many([event_data])
+
+    def publish_many(self, events):
+        pending = db.session.info.setdefault('pending_events', [])
+        pending.extend((self, event_data) for event_data in events)
+
+    def dispatch(self, event_data):
+        """Deliver an event to every subscriber of this process"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event_data)
+            except queue.Full:
+                # Slow client: drop the event rather than block the publisher
+                print(f"[EVENTS] Subscriber queue full, dropping {event_data.get('type')} event")
+
+
+class PostgresEventBroker(EventBroker):
+    """Cross-worker fan-out through Postgres LISTEN/NOTIFY"""
+
+    def __init__(self, engine, queue_size=100, max_subscribers=None, reconnect_delay=2):
+        super().__init__(queue_size, max_subscribers)
+        self.reconnect_delay = reconnect_delay
+        self._listener = None
+        # Subscriptions are made while the SSE body is streamed, outside the
+        # app context
+        self._engine = engine
+
+    def subscribe(self):
+        # Threads do not survive gunicorn's fork, so each worker starts its
+        # own listener on first use
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='order-events-listener', daemon=True)
+                self._listener.start()
+        return super().subscribe()
+
+    def publish_many(self, events):
+        """NOTIFY within the current transaction: Postgres delivers on commit"""
+        payloads = []
+        for event_data in events:
+            payload = json.dumps(event_data)
+            if len(payload) > MAX_NOTIFY_PAYLOAD:
+                payload = json.dumps({**event_data, 'items': None, 'items_truncated': True})
+            payloads.append(payload)
+        if not payloads:
+            return
+        # One round trip for the whole batch
+        db.session.execute(
+            text('SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload'),
+            {'channel': ORDER_EVENTS_CHANNEL, 'payloads': payloads}
+        )
+
+    def _listen(self):
+        while True:
+            connection = None
+            try:
+                # Dedicated connection, removed from the pool for the worker's lifetime
+                connection = self._engine.raw_connection()
+                dbapi_connection = connection.driver_connection
+                connection.detach()
+                # End the transaction opened by the pool's pre-ping: LISTEN only
+                # takes effect outside of a transaction block
+                dbapi_connection.rollback()
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {ORDER_EVENTS_CHANNEL}')
+                print(f"[EVENTS] Listening on channel {ORDER_EVENTS_CHANNEL}")
+
+                while True:
+                    if select.select([dbapi_connection], [], [], 5) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    while dbapi_connection.notifies:
+                        notification = dbapi_connection.notifies.pop(0)
+                        self.dispatch(json.loads(notification.payload))
+            except Exception as e:
+                print(f"[EVENTS] Listener error: {e}. Reconnecting in {self.reconnect_delay}s...")
+                time.sleep(self.reconnect_delay)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+
+@event.listens_for(db.session, 'after_commit')
+def _deliver_pending_events(session):
+    for broker, event_data in session.info.pop('pending_events', []):
+        broker.dispatch(event_data)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending_events(session, previous_transaction):
+    session.info.pop('pending_events', None)
+
+
+def init_events(app):
+    """Create the order event broker configured by EVENT_BROKER"""
+    queue_size = app.config['ORDER_EVENTS_QUEUE_SIZE']
+    max_streams = app.config['ORDER_EVENTS_MAX_STREAMS']
+    if app.config['EVENT_BROKER'] == 'postgres':
+        with app.app_context():
+            engine = db.engine
+        broker = PostgresEventBroker(engine, queue_size, max_streams)
+    else:
+        broker = EventBroker(queue_size, max_streams)
+    app.extensions['order_events'] = broker
+    return broker
+
+
+def get_order_events():
+    return current_app.extensions['order_events']
+
+
+def order_event(event_type, order, item=None):
+    """Build an order lifecycle event from an order (and item) or row with the same attributes"""
+    event_data = {
+        'type': event_type,
+        'order_id': str(order.id),
+        'order_number': order.order_number,
+        'table_number': order.table_number,
+        'status': order.status,
+    }
+    if item is not None:
+        event_data['item'] = {'id': str(item.id), 'status': item.status}
+    if event_type == 'order.created':
+        event_data['order_type'] = order.order_type
+        event_data['items'] = [
+            {
+                'id': str(order_item.id),
+                'menu_item_name': order_item.menu_item_name,
+                'quantity': order_item.quantity,
+                'special_instructions': order_item.special_instructions,
+                'status': order_item.status,
+            }
+            for order_item in order.items
+        ]
+    return event_data
+
+
+def publish_order_event(event_type, order, item=None):
+    """Publish an order lifecycle event to kitchen displays"""
+    get_order_events().publish(order_event(event_type, order, item))
@@ -0,0 +1,23 @@
+"""
+Gunicorn server hooks, loaded from the working directory
+
+Keep the Prometheus multiprocess directory (PROMETHEUS_MULTIPROC_DIR, see
+metrics.py) in step with the worker processes.
+"""
+import glob
+import os
+
+
+def on_starting(server):
+    """Drop the metric files of a previous run, which would be aggregated too"""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for filename in glob.glob(os.path.join(path, '*.db')):
+            os.remove(filename)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,60 @@
+"""
+orjson-based JSON provider for the Flask app.
+
+Replaces the stdlib encoder behind jsonify, request.get_json and
+current_app.json. orjson encodes dicts, lists, floats and UUIDs in C. The
+other types are encoded as Flask's default provider does: Decimals as
+strings, so monetary values are never rounded through float by accident,
+and dates and datetimes as HTTP dates (the serializers already turn model
+datetimes into ISO 8601 strings).
+
+Unlike Flask's default provider, non-ASCII characters are sent as UTF-8
+instead of \\uXXXX escapes: the same JSON for any client.
+"""
+import dataclasses
+import decimal
+from datetime import date
+import orjson
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+from timing import timed
+
+# Same key order as Flask's default provider (sort_keys=True); non-string
+# keys (e.g. HTTP status codes in the swagger spec) are converted to strings;
+# datetimes are left to default()
+OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class OrJSONProvider(JSONProvider):
+    """JSON provider encoding with orjson"""
+
+    @staticmethod
+    def default(o):
+        """Encode the types orjson does not handle natively"""
+        if isinstance(o, date):
+            return http_date(o)
+        if isinstance(o, decimal.Decimal):
+            return str(o)
+        if dataclasses.is_dataclass(o):
+            return dataclasses.asdict(o)
+        if hasattr(o, '__html__'):
+            return str(o.__html__())
+        raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+    def dumps(self, obj, **kwargs):
+        option = OPTIONS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = OPTIONS
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        with timed('ser'):
+            body = orjson.dumps(obj, default=self.default, option=option) + b'\n'
+        return self._app.response_class(body, mimetype='application/json')
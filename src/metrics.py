@@ -0,0 +1,125 @@
+"""
+Prometheus instrumentation, exposed at GET /metrics.
+
+Per request, labelled by blueprint, endpoint (the view function, so
+/api/orders/<id> is one series however many orders exist) and method:
+- latency histogram and status code counter
+- SQL statements issued and time spent in them, measured by the engine
+  events of timing.track_statements
+Response compression adds bytes in/out and CPU seconds per encoding.
+
+Each gunicorn worker records into its own registry. When
+PROMETHEUS_MULTIPROC_DIR is set (see the Dockerfile), prometheus_client
+keeps the values in memory-mapped files in that directory and /metrics
+aggregates the files of all workers, so whichever worker answers the
+scrape reports the whole server. gunicorn.conf.py empties the directory at
+startup and marks exited workers dead.
+
+Latency is measured until the response object is ready: for streamed
+responses it does not include sending the body.
+"""
+import os
+import time
+from flask import Response, request, g
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    generate_latest,
+    multiprocess
+)
+from timing import track_statements
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_LATENCY = Histogram(
+    'ristosmart_http_request_duration_seconds', 'Time to build the response',
+    ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUESTS = Counter(
+    'ristosmart_http_requests', 'Requests answered',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+REQUEST_STATEMENTS = Histogram(
+    'ristosmart_db_statements_per_request', 'SQL statements issued by a request',
+    ['blueprint', 'endpoint', 'method'], buckets=STATEMENT_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    'ristosmart_db_time_per_request_seconds', 'Time a request spent in SQL statements',
+    ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+STATEMENTS = Counter(
+    'ristosmart_db_statements', 'SQL statements issued by requests',
+    ['endpoint']
+)
+COMPRESSION_BYTES_IN = Counter(
+    'ristosmart_compression_in_bytes', 'Response bytes before compression', ['encoding']
+)
+COMPRESSION_BYTES_OUT = Counter(
+    'ristosmart_compression_out_bytes', 'Response bytes after compression', ['encoding']
+)
+COMPRESSION_CPU = Counter(
+    'ristosmart_compression_cpu_seconds', 'CPU time spent compressing responses', ['encoding']
+)
+
+
+def request_labels():
+    """(blueprint, endpoint, method) of the current request"""
+    return request.blueprint or '', request.endpoint or 'none', request.method
+
+
+def observe_compression(encoding, bytes_in, bytes_out, cpu_seconds):
+    COMPRESSION_BYTES_IN.labels(encoding).inc(bytes_in)
+    COMPRESSION_BYTES_OUT.labels(encoding).inc(bytes_out)
+    COMPRESSION_CPU.labels(encoding).inc(cpu_seconds)
+
+
+def metrics_registry():
+    """Registry to expose: all workers' files in multiprocess mode, else this process"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_metrics(app):
+    """Instrument requests and db.engine, and add the /metrics endpoint
+
+    Register it before the other after_request hooks: hooks run in reverse
+    order, so the latency then includes them (e.g. compression).
+    """
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+
+    track_statements(app)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('request_start')
+        if start is None:
+            # Failed before the before_request hooks ran
+            return response
+        labels = request_labels()
+        REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - start)
+        REQUESTS.labels(*labels, str(response.status_code)).inc()
+        statements = g.get('db_statements', 0)
+        REQUEST_STATEMENTS.labels(*labels).observe(statements)
+        STATEMENTS.labels(labels[1]).inc(statements)
+        REQUEST_DB_TIME.labels(*labels).observe(g.get('db_time', 0.0))
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
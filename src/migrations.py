@@ -0,0 +1,134 @@
+"""
+Idempotent schema upgrades applied at startup.
+
+db.create_all() only creates missing tables: indexes, columns and type
+changes added to existing tables are applied here. Every step must be safe
+to run on each boot.
+"""
+from sqlalchemy import text
+from models import db, MenuItem, Product
+
+
+def column_type(connection, table, column):
+    """Return the data type of a column, None if it does not exist"""
+    return connection.execute(
+        text('SELECT data_type FROM information_schema.columns '
+             'WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column'),
+        {'table': table, 'column': column}
+    ).scalar()
+
+
+def add_order_idempotency_key():
+    """Add orders.idempotency_key, used by bulk order creation"""
+    with db.engine.begin() as connection:
+        connection.execute(text('ALTER TABLE orders ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64)'))
+
+
+# ID and foreign key columns stored as native uuid instead of VARCHAR(36)
+UUID_COLUMNS = [
+    ('users', 'id'),
+    ('check_ins', 'id'),
+    ('check_ins', 'user_id'),
+    ('menu_items', 'id'),
+    ('orders', 'id'),
+    ('order_items', 'id'),
+    ('order_items', 'order_id'),
+    ('order_items', 'menu_item_id'),
+    ('products', 'id'),
+]
+
+
+def convert_ids_to_uuid():
+    """Convert VARCHAR(36) ID columns to native uuid, keeping their data
+
+    Foreign keys cannot span columns of different types, so every foreign key
+    on the affected tables is dropped, the columns are converted and the
+    foreign keys are recreated from their original definitions, all in one
+    transaction.
+    """
+    with db.engine.begin() as connection:
+        pending = [
+            (table, column) for table, column in UUID_COLUMNS
+            if column_type(connection, table, column) not in (None, 'uuid')
+        ]
+        if not pending:
+            return
+
+        tables = sorted({table for table, _ in UUID_COLUMNS})
+        foreign_keys = connection.execute(
+            text('SELECT conrelid::regclass::text AS table_name, conname, pg_get_constraintdef(oid) AS definition '
+                 'FROM pg_constraint '
+                 'WHERE contype = \'f\' AND (conrelid::regclass::text = ANY(:tables) OR confrelid::regclass::text = ANY(:tables))'),
+            {'tables': tables}
+        ).all()
+
+        for foreign_key in foreign_keys:
+            connection.execute(text(f'ALTER TABLE {foreign_key.table_name} DROP CONSTRAINT "{foreign_key.conname}"'))
+        for table, column in pending:
+            connection.execute(text(f'ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid'))
+            print(f"Converted {table}.{column} to uuid")
+        for foreign_key in foreign_keys:
+            connection.execute(text(
+                f'ALTER TABLE {foreign_key.table_name} ADD CONSTRAINT "{foreign_key.conname}" {foreign_key.definition}'
+            ))
+
+
+def convert_menu_json_to_jsonb():
+    """Convert menu_items.allergens/nutritional_info from JSON text to jsonb"""
+    with db.engine.begin() as connection:
+        for column in ('allergens', 'nutritional_info'):
+            if column_type(connection, 'menu_items', column) == 'text':
+                connection.execute(text(
+                    f"ALTER TABLE menu_items ALTER COLUMN {column} TYPE jsonb USING NULLIF({column}, '')::jsonb"
+                ))
+                print(f"Converted menu_items.{column} to jsonb")
+
+
+def lowercase_menu_allergens():
+    """Lowercase menu_items.allergens, which are matched case-sensitively"""
+    with db.engine.begin() as connection:
+        result = connection.execute(text(
+            "UPDATE menu_items SET allergens = ("
+            "  SELECT jsonb_agg(lower(allergen) ORDER BY position)"
+            "  FROM jsonb_array_elements_text(allergens) WITH ORDINALITY AS a(allergen, position))"
+            " WHERE jsonb_typeof(allergens) = 'array' AND allergens::text <> lower(allergens::text)"
+        ))
+        if result.rowcount:
+            print(f"Lowercased the allergens of {result.rowcount} menu items")
+
+
+def add_search_vectors():
+    """Add the generated search_vector columns of menu_items and products"""
+    with db.engine.begin() as connection:
+        for model in (MenuItem, Product):
+            column = model.__table__.c.search_vector
+            if column_type(connection, model.__tablename__, 'search_vector') is None:
+                connection.execute(text(
+                    f'ALTER TABLE {model.__tablename__} ADD COLUMN search_vector '
+                    f'{column.type.compile(dialect=connection.dialect)} '
+                    f'GENERATED ALWAYS AS ({column.computed.sqltext}) STORED'
+                ))
+                print(f"Added {model.__tablename__}.search_vector")
+
+
+def ensure_indexes():
+    """Create indexes declared on the models that are missing in the database"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+
+MIGRATIONS = [
+    add_order_idempotency_key,
+    convert_ids_to_uuid,
+    convert_menu_json_to_jsonb,
+    lowercase_menu_allergens,
+    add_search_vectors,
+    ensure_indexes,
+]
+
+
+def run_migrations():
+    """Apply all schema upgrades in order"""
+    for migration in MIGRATIONS:
+        migration()
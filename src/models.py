@@ -1,12 +1,27 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timezone
 import uuid
-import json
 import pytz
+import secrets
+import threading
+import time
+from sqlalchemy import event, DDL
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from werkzeug.security import generate_password_hash, check_password_hash
+from serializers import (
+    serialize_user,
+    serialize_checkin,
+    serialize_menu_item,
+    serialize_order,
+    serialize_order_item,
+    serialize_product
+)
 
 db = SQLAlchemy()
 
+# Trigram operators and index classes used by the search indexes
+event.listen(db.metadata, 'before_create', DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+
 # Timezone italiana
 ITALY_TZ = pytz.timezone('Europe/Rome')
 
@@ -15,12 +30,42 @@ def italy_now():
     return datetime.now(ITALY_TZ).replace(tzinfo=None)
 
 
+_uuid7_lock = threading.Lock()
+_uuid7_last = [0, 0]  # [unix_ms, counter] of the last generated ID
+
+
+def uuid7():
+    """Generate a time-ordered UUID (RFC 9562 version 7) as a string
+
+    The first 48 bits are the Unix time in milliseconds and the next 12 a
+    counter, so IDs generated by a process are strictly increasing and new
+    rows land on the right edge of the primary key index instead of random
+    pages (uuid4). The remaining 62 bits are random.
+    """
+    with _uuid7_lock:
+        unix_ms = time.time_ns() // 1000000
+        last_ms, counter = _uuid7_last
+        if unix_ms <= last_ms:
+            unix_ms = last_ms
+            counter += 1
+            if counter > 0xFFF:
+                # Counter exhausted within a millisecond: borrow the next one
+                unix_ms += 1
+                counter = 0
+        else:
+            # Random start, leaving room to increment within the millisecond
+            counter = secrets.randbits(11)
+        _uuid7_last[0], _uuid7_last[1] = unix_ms, counter
+    value = (unix_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    return str(uuid.UUID(int=value))
+
+
 # ============ USER MODEL (Authentication) ============
 
 class User(db.Model):
     __tablename__ = 'users'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(db.Uuid(as_uuid=False), primary_key=True, default=uuid7)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -41,16 +86,7 @@ class User(db.Model):
     
     def to_dict(self):
         """Convert to dictionary"""
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'role': self.role,
-            'full_name': self.full_name,
-            'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
-        }
+        return serialize_user(self)
     
     def __repr__(self):
         return f'<User {self.username} ({self.role})>'
@@ -59,27 +95,29 @@ class User(db.Model):
 class CheckIn(db.Model):
     __tablename__ = 'check_ins'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    id = db.Column(db.Uuid(as_uuid=False), primary_key=True, default=uuid7)
+    user_id = db.Column(db.Uuid(as_uuid=False), db.ForeignKey('users.id'), nullable=False)
     check_in_time = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     check_out_time = db.Column(db.DateTime, nullable=True)
     
     user = db.relationship('User', backref=db.backref('check_ins', lazy=True))
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'check_in_time': self.check_in_time.isoformat() if self.check_in_time else None,
-            'check_out_time': self.check_out_time.isoformat() if self.check_out_time else None
-        }
+        return serialize_checkin(self)
 
 # ============ MENU MODEL ============
 
 class MenuItem(db.Model):
     __tablename__ = 'menu_items'
-
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # Allergen lookups (allergens ?| ARRAY[...]) for allergy-aware menus
+        db.Index('ix_menu_items_allergens', 'allergens', postgresql_using='gin'),
+        # Search: Italian full-text and typo-tolerant name matching
+        db.Index('ix_menu_items_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_menu_items_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
+
+    id = db.Column(db.Uuid(as_uuid=False), primary_key=True, default=uuid7)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     image_url = db.Column(db.String(255))
@@ -88,33 +126,39 @@ class MenuItem(db.Model):
     category = db.Column(db.String(20), nullable=False)
     is_available = db.Column(db.Boolean, default=True)
     preparation_time = db.Column(db.Integer, nullable=False)
-    allergens = db.Column(db.Text)  # Stored as JSON string
-    nutritional_info = db.Column(db.Text)  # Stored as JSON string
+    allergens = db.Column(JSONB(none_as_null=True))  # List of allergen names
+    nutritional_info = db.Column(JSONB(none_as_null=True))
+    # Deferred: only used in WHERE/ORDER BY, never loaded with the row
+    search_vector = db.deferred(db.Column(TSVECTOR, db.Computed(
+        "setweight(to_tsvector('italian', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('italian', coalesce(description, '')), 'B')",
+        persisted=True
+    )))
     created_at = db.Column(db.DateTime, default=datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'price': float(self.price) if self.price else 0,
-            'category': self.category,
-            'is_available': self.is_available,
-            'preparation_time': self.preparation_time,
-            'allergens': json.loads(self.allergens) if self.allergens else [],
-            'nutritional_info': json.loads(self.nutritional_info) if self.nutritional_info else {},
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serialize_menu_item(self)
 
 
 # ============ ORDER MODELS ============
 
+# Counter behind order numbers (see generate_order_numbers in routes/orders.py)
+order_number_seq = db.Sequence('order_number_seq', metadata=db.metadata)
+
+
 class Order(db.Model):
     __tablename__ = 'orders'
-    
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # Kitchen/dashboard filters: WHERE status = ... ORDER BY created_at DESC
+        db.Index('ix_orders_status_created_at', 'status', 'created_at'),
+        # Keyset pagination over (created_at, id)
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),
+        # Replayed offline orders are matched on their client-generated key
+        db.Index('ix_orders_idempotency_key', 'idempotency_key', unique=True),
+    )
+
+    id = db.Column(db.Uuid(as_uuid=False), primary_key=True, default=uuid7)
     order_number = db.Column(db.String(50), unique=True, nullable=False)
     table_number = db.Column(db.Integer)
     customer_name = db.Column(db.String(100))
@@ -127,38 +171,24 @@ class Order(db.Model):
     final_amount = db.Column(db.Numeric(10, 2), default=0)
     special_instructions = db.Column(db.Text)
     estimated_completion_time = db.Column(db.DateTime)
+    idempotency_key = db.Column(db.String(64))
     created_at = db.Column(db.DateTime, default=italy_now)
     updated_at = db.Column(db.DateTime, default=italy_now, onupdate=italy_now)
     
-    # Relationship with order items
-    items = db.relationship('OrderItem', backref='order', cascade='all, delete-orphan')
+    # Relationship with order items, batch-loaded with one SELECT ... WHERE order_id IN (...)
+    # per query so that serializing N orders never issues N extra queries
+    items = db.relationship('OrderItem', backref='order', cascade='all, delete-orphan', lazy='selectin')
 
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'order_number': self.order_number,
-            'table_number': self.table_number,
-            'customer_name': self.customer_name,
-            'status': self.status,
-            'order_type': self.order_type,
-            'total_amount': float(self.total_amount),
-            'tax_amount': float(self.tax_amount),
-            'discount_amount': float(self.discount_amount),
-            'final_amount': float(self.final_amount),
-            'special_instructions': self.special_instructions,
-            'estimated_completion_time': self.estimated_completion_time.isoformat() if self.estimated_completion_time else None,
-            'items': [item.to_dict() for item in self.items],
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serialize_order(self)
 
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
     
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    order_id = db.Column(db.String(36), db.ForeignKey('orders.id'), nullable=False)
-    menu_item_id = db.Column(db.String(36), db.ForeignKey('menu_items.id', ondelete='CASCADE'), nullable=False)
+    id = db.Column(db.Uuid(as_uuid=False), primary_key=True, default=uuid7)
+    order_id = db.Column(db.Uuid(as_uuid=False), db.ForeignKey('orders.id'), nullable=False, index=True)
+    menu_item_id = db.Column(db.Uuid(as_uuid=False), db.ForeignKey('menu_items.id', ondelete='CASCADE'), nullable=False)
     menu_item_name = db.Column(db.String(100), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=1)
     unit_price = db.Column(db.Numeric(10, 2), nullable=False)
@@ -170,24 +200,18 @@ class OrderItem(db.Model):
     updated_at = db.Column(db.DateTime, default=italy_now, onupdate=italy_now)
 
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'menu_item_id': str(self.menu_item_id),
-            'menu_item_name': self.menu_item_name,
-            'quantity': self.quantity,
-            'unit_price': float(self.unit_price),
-            'total_price': float(self.total_price),
-            'special_instructions': self.special_instructions,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serialize_order_item(self)
 
 # ============ PRODUCT MODEL ============
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Search: Italian full-text and typo-tolerant name matching
+        db.Index('ix_products_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_products_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+    )
 
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = db.Column(db.Uuid(as_uuid=False), primary_key=True, default=uuid7)
     ean = db.Column(db.String(13), unique=True, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
@@ -195,19 +219,25 @@ class Product(db.Model):
     quantity = db.Column(db.Integer, nullable=False, default=0)
     category = db.Column(db.String(50))
     image_url = db.Column(db.String(255))
+    # Deferred: only used in WHERE/ORDER BY, never loaded with the row
+    search_vector = db.deferred(db.Column(TSVECTOR, db.Computed(
+        "setweight(to_tsvector('italian', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('italian', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('italian', coalesce(category, '')), 'C')",
+        persisted=True
+    )))
     created_at = db.Column(db.DateTime, default=italy_now)
     updated_at = db.Column(db.DateTime, default=italy_now, onupdate=italy_now)
 
     def to_dict(self):
-        return {
-            'id': str(self.id),
-            'ean': self.ean,
-            'name': self.name,
-            'description': self.description,
-            'price': float(self.price),
-            'quantity': self.quantity,
-            'category': self.category,
-            'image_url': self.image_url,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        return serialize_product(self)
+
+
+# ============ CACHE VERSION MODEL ============
+class CacheVersion(db.Model):
+    """Version counter of a cached dataset, bumped by every write to it"""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=italy_now, onupdate=italy_now)
@@ -0,0 +1,96 @@
+"""
+Order pricing from an in-memory index of the menu.
+
+Each worker keeps a snapshot of the pricing attributes of every menu item,
+keyed by ID and rebuilt when the 'menu' cache version changes (every menu
+write bumps it), so pricing an order is a dictionary lookup per line instead
+of a MenuItem query. Amounts are computed in Decimal and rounded to cents
+once per line.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from cache import VersionedCache
+from models import db, MenuItem
+
+CENT = Decimal('0.01')
+
+
+class MenuPrice:
+    """Pricing attributes of a menu item"""
+    __slots__ = ('id', 'name', 'price', 'tax_rate', 'is_available', 'preparation_time')
+
+    def __init__(self, id, name, price, tax_rate, is_available, preparation_time):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.tax_rate = tax_rate
+        self.is_available = is_available
+        self.preparation_time = preparation_time
+
+
+class OrderQuote:
+    """Priced order items and totals"""
+    __slots__ = ('items', 'total_amount', 'discount_amount', 'final_amount', 'unavailable_items', 'preparation_time')
+
+    def __init__(self, items, total_amount, unavailable_items, preparation_time):
+        self.items = items
+        self.total_amount = total_amount
+        self.discount_amount = Decimal('0.00')  # Can be extended to apply discounts
+        self.final_amount = total_amount - self.discount_amount
+        self.unavailable_items = unavailable_items
+        self.preparation_time = preparation_time
+
+
+_menu_index = VersionedCache('menu')
+
+
+def load_menu_index():
+    """Build the menu pricing index from the database"""
+    rows = db.session.query(
+        MenuItem.id, MenuItem.name, MenuItem.price, MenuItem.tax_amount,
+        MenuItem.is_available, MenuItem.preparation_time
+    )
+    return {
+        row.id: MenuPrice(
+            row.id,
+            row.name,
+            Decimal(str(row.price)),
+            Decimal(str(row.tax_amount)) if row.tax_amount else Decimal('0'),
+            bool(row.is_available),
+            row.preparation_time
+        )
+        for row in rows
+    }
+
+
+def get_menu_index():
+    """Return the current menu pricing index: {menu_item_id: MenuPrice}"""
+    return _menu_index.get_or_load('index', load_menu_index)
+
+
+def quote_order(items, menu_index=None):
+    """Price validated order items
+
+    Each item dict gets menu_item_name, unit_price, total_price and
+    preparation_time. Items that are unknown or not available are listed in
+    `unavailable_items` and left unpriced. Pass `menu_index` to price many
+    orders against the same snapshot.
+    """
+    if menu_index is None:
+        menu_index = get_menu_index()
+
+    total_amount = Decimal('0.00')
+    unavailable_items = []
+    preparation_time = 0
+    for item in items:
+        menu_price = menu_index.get(item['menu_item_id'])
+        if menu_price is None or not menu_price.is_available:
+            unavailable_items.append(item['menu_item_id'])
+            continue
+        item['menu_item_name'] = menu_price.name
+        item['unit_price'] = menu_price.price
+        item['total_price'] = (menu_price.price * item['quantity'] * (1 + menu_price.tax_rate)).quantize(CENT, ROUND_HALF_UP)
+        item['preparation_time'] = menu_price.preparation_time
+        total_amount += item['total_price']
+        preparation_time = max(preparation_time, menu_price.preparation_time or 0)
+
+    return OrderQuote(items, total_amount, unavailable_items, preparation_time)
@@ -0,0 +1,273 @@
+"""
+Sampling profiler, for single requests and per endpoint over time.
+
+On demand: a manager adds `X-Profile: 1` (or `?profile=1`) to a request
+to an endpoint matching PROFILER_ENDPOINTS. A sampler thread records the
+stack of the thread serving the request every PROFILER_INTERVAL seconds
+until the response is ready. The profile is written in collapsed-stack
+format (one `frame;frame;... count` line per distinct stack, as read by
+flamegraph.pl, inferno or speedscope) to PROFILER_DIR, named in the
+X-Profile response header and downloadable from
+GET /api/diagnostics/profiles/<name>. With `X-Profile: inline` the
+profile is returned instead of the response body.
+
+Periodic: with PROFILER_PERIODIC_ENABLED, one thread per worker samples
+all the request threads every PROFILER_PERIODIC_INTERVAL seconds and
+aggregates their stacks per endpoint (GET /api/diagnostics/sampling).
+
+The sampler reads sys._current_frames() from its own thread: the profiled
+code runs unmodified, and each sample costs a GIL switch. Only Python
+frames are seen: time spent in C (psycopg2 waiting for Postgres, orjson)
+is attributed to the Python function calling it. Streamed bodies are sent
+after the profile is taken. A request shorter than PROFILER_INTERVAL may
+get no sample at all: profile slow requests, or use the periodic sampler,
+which aggregates many requests.
+"""
+import fnmatch
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from flask import request, g, current_app, Response
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from models import italy_now
+
+PROFILE_FLAGS = ('1', 'true', 'inline')
+# Stacks kept per endpoint by the periodic sampler, the rest counted as one
+MAX_STACKS_PER_ENDPOINT = 2000
+OTHER_STACKS = '[other stacks]'
+
+_frame_labels = {}
+
+
+def frame_label(code):
+    """'path/to/module.py:function' for a code object, without semicolons"""
+    label = _frame_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        if 'site-packages' + os.sep in filename:
+            filename = filename.split('site-packages' + os.sep, 1)[1]
+        elif filename.startswith(os.getcwd() + os.sep):
+            filename = os.path.relpath(filename)
+        label = f"{filename}:{code.co_name}".replace(';', ':')
+        _frame_labels[code] = label
+    return label
+
+
+def collapse(frame):
+    """Collapsed stack of a frame, outermost frame first"""
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ';'.join(labels)
+
+
+def format_collapsed(stacks):
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class RequestSampler:
+    """Samples one thread until stopped"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+            del frame
+
+
+class PeriodicSampler:
+    """Low-rate samples of all request threads, aggregated per endpoint"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        # thread ident -> endpoint of the request it is serving
+        self.active = {}
+        self._lock = threading.Lock()
+        self._stacks = {}
+        self._samples = Counter()
+        self._thread = None
+
+    def ensure_started(self):
+        # Threads do not survive gunicorn's fork, so each worker starts its
+        # own on its first request
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='periodic-profiler', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, endpoint in list(self.active.items()):
+                    frame = frames.get(thread_id)
+                    if frame is None:
+                        continue
+                    stacks = self._stacks.setdefault(endpoint, Counter())
+                    stack = collapse(frame)
+                    if stack not in stacks and len(stacks) >= MAX_STACKS_PER_ENDPOINT:
+                        stack = OTHER_STACKS
+                    stacks[stack] += 1
+                    self._samples[endpoint] += 1
+            del frames
+
+    def samples(self):
+        """{endpoint: samples taken}"""
+        with self._lock:
+            return dict(self._samples)
+
+    def stacks(self, endpoint):
+        """Collapsed stacks of an endpoint (empty if never sampled)"""
+        with self._lock:
+            return Counter(self._stacks.get(endpoint, ()))
+
+
+class Profiler:
+    """On-demand request profiles and the periodic sampler of a worker"""
+
+    def __init__(self, config):
+        self.enabled = config['PROFILER_ENABLED']
+        self.endpoints = [pattern.strip() for pattern in config['PROFILER_ENDPOINTS'] if pattern.strip()]
+        self.interval = config['PROFILER_INTERVAL']
+        self.directory = config['PROFILER_DIR']
+        self.max_files = config['PROFILER_MAX_FILES']
+        self.periodic = (
+            PeriodicSampler(config['PROFILER_PERIODIC_INTERVAL'])
+            if config['PROFILER_PERIODIC_ENABLED'] else None
+        )
+        self._allowed = {}
+
+    def allowed(self, endpoint):
+        """Whether PROFILER_ENDPOINTS allows profiling endpoint"""
+        if endpoint not in self._allowed:
+            self._allowed[endpoint] = endpoint is not None and any(
+                fnmatch.fnmatchcase(endpoint, pattern) for pattern in self.endpoints
+            )
+        return self._allowed[endpoint]
+
+    def save(self, stacks, endpoint):
+        """Write a profile to PROFILER_DIR, keeping the PROFILER_MAX_FILES newest; returns its name"""
+        os.makedirs(self.directory, exist_ok=True)
+        name = f"{italy_now():%Y%m%dT%H%M%S}-{endpoint}-{os.getpid()}-{uuid.uuid4().hex[:8]}.collapsed"
+        with open(os.path.join(self.directory, name), 'w') as profile:
+            profile.write(format_collapsed(stacks))
+        for old in self.profiles()[self.max_files:]:
+            try:
+                os.remove(os.path.join(self.directory, old['name']))
+            except OSError:
+                pass
+        return name
+
+    def profiles(self):
+        """Stored profiles, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.collapsed') and entry.is_file():
+                stat = entry.stat()
+                profiles.append((stat.st_mtime, entry.name, stat.st_size))
+        profiles.sort(reverse=True)
+        return [
+            {'name': name, 'size': size, 'modified': datetime.fromtimestamp(mtime, timezone.utc).isoformat()}
+            for mtime, name, size in profiles
+        ]
+
+
+def requested_profile():
+    """The X-Profile flag ('1', 'true' or 'inline') of the request, else None"""
+    flag = request.headers.get('X-Profile') or request.args.get('profile')
+    if flag is None or flag.lower() not in PROFILE_FLAGS:
+        return None
+    return flag.lower()
+
+
+def is_manager():
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        # The view answers for bad tokens
+        return False
+    return get_jwt().get('role') == 'manager'
+
+
+def init_profiler(app):
+    """Register the profiling hooks configured by the PROFILER_* settings"""
+    profiler = Profiler(app.config)
+    app.extensions['profiler'] = profiler
+
+    if profiler.periodic is not None:
+        periodic = profiler.periodic
+
+        @app.before_request
+        def track_request_thread():
+            periodic.ensure_started()
+            periodic.active[threading.get_ident()] = request.endpoint
+
+        @app.teardown_request
+        def untrack_request_thread(exception=None):
+            periodic.active.pop(threading.get_ident(), None)
+
+    if not profiler.enabled:
+        return profiler
+
+    @app.before_request
+    def start_request_profile():
+        flag = requested_profile()
+        if flag is None or not profiler.allowed(request.endpoint) or not is_manager():
+            return
+        g.profile_flag = flag
+        g.profile_sampler = RequestSampler(threading.get_ident(), profiler.interval).start()
+
+    @app.after_request
+    def finish_request_profile(response):
+        sampler = g.pop('profile_sampler', None)
+        if sampler is None:
+            return response
+        stacks = sampler.stop()
+        samples = sum(stacks.values())
+        print(f"[PROFILER] {request.method} {request.path}: {samples} samples")
+        if g.profile_flag == 'inline':
+            response = Response(format_collapsed(stacks), status=response.status_code, mimetype='text/plain')
+        else:
+            response.headers['X-Profile'] = profiler.save(stacks, request.endpoint)
+        response.headers['X-Profile-Samples'] = str(samples)
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(exception=None):
+        # after_request does not run when the view raised
+        sampler = g.pop('profile_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+
+    return profiler
+
+
+def get_profiler():
+    return current_app.extensions['profiler']
@@ -0,0 +1,205 @@
+"""
+Read-only column projections for the GET collection endpoints.
+
+Loading full ORM objects costs an identity-map entry, instance state and
+attribute instrumentation per row, only to serialize each row once. A
+projection selects just the columns its serializer reads and returns them
+as namedtuple records (tuples with __slots__ = ()), which the serializers
+consume like model instances. Records are detached from the session:
+writes still load the ORM objects.
+
+Collections accept sparse fieldsets: `fields=order_number,items.status`
+or `view=summary` narrow a projection to a subset of its fields, which
+shrinks both the SELECT list and the response. The key columns (e.g. the
+ID used to attach order items and the keyset pagination cursor) are
+always selected, but only emitted when requested.
+
+Order items are fetched with one extra query per batch of orders, as the
+selectin relationship does, and attached to the order records. When no
+item field is requested the items query is skipped.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from timing import timed
+from query_budget import extend_query_budget
+from models import db, User, CheckIn, MenuItem, Order, OrderItem, Product
+from serializers import (
+    compile_serializer,
+    nested_many,
+    serialize_user,
+    serialize_checkin,
+    serialize_menu_item,
+    serialize_order,
+    serialize_order_item,
+    serialize_product
+)
+
+# Orders whose items are fetched with one IN (...) query
+ITEMS_BATCH_SIZE = 500
+
+VIEWS = ('full', 'summary')
+
+# Field subsets compiled per projection, least recently used evicted first:
+# `fields` comes from the query string
+MAX_SUBSETS = 64
+
+
+class Projection:
+    """Columns of a model read by a serializer, and their record type"""
+
+    def __init__(self, model, serializer, key_columns=('id',), nested=None, summary=(), key=None):
+        self.model = model
+        self.serializer = serializer
+        self.key_columns = key_columns
+        self.nested = nested or {}
+        self.summary = summary
+        # Identifies the field selection, e.g. in cache keys (None: all fields)
+        self.key = key
+        self.columns = tuple(
+            getattr(model, name)
+            for name in dict.fromkeys(key_columns + serializer.attributes)
+            if name not in self.nested
+        )
+        self.record = namedtuple(
+            f"{model.__name__}Record",
+            [column.key for column in self.columns] + list(self.nested)
+        )
+        self._lock = threading.Lock()
+        self._subsets = OrderedDict()
+
+    def query(self, query):
+        """The ORM query selecting only the projected columns"""
+        return query.with_entities(*self.columns)
+
+    def fetch(self, query):
+        """Records of the rows matched by an ORM query of the model"""
+        make = self.record._make
+        return [make(row) for row in self.query(query)]
+
+    def serialize(self, records):
+        """Dicts of the records, timed as the ser phase of Server-Timing"""
+        serializer = self.serializer
+        with timed('ser'):
+            return [serializer(record) for record in records]
+
+    def select(self, names):
+        """Projection of a subset of the fields
+
+        Nested fields are dotted (items.status); naming the relationship
+        alone (items) keeps all of its fields. Raises ValueError on unknown
+        fields.
+        """
+        names = tuple(sorted(set(names)))
+        with self._lock:
+            subset = self._subsets.get(names)
+            if subset is not None:
+                self._subsets.move_to_end(names)
+                return subset
+
+        subset = self._compile_subset(names)
+        with self._lock:
+            self._subsets[names] = subset
+            if len(self._subsets) > MAX_SUBSETS:
+                self._subsets.popitem(last=False)
+        return subset
+
+    def _compile_subset(self, names):
+        own = set()
+        nested_names = {}
+        for name in names:
+            head, _, tail = name.partition('.')
+            if head not in self.serializer.attributes or (tail and head not in self.nested):
+                raise ValueError(f"unknown field: {name}")
+            if tail:
+                nested_names.setdefault(head, []).append(tail)
+            else:
+                own.add(head)
+
+        nested = {}
+        for attribute, projection in self.nested.items():
+            if attribute in own:
+                nested[attribute] = projection
+            elif attribute in nested_names:
+                nested[attribute] = projection.select(nested_names[attribute])
+
+        fields = []
+        for attribute, kind in self.serializer.fields:
+            if attribute in nested:
+                fields.append((attribute, nested_many(nested[attribute].serializer)))
+            elif attribute in own:
+                fields.append((attribute, kind))
+        serializer = compile_serializer(self.serializer.__name__, fields)
+        return Projection(self.model, serializer, self.key_columns, nested, self.summary, key=names)
+
+    def for_request(self, args):
+        """Projection chosen by the fields and view query parameters
+
+        `fields` (comma-separated) takes precedence over `view`. Raises
+        ValueError on unknown fields or views.
+        """
+        fields = args.get('fields')
+        if fields is not None:
+            names = [name.strip() for name in fields.split(',') if name.strip()]
+            if not names:
+                raise ValueError("fields must name at least one field")
+            return self.select(names)
+        view = args.get('view', 'full')
+        if view not in VIEWS:
+            raise ValueError(f"view must be one of {', '.join(VIEWS)}")
+        return self.select(self.summary) if view == 'summary' else self
+
+
+USER = Projection(User, serialize_user, summary=(
+    'id', 'username', 'full_name', 'role', 'is_active'
+))
+CHECKIN = Projection(CheckIn, serialize_checkin)
+MENU_ITEM = Projection(MenuItem, serialize_menu_item, summary=(
+    'id', 'name', 'price', 'category', 'is_available'
+))
+PRODUCT = Projection(Product, serialize_product, summary=(
+    'id', 'ean', 'name', 'price', 'quantity'
+))
+ORDER_ITEM = Projection(OrderItem, serialize_order_item)
+# created_at and id are the keyset pagination cursor
+ORDER = Projection(Order, serialize_order, key_columns=('id', 'created_at'), nested={'items': ORDER_ITEM}, summary=(
+    'id', 'order_number', 'table_number', 'status',
+    'items.id', 'items.menu_item_name', 'items.quantity', 'items.status'
+))
+
+
+def attach_items(order_rows, projection=ORDER):
+    """Order records for rows of projection.columns, with their item records"""
+    record = projection.record
+    item_projection = projection.nested.get('items')
+    if item_projection is None:
+        return [record._make(row) for row in order_rows]
+
+    order_ids = [row.id for row in order_rows]
+    items = {}
+    make = item_projection.record._make
+    batches = -(-len(order_ids) // ITEMS_BATCH_SIZE)
+    if batches > 1:
+        extend_query_budget(batches - 1)
+    for start in range(0, len(order_ids), ITEMS_BATCH_SIZE):
+        rows = db.session.query(OrderItem.order_id, *item_projection.columns).filter(
+            OrderItem.order_id.in_(order_ids[start:start + ITEMS_BATCH_SIZE])
+        ).order_by(OrderItem.created_at, OrderItem.id)
+        for row in rows:
+            items.setdefault(row[0], []).append(make(row[1:]))
+
+    return [record(*row, items.get(row.id, [])) for row in order_rows]
+
+
+def fetch_orders(query, projection=ORDER):
+    """Order records (with items) of the rows matched by an ORM query of Order"""
+    return attach_items(projection.query(query).all(), projection)
+
+
+def iter_orders(query, batch_size, projection=ORDER):
+    """Like fetch_orders, reading the orders through a server-side cursor
+
+    Items are fetched per batch of batch_size orders.
+    """
+    result = db.session.execute(projection.query(query).statement, execution_options={'yield_per': batch_size})
+    for rows in result.partitions():
+        yield from attach_items(rows, projection)
@@ -0,0 +1,137 @@
+"""
+Per-request SQL statement budgets, to catch N+1 regressions.
+
+A view declares how many SQL statements a request may issue:
+
+    @order_bp.route('/', methods=['GET'])
+    @query_budget(3)
+    def get_all_orders(): ...
+
+QUERY_BUDGETS (e.g. QUERY_BUDGETS=orders.get_all_orders=3,users.get_users=1)
+overrides the decorator per endpoint, and QUERY_BUDGET_DEFAULT applies to
+views without one. Statements are counted by timing.track_statements.
+Budgets are worst cases: they include the statements of the per-worker
+caches refreshed on the request path (menu index). Code issuing one
+statement per batch of rows raises the budget of the request with
+extend_query_budget() for each batch after the first.
+
+QUERY_BUDGET_MODE:
+- off: nothing is checked (production)
+- log: a request over budget is reported loudly, with its statements
+  when SQLALCHEMY_RECORD_QUERIES is on (development)
+- raise: a request over budget answers 500 instead, and its commit
+  fails (QueryBudgetExceeded) so that nothing it wrote is kept. For the
+  test suite only: in production a budget set too low would turn into
+  failed writes.
+
+With the mode on, responses of budgeted endpoints carry
+`X-Query-Budget: <statements>/<budget>`, which tests/conftest.py checks
+for every request of the API test suite. Statements issued while a
+streamed body is sent are not counted.
+"""
+from flask import request, jsonify, g, current_app, has_request_context
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from sqlalchemy import event
+from models import db
+from timing import track_statements
+
+MODES = ('off', 'log', 'raise')
+
+
+class QueryBudgetExceeded(Exception):
+    """A request tried to commit after going over its SQL statement budget (raise mode)"""
+
+
+def query_budget(statements):
+    """Decorator: a request to the view may issue at most `statements` SQL statements"""
+    def decorator(fn):
+        fn.query_budget = statements
+        return fn
+    return decorator
+
+
+def extend_query_budget(statements):
+    """Allow the current request `statements` more SQL statements (e.g. one per extra batch)"""
+    if has_request_context():
+        g.query_budget_extra = g.get('query_budget_extra', 0) + statements
+
+
+@event.listens_for(db.session, 'before_commit')
+def check_query_budget_before_commit(session):
+    """Raise mode: fail the commit of a request over budget"""
+    if not has_request_context():
+        return
+    request_budget = current_app.extensions.get('query_budget_on_commit')
+    if request_budget is None:
+        return
+    budget = request_budget()
+    statements = g.get('db_statements', 0)
+    if budget is not None and statements > budget:
+        raise QueryBudgetExceeded(
+            f"{request.endpoint} issued {statements} SQL statements before committing, budget {budget}"
+        )
+
+
+def parse_budgets(value):
+    """{endpoint: budget} from 'endpoint=budget,...'"""
+    budgets = {}
+    for item in value.split(','):
+        if item.strip():
+            endpoint, _, budget = item.partition('=')
+            budgets[endpoint.strip()] = int(budget)
+    return budgets
+
+
+def init_query_budgets(app):
+    """Check the statements of each request against its budget (QUERY_BUDGET_*)"""
+    mode = app.config['QUERY_BUDGET_MODE']
+    if mode not in MODES:
+        raise ValueError(f"QUERY_BUDGET_MODE must be one of {', '.join(MODES)}")
+    if mode == 'off':
+        return
+    track_statements(app)
+    overrides = app.config['QUERY_BUDGETS']
+    if isinstance(overrides, str):
+        overrides = parse_budgets(overrides)
+    default = app.config['QUERY_BUDGET_DEFAULT']
+    record_queries = app.config.get('SQLALCHEMY_RECORD_QUERIES')
+
+    def request_budget():
+        endpoint = request.endpoint
+        if endpoint in overrides:
+            budget = overrides[endpoint]
+        else:
+            budget = getattr(app.view_functions.get(endpoint), 'query_budget', default)
+        if budget is None:
+            return None
+        return budget + g.get('query_budget_extra', 0)
+
+    if mode == 'raise':
+        app.extensions['query_budget_on_commit'] = request_budget
+
+    @app.after_request
+    def check_query_budget(response):
+        budget = request_budget()
+        if budget is None:
+            return response
+        statements = g.get('db_statements', 0)
+        response.headers['X-Query-Budget'] = f"{statements}/{budget}"
+        if statements <= budget:
+            return response
+
+        message = (f"{request.method} {request.path} ({request.endpoint}) issued "
+                   f"{statements} SQL statements, budget {budget}")
+        print(f"[QUERY BUDGET] !!! {message}")
+        if record_queries:
+            for query in get_recorded_queries():
+                print(f"[QUERY BUDGET]     {' '.join(query.statement.split())[:200]}")
+        if mode == 'raise':
+            failed = jsonify({
+                'success': False,
+                'message': 'Query budget exceeded',
+                'error': message
+            })
+            failed.status_code = 500
+            failed.headers['X-Query-Budget'] = response.headers['X-Query-Budget']
+            return failed
+        return response
@@ -2,7 +2,6 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import (
     create_access_token, 
     create_refresh_token,
-    jwt_required, 
     get_jwt_identity,
     get_jwt
 )
@@ -15,7 +14,8 @@ from datetime import datetime, timezone
 from auth import (
     role_required,
     permission_required,
-    authentication_required
+    authentication_required,
+    jwt_required
 )
 
 auth_bp = Blueprint('auth', __name__)
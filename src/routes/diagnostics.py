@@ -0,0 +1,112 @@
+from flask import Blueprint, request, jsonify, Response, send_from_directory
+from werkzeug.utils import safe_join
+from flasgger import swag_from
+from docs.diagnostics_docs import (
+    get_compression_stats_spec,
+    get_slow_queries_spec,
+    get_profiles_spec,
+    get_profile_spec,
+    get_sampling_spec
+)
+from auth import role_required
+from compression import get_compression_stats
+from slow_queries import get_slow_query_log
+from profiler import get_profiler, format_collapsed
+import os
+
+diagnostics_bp = Blueprint('diagnostics', __name__)
+
+
+@diagnostics_bp.route('/compression', methods=['GET'])
+@role_required('manager')
+@swag_from(get_compression_stats_spec)
+def get_compression_stats_view():
+    """Compression ratio and CPU cost of this worker - PROTECTED: Manager only"""
+    return jsonify({
+        'success': True,
+        'worker': os.getpid(),
+        'data': get_compression_stats().snapshot()
+    }), 200
+
+
+@diagnostics_bp.route('/slow-queries', methods=['GET'])
+@role_required('manager')
+@swag_from(get_slow_queries_spec)
+def get_slow_queries():
+    """Slow SQL statements logged by this worker - PROTECTED: Manager only"""
+    try:
+        limit = request.args.get('limit')
+        if limit is not None:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError(f"limit out of range: {limit}")
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid limit',
+            'error': str(e)
+        }), 400
+
+    log = get_slow_query_log()
+    entries = log.entries()[:limit]
+    return jsonify({
+        'success': True,
+        'worker': os.getpid(),
+        'threshold_ms': log.threshold,
+        'data': entries,
+        'count': len(entries)
+    }), 200
+
+
+@diagnostics_bp.route('/profiles', methods=['GET'])
+@role_required('manager')
+@swag_from(get_profiles_spec)
+def get_profiles():
+    """Stored request profiles - PROTECTED: Manager only"""
+    profiler = get_profiler()
+    profiles = profiler.profiles()
+    return jsonify({
+        'success': True,
+        'enabled': profiler.enabled,
+        'data': profiles,
+        'count': len(profiles)
+    }), 200
+
+
+@diagnostics_bp.route('/profiles/<name>', methods=['GET'])
+@role_required('manager')
+@swag_from(get_profile_spec)
+def get_profile(name):
+    """Download a request profile (collapsed stacks) - PROTECTED: Manager only"""
+    directory = get_profiler().directory
+    path = safe_join(directory, name)
+    if not name.endswith('.collapsed') or path is None or not os.path.isfile(path):
+        return jsonify({
+            'success': False,
+            'message': 'Profile not found'
+        }), 404
+    return send_from_directory(directory, name, mimetype='text/plain')
+
+
+@diagnostics_bp.route('/sampling', methods=['GET'])
+@role_required('manager')
+@swag_from(get_sampling_spec)
+def get_sampling():
+    """Stacks sampled per endpoint by this worker - PROTECTED: Manager only"""
+    periodic = get_profiler().periodic
+    endpoint = request.args.get('endpoint')
+    if endpoint is None:
+        return jsonify({
+            'success': True,
+            'enabled': periodic is not None,
+            'worker': os.getpid(),
+            'data': periodic.samples() if periodic is not None else {}
+        }), 200
+
+    stacks = periodic.stacks(endpoint) if periodic is not None else None
+    if not stacks:
+        return jsonify({
+            'success': False,
+            'message': f'No samples for endpoint {endpoint}'
+        }), 404
+    return Response(format_collapsed(stacks), mimetype='text/plain')
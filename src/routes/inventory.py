@@ -1,15 +1,18 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from auth import permission_required
+from auth import permission_required, jwt_required
 from models import db, Product, italy_now
+from cache import bump_version, versioned_response
+from search import parse_search_params, ranked_search
+from serializers import serialize_product
+from projections import PRODUCT
 from marshmallow import Schema, fields, ValidationError
-import uuid
 
 from flasgger import swag_from
 
 from docs.inventory_docs import (
     get_all_products_spec,
     get_product_ean_spec,
+    search_products_text_spec,
     get_product_spec,
     modify_quantity_spec,
     create_product_spec,
@@ -32,7 +35,6 @@ class ProductSchema(Schema):
     updated_at = fields.DateTime(dump_only=True)
 
 product_schema = ProductSchema()
-products_schema = ProductSchema(many=True)
 
 @inventory_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -40,12 +42,25 @@ products_schema = ProductSchema(many=True)
 def get_products():
     """Get all products"""
     try:
-        products = Product.query.all()
-        return jsonify({
-            'success': True,
-            'data': products_schema.dump(products),
-            'count': len(products)
-        }), 200
+        try:
+            projection = PRODUCT.for_request(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid fields or view',
+                'error': str(e)
+            }), 400
+        
+        def build_response(version):
+            products = projection.fetch(Product.query)
+            return jsonify({
+                'success': True,
+                'data': projection.serialize(products),
+                'count': len(products)
+            }), 200
+        
+        variant = (projection.key,) if projection.key else ()
+        return versioned_response('products', variant, build_response, public=False)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -60,10 +75,10 @@ def get_products():
 def search_products(ean):
     """Search products by EAN"""
     try:
-        products = Product.query.filter_by(ean=ean).all()
+        products = PRODUCT.fetch(Product.query.filter_by(ean=ean))
         return jsonify({
             'success': True,
-            'data': products_schema.dump(products),
+            'data': [serialize_product(product) for product in products],
             'count': len(products)
         }), 200
     except Exception as e:
@@ -73,21 +88,45 @@ def search_products(ean):
             'error': str(e)
         }), 500
 
-@inventory_bp.route('/<product_id>', methods=['GET'])
+@inventory_bp.route('/search', methods=['GET'])
 @jwt_required()
-@swag_from(get_product_spec)
-def get_product(product_id):
-    """Get single product by ID"""
+@swag_from(search_products_text_spec)
+def search_products_text():
+    """Search products by name, description and category, best matches first"""
     try:
-        # Validate UUID
         try:
-            uuid.UUID(product_id)
-        except ValueError:
+            terms, limit = parse_search_params(request.args)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': 'Invalid product ID format'
+                'message': 'Invalid search parameters',
+                'error': str(e)
             }), 400
         
+        make = PRODUCT.record._make
+        results = [
+            {**serialize_product(make(row[:-1])), 'score': round(row.score, 4)}
+            for row in ranked_search(Product, terms, PRODUCT.columns).limit(limit)
+        ]
+        
+        return jsonify({
+            'success': True,
+            'data': results,
+            'count': len(results)
+        }), 200
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Error searching products',
+            'error': str(e)
+        }), 500
+
+@inventory_bp.route('/<uuid:product_id>', methods=['GET'])
+@jwt_required()
+@swag_from(get_product_spec)
+def get_product(product_id):
+    """Get single product by ID"""
+    try:
         product = Product.query.get(product_id)
         if not product:
             return jsonify({
@@ -97,7 +136,7 @@ def get_product(product_id):
         
         return jsonify({
             'success': True,
-            'data': product_schema.dump(product)
+            'data': serialize_product(product)
         }), 200
     except Exception as e:
         return jsonify({
@@ -142,12 +181,13 @@ def add_product():
         )
         
         db.session.add(new_product)
+        bump_version('products')
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': 'Product added successfully',
-            'data': product_schema.dump(new_product)
+            'data': serialize_product(new_product)
         }), 201
     except Exception as e:
         db.session.rollback()
@@ -157,21 +197,12 @@ def add_product():
             'error': str(e)
         }), 500
 
-@inventory_bp.route('/<product_id>', methods=['PATCH'])
+@inventory_bp.route('/<uuid:product_id>', methods=['PATCH'])
 @swag_from(update_product_spec)
 @permission_required('product.edit')
 def update_product(product_id):
     """Update existing product"""
     try:
-        # Validate UUID
-        try:
-            uuid.UUID(product_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid product ID format'
-            }), 400
-        
         # Find product
         product = Product.query.get(product_id)
         if not product:
@@ -205,12 +236,13 @@ def update_product(product_id):
         
         product.updated_at = italy_now()
         
+        bump_version('products')
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': 'Product updated successfully',
-            'data': product_schema.dump(product)
+            'data': serialize_product(product)
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -220,21 +252,12 @@ def update_product(product_id):
             'error': str(e)
         }), 500
 
-@inventory_bp.route('/<product_id>/quantity', methods=['PATCH'])
+@inventory_bp.route('/<uuid:product_id>/quantity', methods=['PATCH'])
 @swag_from(modify_quantity_spec)
 @permission_required('product.edit')
 def modify_quantity(product_id):
     """Modify product quantity with operations (add, remove, set)"""
     try:
-        # Validate UUID
-        try:
-            uuid.UUID(product_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid product ID format'
-            }), 400
-        
         product = Product.query.get(product_id)
         if not product:
             return jsonify({
@@ -290,12 +313,13 @@ def modify_quantity(product_id):
             product.quantity = amount
         
         product.updated_at = italy_now()
+        bump_version('products')
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': f'Quantity updated: {old_quantity} → {product.quantity}',
-            'data': product_schema.dump(product)
+            'data': serialize_product(product)
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -305,21 +329,12 @@ def modify_quantity(product_id):
             'error': str(e)
         }), 500
 
-@inventory_bp.route('/<product_id>', methods=['DELETE'])
+@inventory_bp.route('/<uuid:product_id>', methods=['DELETE'])
 @swag_from(delete_product_spec)
 @permission_required('product.delete')
 def delete_product(product_id):
     """Delete product"""
     try:
-        # Validate UUID
-        try:
-            uuid.UUID(product_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid product ID format'
-            }), 400
-        
         # Find product
         product = Product.query.get(product_id)
         if not product:
@@ -332,6 +347,7 @@ def delete_product(product_id):
         
         # Delete product
         db.session.delete(product)
+        bump_version('products')
         db.session.commit()
         
         return jsonify({
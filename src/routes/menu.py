@@ -1,16 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import get_jwt
 from models import db, MenuItem, OrderItem
 from auth import permission_required, role_required
+from cache import VersionedCache, bump_version, versioned_response
+from search import parse_search_params, ranked_search
+from suggest import get_menu_suggestions
+from serializers import serialize_menu_item
+from projections import MENU_ITEM
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import array
 from sqlalchemy.exc import IntegrityError
-from marshmallow import Schema, fields, ValidationError
-import uuid
-import json
+from sqlalchemy.orm import aliased
+from marshmallow import Schema, fields, ValidationError, post_load
 
 from flasgger import swag_from
 from docs.menu_docs import (
     get_all_menu_items_spec,
     get_available_menu_items_spec,
+    search_menu_items_spec,
+    suggest_menu_items_spec,
     get_menu_item_spec,
     create_menu_item_spec,
     update_menu_item_spec,
@@ -19,6 +27,13 @@ from docs.menu_docs import (
 
 menu_bp = Blueprint('menu', __name__)
 
+MENU_CATEGORIES = ('appetizer', 'main', 'dessert', 'beverage', 'side')
+# The 14 allergens declared on EU menus (Regulation 1169/2011), lowercase
+ALLERGENS = (
+    'gluten', 'crustaceans', 'eggs', 'fish', 'peanuts', 'soy', 'dairy',
+    'nuts', 'celery', 'mustard', 'sesame', 'sulfites', 'lupin', 'molluscs'
+)
+
 # Marshmallow schemas for validation
 class MenuItemSchema(Schema):
     id = fields.Str(dump_only=True)
@@ -27,17 +42,56 @@ class MenuItemSchema(Schema):
     image_url = fields.Str(allow_none=True)
     price = fields.Float(required=True, validate=lambda x: x >= 0)
     tax_amount = fields.Float(allow_none=True, validate=lambda x: x >= 0 and x <= 1)
-    category = fields.Str(required=True, validate=lambda x: x in ['appetizer', 'main', 'dessert', 'beverage', 'side'])
+    category = fields.Str(required=True, validate=lambda x: x in MENU_CATEGORIES)
     is_available = fields.Bool(missing=True)
     preparation_time = fields.Int(required=True, validate=lambda x: x >= 1)
-    allergens = fields.List(fields.Str(), allow_none=True)
+    allergens = fields.List(fields.Str(validate=lambda x: x.strip().lower() in ALLERGENS), allow_none=True)
     nutritional_info = fields.Dict(allow_none=True)
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
+    @post_load
+    def lowercase_allergens(self, data, **kwargs):
+        # exclude_allergens matches them case-sensitively in SQL
+        if data.get('allergens'):
+            data['allergens'] = list(dict.fromkeys(allergen.strip().lower() for allergen in data['allergens']))
+        return data
+
 menu_item_schema = MenuItemSchema()
 menu_items_schema = MenuItemSchema(many=True)
 
+# Serialized menu items per worker, invalidated by the 'menu' version that
+# create/update/delete bump in their transaction
+menu_cache = VersionedCache('menu')
+
+
+def parse_allergens(value):
+    """Parse a comma-separated allergen list (exclude_allergens=gluten,dairy)
+
+    Raises ValueError for allergens not in ALLERGENS.
+    """
+    if not value:
+        return ()
+    allergens = {allergen.strip().lower() for allergen in value.split(',') if allergen.strip()}
+    unknown = allergens.difference(ALLERGENS)
+    if unknown:
+        raise ValueError(f"Unknown allergens: {', '.join(sorted(unknown))}. Known: {', '.join(ALLERGENS)}")
+    return tuple(sorted(allergens))
+
+
+def exclude_allergens(query, allergens):
+    """Filter out menu items containing any of `allergens`, evaluated in SQL
+
+    The items to drop are found with allergens ?| ARRAY[...], served by the
+    GIN index on menu_items.allergens, and removed with an anti-join.
+    """
+    if not allergens:
+        return query
+    containing = aliased(MenuItem)
+    return query.filter(~MenuItem.id.in_(
+        select(containing.id).where(containing.allergens.has_any(array(allergens)))
+    ))
+
 
 # ============ PUBLIC ENDPOINTS ============
 
@@ -47,26 +101,55 @@ def get_all_menu_items():
     """Get all menu items with optional filtering - PUBLIC"""
     try:
         category = request.args.get('category')
+        if category is not None and category not in MENU_CATEGORIES:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid category',
+                'error': f"category must be one of {', '.join(MENU_CATEGORIES)}"
+            }), 400
         available = request.args.get('available')
+        is_available = available.lower() == 'true' if available is not None else None
+        try:
+            allergens = parse_allergens(request.args.get('exclude_allergens'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid allergens',
+                'error': str(e)
+            }), 400
+        try:
+            projection = MENU_ITEM.for_request(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid fields or view',
+                'error': str(e)
+            }), 400
         
-        query = MenuItem.query
-        
-        if category:
-            query = query.filter(MenuItem.category == category)
-        if available is not None:
-            is_available = available.lower() == 'true'
-            query = query.filter(MenuItem.is_available == is_available)
-        
-        menu_items = query.order_by(MenuItem.category, MenuItem.name).all()
-        
-        # Convert to dict first to deserialize JSON fields (allergens, nutritional_info)
-        menu_items_data = [item.to_dict() for item in menu_items]
+        def load_menu_items():
+            query = MenuItem.query
+            
+            if category:
+                query = query.filter(MenuItem.category == category)
+            if is_available is not None:
+                query = query.filter(MenuItem.is_available == is_available)
+            query = exclude_allergens(query, allergens)
+            
+            menu_items = projection.fetch(query.order_by(MenuItem.category, MenuItem.name))
+            
+            return projection.serialize(menu_items)
+        
+        cache_key = ('all', category, is_available, allergens, projection.key)
+        
+        def build_response(version):
+            menu_items_data = menu_cache.get_or_load(cache_key, load_menu_items, version=version)
+            return jsonify({
+                'success': True,
+                'data': menu_items_data,
+                'count': len(menu_items_data)
+            }), 200
         
-        return jsonify({
-            'success': True,
-            'data': menu_items_data,
-            'count': len(menu_items)
-        }), 200
+        return versioned_response('menu', cache_key, build_response)
         
     except Exception as e:
         return jsonify({
@@ -81,41 +164,145 @@ def get_all_menu_items():
 def get_available_menu_items():
     """Get available menu items for ordering - PUBLIC"""
     try:
-        menu_items = MenuItem.query.filter(MenuItem.is_available == True).all()
+        try:
+            allergens = parse_allergens(request.args.get('exclude_allergens'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid allergens',
+                'error': str(e)
+            }), 400
+        try:
+            projection = MENU_ITEM.for_request(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid fields or view',
+                'error': str(e)
+            }), 400
+        
+        def load_available_items():
+            query = MenuItem.query.filter(MenuItem.is_available == True)
+            menu_items = projection.fetch(exclude_allergens(query, allergens))
+            
+            return projection.serialize(menu_items)
+        
+        cache_key = ('available', allergens, projection.key)
+        
+        def build_response(version):
+            menu_items_data = menu_cache.get_or_load(cache_key, load_available_items, version=version)
+            return jsonify({
+                'success': True,
+                'data': menu_items_data,
+                'count': len(menu_items_data)
+            }), 200
+        
+        return versioned_response('menu', cache_key, build_response)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Error fetching available menu items',
+            'error': str(e)
+        }), 500
+
+
+@menu_bp.route('/search', methods=['GET'])
+@swag_from(search_menu_items_spec)
+def search_menu_items():
+    """Search menu items by name and description, best matches first - PUBLIC"""
+    try:
+        try:
+            terms, limit = parse_search_params(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid search parameters',
+                'error': str(e)
+            }), 400
+        
+        available = request.args.get('available')
+        try:
+            allergens = parse_allergens(request.args.get('exclude_allergens'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid allergens',
+                'error': str(e)
+            }), 400
         
-        # Convert to dict first to deserialize JSON fields
-        menu_items_data = [item.to_dict() for item in menu_items]
+        query = ranked_search(MenuItem, terms, MENU_ITEM.columns)
+        if available is not None:
+            query = query.filter(MenuItem.is_available == (available.lower() == 'true'))
+        query = exclude_allergens(query, allergens)
+        
+        make = MENU_ITEM.record._make
+        results = [
+            {**serialize_menu_item(make(row[:-1])), 'score': round(row.score, 4)}
+            for row in query.limit(limit)
+        ]
         
         return jsonify({
             'success': True,
-            'data': menu_items_data,
-            'count': len(menu_items)
+            'data': results,
+            'count': len(results)
         }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
-            'message': 'Error fetching available menu items',
+            'message': 'Error searching menu items',
             'error': str(e)
         }), 500
 
 
-@menu_bp.route('/<string:menu_id>', methods=['GET'])
+@menu_bp.route('/suggest', methods=['GET'])
+@swag_from(suggest_menu_items_spec)
+def suggest_menu_items():
+    """Suggest available menu item names by prefix, from memory - PUBLIC"""
+    prefix = (request.args.get('q') or '').strip()
+    try:
+        limit = int(request.args.get('limit', current_app.config['MENU_SUGGEST_LIMIT']))
+        if not prefix:
+            raise ValueError("q is required")
+        if not 1 <= limit <= current_app.config['MENU_SUGGEST_MAX_LIMIT']:
+            raise ValueError(f"limit out of range: {limit}")
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid suggest parameters',
+            'error': str(e)
+        }), 400
+    
+    try:
+        suggestions = get_menu_suggestions().suggest(prefix, limit)
+        
+        return jsonify({
+            'success': True,
+            'data': suggestions,
+            'count': len(suggestions)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Error suggesting menu items',
+            'error': str(e)
+        }), 500
+
+
+@menu_bp.route('/<uuid:menu_id>', methods=['GET'])
 @swag_from(get_menu_item_spec)
 def get_menu_item_by_id(menu_id):
     """Get menu item by ID - PUBLIC"""
     try:
-        try:
-            uuid.UUID(menu_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid menu item ID format'
-            }), 400
+        def load_menu_item():
+            menu_item = MenuItem.query.get(menu_id)
+            return menu_item.to_dict() if menu_item else None
         
-        menu_item = MenuItem.query.get(menu_id)
+        menu_item_data = menu_cache.get_or_load(('item', menu_id), load_menu_item)
         
-        if not menu_item:
+        if not menu_item_data:
             return jsonify({
                 'success': False,
                 'message': 'Menu item not found'
@@ -123,7 +310,7 @@ def get_menu_item_by_id(menu_id):
         
         return jsonify({
             'success': True,
-            'data': menu_item.to_dict()
+            'data': menu_item_data
         }), 200
         
     except Exception as e:
@@ -168,12 +355,14 @@ def create_menu_item():
             category=data['category'],
             is_available=data.get('is_available', True),
             preparation_time=data['preparation_time'],
-            allergens=json.dumps(data.get('allergens')) if data.get('allergens') is not None else None,
-            nutritional_info=json.dumps(data.get('nutritional_info')) if data.get('nutritional_info') is not None else None
+            allergens=data.get('allergens'),
+            nutritional_info=data.get('nutritional_info')
         )
         
         db.session.add(menu_item)
+        version = bump_version('menu')
         db.session.commit()
+        get_menu_suggestions().apply(version, menu_item.id, menu_item.name, menu_item.is_available)
         
         print(f"[AUDIT] Menu item '{menu_item.name}' created by {user_role} {user_id}")
         
@@ -200,7 +389,7 @@ def create_menu_item():
         }), 500
 
 
-@menu_bp.route('/<string:menu_id>', methods=['PUT'])
+@menu_bp.route('/<uuid:menu_id>', methods=['PUT'])
 @permission_required('menu.update')
 @swag_from(update_menu_item_spec)
 def update_menu_item(menu_id):
@@ -210,14 +399,6 @@ def update_menu_item(menu_id):
         user_id = claims.get('sub')
         user_role = claims.get('role')
         
-        try:
-            uuid.UUID(menu_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid menu item ID format'
-            }), 400
-        
         menu_item = MenuItem.query.get(menu_id)
         
         if not menu_item:
@@ -236,12 +417,11 @@ def update_menu_item(menu_id):
             }), 400
         
         for key, value in data.items():
-            if key in ['allergens', 'nutritional_info'] and value is not None:
-                setattr(menu_item, key, json.dumps(value))
-            else:
-                setattr(menu_item, key, value)
+            setattr(menu_item, key, value)
         
+        version = bump_version('menu')
         db.session.commit()
+        get_menu_suggestions().apply(version, menu_id, menu_item.name, menu_item.is_available)
         
         print(f"[AUDIT] Menu item {menu_id} updated by {user_role} {user_id}")
         
@@ -268,7 +448,7 @@ def update_menu_item(menu_id):
         }), 500
 
 
-@menu_bp.route('/<string:menu_id>', methods=['DELETE'])
+@menu_bp.route('/<uuid:menu_id>', methods=['DELETE'])
 @role_required('manager')
 @swag_from(delete_menu_item_spec)
 def delete_menu_item(menu_id):
@@ -280,15 +460,6 @@ def delete_menu_item(menu_id):
         claims = get_jwt()
         user_id = claims.get('sub')
         
-        # Validate UUID
-        try:
-            uuid.UUID(menu_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid menu item ID format'
-            }), 400
-        
         # Find menu item using ORM
         menu_item = MenuItem.query.get(menu_id)
         
@@ -307,7 +478,9 @@ def delete_menu_item(menu_id):
         
         # Delete menu item (CASCADE will automatically delete associated order_items)
         db.session.delete(menu_item)
+        version = bump_version('menu')
         db.session.commit()
+        get_menu_suggestions().apply(version, menu_id)
         
         print(f"[AUDIT] Menu item '{item_name}' ({menu_id}) deleted by manager {user_id}")
         
@@ -1,27 +1,41 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import get_jwt, get_jwt_request_location
 from flasgger import swag_from
 from docs.order_docs import (
     get_all_orders_spec,
     get_order_spec,
     create_order_spec,
+    bulk_create_orders_spec,
     update_order_status_spec,
     update_order_item_status_spec,
+    bulk_update_order_item_status_spec,
     process_payment_spec,
-    delete_order_spec
+    delete_order_spec,
+    order_events_spec,
+    order_events_token_spec
 )
-from models import db, Order, OrderItem, MenuItem
-from auth import permission_required, role_required, authentication_required
+from models import db, Order, OrderItem, italy_now, uuid7, order_number_seq
+from auth import permission_required, role_required, authentication_required, jwt_required, create_scoped_token
+from query_budget import query_budget
+from events import get_order_events, publish_order_event, order_event, TooManySubscribers
+from pricing import get_menu_index, quote_order
+from serializers import serialize_order
+from projections import ORDER, fetch_orders, iter_orders
+from scheduler import get_kitchen_scheduler
+from sqlalchemy import tuple_, update, select, exists, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
-from marshmallow import Schema, fields, ValidationError
+from marshmallow import Schema, fields, ValidationError, post_load
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 import uuid
+import base64
 
 order_bp = Blueprint('orders', __name__)
 
 class OrderItemSchema(Schema):
     id = fields.Str(dump_only=True)
-    menu_item_id = fields.Str(required=True)
+    menu_item_id = fields.UUID(required=True)
     menu_item_name = fields.Str(dump_only=True)
     quantity = fields.Int(required=True, validate=lambda x: x > 0)
     unit_price = fields.Float(dump_only=True)
@@ -34,6 +48,12 @@ class OrderItemSchema(Schema):
     class Meta:
         unknown = 'exclude'
 
+    @post_load
+    def menu_item_id_to_str(self, data, **kwargs):
+        # Models and the menu index keep UUIDs as strings
+        data['menu_item_id'] = str(data['menu_item_id'])
+        return data
+
 class OrderSchema(Schema):
     id = fields.Str(dump_only=True)
     order_number = fields.Str(dump_only=True)
@@ -54,46 +74,134 @@ class OrderSchema(Schema):
     class Meta:
         unknown = 'exclude'
 
+class BulkOrderEntrySchema(OrderSchema):
+    idempotency_key = fields.Str(allow_none=True, validate=lambda x: 0 < len(x) <= 64)
+
 class OrderStatusUpdateSchema(Schema):
     status = fields.Str(required=True, validate=lambda x: x in ['preparing', 'ready', 'delivered', 'cancelled'])
 
 class OrderItemStatusUpdateSchema(Schema):
     status = fields.Str(required=True, validate=lambda x: x in ['preparing', 'ready', 'delivered', 'cancelled'])
 
+class OrderItemStatusBulkEntrySchema(Schema):
+    order_id = fields.UUID(required=True)
+    item_id = fields.UUID(required=True)
+    status = fields.Str(required=True, validate=lambda x: x in ['preparing', 'ready', 'delivered', 'cancelled'])
+
+class OrderItemStatusBulkUpdateSchema(Schema):
+    updates = fields.List(fields.Nested(OrderItemStatusBulkEntrySchema), required=True,
+                          validate=lambda x: 0 < len(x) <= 500)
+
 class PaymentSchema(Schema):
     payment_method = fields.Str(missing='cash')
     payment_amount = fields.Float(allow_none=True)
 
 order_schema = OrderSchema()
-orders_schema = OrderSchema(many=True)
+bulk_order_entry_schema = BulkOrderEntrySchema()
 order_status_update_schema = OrderStatusUpdateSchema()
 order_item_status_update_schema = OrderItemStatusUpdateSchema()
+order_item_status_bulk_update_schema = OrderItemStatusBulkUpdateSchema()
 payment_schema = PaymentSchema()
 
 
+def generate_order_numbers(count):
+    """Generate `count` unique order numbers (ORD-YYYYMMDD-NNNNNN) in one round trip
+
+    The counter is a Postgres sequence: nextval() never blocks concurrent
+    transactions and never returns the same value twice, so there is no
+    retry loop on the order_number unique constraint. Six digits keep the
+    numbers distinct from the older ORD-YYYYMMDD-NNNN random ones.
+    """
+    prefix = italy_now().strftime("%Y%m%d")
+    values = db.session.execute(
+        select(order_number_seq.next_value()).select_from(func.generate_series(1, count))
+    ).scalars()
+    return [f"ORD-{prefix}-{value:06d}" for value in values]
+
+
 def generate_order_number():
     """Generate a unique order number"""
-    import random
-    prefix = datetime.now().strftime("%Y%m%d")
-    suffix = random.randint(1000, 9999)
-    return f"ORD-{prefix}-{suffix}"
+    return generate_order_numbers(1)[0]
+
+
+def calculate_estimated_completion_time(items, now, key=None):
+    """Calculate estimated completion time of an order placed at `now` from the kitchen queue
+
+    The order joins the queue when the transaction commits.
+    """
+    return get_kitchen_scheduler().schedule(
+        [(item.get('preparation_time'), item['quantity']) for item in items], now, key
+    )
 
 
-def calculate_estimated_completion_time(items):
-    """Calculate estimated completion time based on preparation times"""
-    from models import italy_now
-    max_prep_time = max([item.get('preparation_time', 15) for item in items], default=15)
-    estimated_minutes = max_prep_time + 5
-    return italy_now() + timedelta(minutes=estimated_minutes)
+def parse_page_limit(value):
+    """Parse the `limit` query parameter, raising ValueError when out of range"""
+    if value is None:
+        return current_app.config['ORDERS_PAGE_SIZE']
+    limit = int(value)
+    if not 1 <= limit <= current_app.config['ORDERS_MAX_PAGE_SIZE']:
+        raise ValueError(f"limit out of range: {limit}")
+    return limit
+
+
+def encode_order_cursor(order):
+    """Encode the (created_at, id) position of an order as an opaque cursor"""
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_order_cursor(cursor):
+    """Decode a cursor produced by encode_order_cursor, raising ValueError if malformed"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, order_id = base64.urlsafe_b64decode(padded).decode().split('|')
+    return datetime.fromisoformat(created_at), str(uuid.UUID(order_id))
+
+
+def stream_orders(query, limit, paginated, projection=ORDER):
+    """Yield the orders list JSON payload in chunks, one order at a time"""
+    dumps = current_app.json.dumps
+    batch_size = current_app.config['ORDERS_STREAM_BATCH_SIZE']
+    
+    yield '{"success": true, "data": ['
+    
+    count = 0
+    last_order = None
+    has_more = False
+    serialize = projection.serializer
+    if limit is not None:
+        # One extra row tells whether a next page exists
+        query = query.limit(limit + 1)
+        batch_size = min(batch_size, limit + 1)
+    for order in iter_orders(query, batch_size, projection):
+        if limit is not None and count == limit:
+            has_more = True
+            break
+        yield (',' if count else '') + dumps(serialize(order))
+        count += 1
+        last_order = order
+    
+    tail = f'], "count": {count}'
+    if paginated:
+        next_cursor = encode_order_cursor(last_order) if has_more else None
+        tail += f', "next_cursor": {dumps(next_cursor)}'
+    yield tail + '}'
 
 
 # ============ PUBLIC/PROTECTED ENDPOINTS ============
 
 @order_bp.route('/', methods=['GET'])
+@query_budget(2)  # plus one per extra batch of order items (attach_items)
 @authentication_required()
 @swag_from(get_all_orders_spec)
 def get_all_orders():
-    """Get all orders with optional filtering - PROTECTED"""
+    """Get all orders with optional filtering and keyset pagination - PROTECTED
+
+    Passing `limit` and/or `cursor` switches to paginated mode: orders are
+    returned newest first in pages of at most `limit` rows, and `next_cursor`
+    points to the following page (null on the last one). `stream=true` sends
+    the same payload as a chunked response built row by row. `fields` and
+    `view=summary` select a subset of the order and item fields.
+    """
     try:
         claims = get_jwt()
         user_role = claims.get('role')
@@ -101,6 +209,18 @@ def get_all_orders():
         status = request.args.get('status')
         table_number = request.args.get('table_number')
         order_type = request.args.get('order_type')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit')
+        stream = request.args.get('stream', 'false').lower() == 'true'
+        
+        try:
+            projection = ORDER.for_request(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid fields or view',
+                'error': str(e)
+            }), 400
         
         query = Order.query
         
@@ -116,13 +236,56 @@ def get_all_orders():
         if order_type:
             query = query.filter(Order.order_type == order_type)
         
-        orders = query.order_by(Order.created_at.desc()).all()
+        paginated = cursor is not None or limit is not None
         
-        return jsonify({
+        if paginated:
+            try:
+                limit = parse_page_limit(limit)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'message': f"limit must be an integer between 1 and {current_app.config['ORDERS_MAX_PAGE_SIZE']}"
+                }), 400
+            
+            if cursor:
+                try:
+                    cursor_created_at, cursor_id = decode_order_cursor(cursor)
+                except ValueError:
+                    return jsonify({
+                        'success': False,
+                        'message': 'Invalid cursor'
+                    }), 400
+                query = query.filter(
+                    tuple_(Order.created_at, Order.id) < tuple_(cursor_created_at, cursor_id)
+                )
+        else:
+            limit = None
+        
+        query = query.order_by(Order.created_at.desc(), Order.id.desc())
+        
+        if stream:
+            return Response(
+                stream_with_context(stream_orders(query, limit, paginated, projection)),
+                mimetype='application/json'
+            )
+        
+        if limit is not None:
+            orders = fetch_orders(query.limit(limit + 1), projection)
+            has_more = len(orders) > limit
+            orders = orders[:limit]
+        else:
+            orders = fetch_orders(query, projection)
+            has_more = False
+        
+        response = {
             'success': True,
-            'data': orders_schema.dump(orders),
+            'data': projection.serialize(orders),
             'count': len(orders)
-        }), 200
+        }
+        if paginated:
+            response['next_cursor'] = encode_order_cursor(orders[-1]) if has_more else None
+        
+        return jsonify(response), 200
         
     except Exception as e:
         print(f"Error in get_all_orders: {str(e)}")
@@ -133,21 +296,100 @@ def get_all_orders():
         }), 500
 
 
-@order_bp.route('/<string:order_id>', methods=['GET'])
+@order_bp.route('/events/token', methods=['POST'])
+@jwt_required()
+@swag_from(order_events_token_spec)
+def create_order_events_token():
+    """Issue a short-lived token for GET /api/orders/events - PROTECTED
+
+    EventSource cannot send headers, so the stream takes its token in the
+    URL, where proxies and access logs may record it: this token expires
+    after ORDER_EVENTS_TOKEN_EXPIRES seconds and is only valid for the stream.
+    """
+    try:
+        expires_in = current_app.config['ORDER_EVENTS_TOKEN_EXPIRES']
+        token = create_scoped_token('orders.stream_order_events', timedelta(seconds=expires_in))
+        return jsonify({
+            'success': True,
+            'token': token,
+            'expires_in': expires_in
+        }), 201
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': 'Error creating stream token',
+            'error': str(e)
+        }), 500
+
+
+@order_bp.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+@swag_from(order_events_spec)
+def stream_order_events():
+    """Push order events to kitchen displays as Server-Sent Events - PROTECTED
+
+    EventSource cannot send headers, so the token may also be passed as the
+    `jwt` query parameter: there only stream tokens from
+    POST /api/orders/events/token are accepted.
+    """
+    if get_jwt_request_location() == 'query_string' and get_jwt().get('scope') != request.endpoint:
+        return jsonify({
+            'success': False,
+            'message': 'Use a stream token from POST /api/orders/events/token in the jwt parameter',
+            'error': 'invalid_token_scope'
+        }), 401
+    
+    broker = get_order_events()
+    if broker.is_full():
+        response = jsonify({
+            'success': False,
+            'message': 'Too many open event streams, retry later',
+            'error': f"{broker.max_subscribers} streams open"
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = '5'
+        return response
+    
+    keepalive = current_app.config['ORDER_EVENTS_KEEPALIVE']
+    dumps = current_app.json.dumps
+    
+    def generate():
+        # Subscribe only once the body is sent: a response that is never
+        # iterated (HEAD, or replaced by an after_request hook) must not
+        # hold a stream slot, as the finally below would never run
+        try:
+            subscription = broker.subscribe()
+        except TooManySubscribers:
+            # The last slot was taken since the check above
+            yield 'retry: 5000\n\n'
+            return
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                event_data = subscription.get(timeout=keepalive)
+                if event_data is None:
+                    # Comment line: keeps proxies from closing the idle connection
+                    # and detects disconnected clients
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event_data['type']}\ndata: {dumps(event_data)}\n\n"
+        finally:
+            subscription.close()
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@order_bp.route('/<uuid:order_id>', methods=['GET'])
+@query_budget(2)
 @jwt_required()
 @swag_from(get_order_spec)
 def get_order_by_id(order_id):
     """Get order by ID - PROTECTED"""
     try:
-        # Validate UUID
-        try:
-            uuid.UUID(order_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid order ID format'
-            }), 400
-        
         order = Order.query.get(order_id)
         
         if not order:
@@ -158,7 +400,7 @@ def get_order_by_id(order_id):
         
         return jsonify({
             'success': True,
-            'data': order_schema.dump(order)
+            'data': serialize_order(order)
         }), 200
         
     except Exception as e:
@@ -171,6 +413,7 @@ def get_order_by_id(order_id):
 
 
 @order_bp.route('/', methods=['POST'])
+@query_budget(10)
 @permission_required('order.create')
 @swag_from(create_order_spec)
 def create_order():
@@ -193,49 +436,31 @@ def create_order():
                 'errors': err.messages
             }), 400
         
-        # Verify menu items availability
-        menu_item_ids = [item['menu_item_id'] for item in validated_data['items']]
-        available_items = MenuItem.query.filter(
-            MenuItem.id.in_(menu_item_ids),
-            MenuItem.is_available == True
-        ).all()
+        # Verify menu items availability and price the items from the menu index
+        quote = quote_order(validated_data['items'])
         
-        available_ids = {item.id for item in available_items}
-        unavailable_items = [mid for mid in menu_item_ids if mid not in available_ids]
-        
-        if unavailable_items:
+        if quote.unavailable_items:
             return jsonify({
                 'success': False,
                 'message': 'Some menu items are not available',
-                'unavailable_items': unavailable_items
+                'unavailable_items': quote.unavailable_items
             }), 400
         
-        # Calculate totals by fetching the prices from the db and multiplying by quantity
-        for item in validated_data['items']:
-            menu_item = next((mi for mi in available_items if mi.id == item['menu_item_id']), None)
-            if menu_item:
-                item['menu_item_name'] = menu_item.name
-                item['unit_price'] = float(menu_item.price)
-                item['total_price'] = (float(menu_item.price) * item['quantity']) * \
-                    (1 + (menu_item.tax_amount if menu_item.tax_amount else 0))
-
-
-        total_amount = sum(item['total_price'] for item in validated_data['items'])
-        discount_amount = 0 # Can be extended to apply discounts
-        final_amount = total_amount - discount_amount
-        
-        # Create order
+        # Create order: the ETA counts from its creation time
+        now = italy_now()
         order = Order(
             order_number=generate_order_number(),
             table_number=validated_data['table_number'],
             customer_name=validated_data.get('customer_name'),
             order_type=validated_data['order_type'],
             status='preparing',
-            total_amount=total_amount,
-            discount_amount=discount_amount,
-            final_amount=final_amount,
+            total_amount=quote.total_amount,
+            discount_amount=quote.discount_amount,
+            final_amount=quote.final_amount,
             special_instructions=validated_data.get('special_instructions'),
-            estimated_completion_time=calculate_estimated_completion_time(validated_data['items'])
+            estimated_completion_time=calculate_estimated_completion_time(validated_data['items'], now),
+            created_at=now,
+            updated_at=now
         )
         
         db.session.add(order)
@@ -255,6 +480,7 @@ def create_order():
             )
             db.session.add(order_item)
         
+        publish_order_event('order.created', order)
         db.session.commit()
         
         print(f"[AUDIT] Order {order.order_number} created by {user_role} {user_id}")
@@ -262,7 +488,7 @@ def create_order():
         return jsonify({
             'success': True,
             'message': 'Order created successfully',
-            'data': order_schema.dump(order)
+            'data': serialize_order(order)
         }), 201
         
     except IntegrityError as e:
@@ -285,24 +511,223 @@ def create_order():
         }), 500
 
 
-@order_bp.route('/<string:order_id>/status', methods=['PUT'])
-@permission_required('order.update')
-@swag_from(update_order_status_spec)
-def update_order_status(order_id):
-    """Update order status - PROTECTED: Chef, Manager"""
+@order_bp.route('/bulk', methods=['POST'])
+@query_budget(8)
+@permission_required('order.create')
+@swag_from(bulk_create_orders_spec)
+def bulk_create_orders():
+    """Create a backlog of orders in a single transaction - PROTECTED: Waiter, Manager
+
+    Used by tablets replaying the orders they queued while offline. Orders
+    carrying an idempotency_key that is already stored are not created
+    again: the existing order is reported instead, so replays are safe.
+    Results are returned per order, in request order.
+    """
     try:
         claims = get_jwt()
         user_id = claims.get('sub')
         user_role = claims.get('role')
         
-        try:
-            uuid.UUID(order_id)
-        except ValueError:
+        data = request.json
+        entries = data.get('orders') if isinstance(data, dict) else None
+        max_orders = current_app.config['ORDERS_BULK_MAX_SIZE']
+        if not isinstance(entries, list) or not 0 < len(entries) <= max_orders:
             return jsonify({
                 'success': False,
-                'message': 'Invalid order ID format'
+                'message': 'Validation error',
+                'errors': {'orders': [f'Must be a list of 1 to {max_orders} orders.']}
             }), 400
         
+        results = [None] * len(entries)
+        valid_orders = []
+        for index, entry in enumerate(entries):
+            try:
+                valid_orders.append((index, bulk_order_entry_schema.load(entry)))
+            except ValidationError as err:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': err.messages}
+        
+        # Every order is priced against the same menu snapshot
+        menu_index = get_menu_index()
+        
+        def find_orders_by_key(keys):
+            rows = db.session.execute(
+                select(Order.id, Order.order_number, Order.status, Order.idempotency_key)
+                .where(Order.idempotency_key.in_(keys))
+            )
+            return {row.idempotency_key: row for row in rows}
+        
+        keys = {order_data.get('idempotency_key') for _, order_data in valid_orders} - {None}
+        existing_orders = find_orders_by_key(keys) if keys else {}
+        
+        now = italy_now()
+        order_rows = []
+        item_rows = {}
+        index_by_order_id = {}
+        replayed = []
+        new_keys = set()
+        for index, order_data in valid_orders:
+            key = order_data.get('idempotency_key')
+            if key is not None and (key in existing_orders or key in new_keys):
+                # Resolved once this batch is inserted
+                replayed.append((index, key))
+                continue
+            
+            quote = quote_order(order_data['items'], menu_index)
+            if quote.unavailable_items:
+                results[index] = {
+                    'index': index,
+                    'idempotency_key': key,
+                    'status': 'rejected',
+                    'message': 'Some menu items are not available',
+                    'unavailable_items': quote.unavailable_items
+                }
+                continue
+            
+            order_id = uuid7()
+            order_rows.append({
+                'id': order_id,
+                'order_number': None,
+                'table_number': order_data['table_number'],
+                'customer_name': order_data.get('customer_name'),
+                'status': 'preparing',
+                'order_type': order_data['order_type'],
+                'total_amount': quote.total_amount,
+                'tax_amount': 0,
+                'discount_amount': quote.discount_amount,
+                'final_amount': quote.final_amount,
+                'special_instructions': order_data.get('special_instructions'),
+                'estimated_completion_time': calculate_estimated_completion_time(order_data['items'], now, order_id),
+                'idempotency_key': key,
+                'created_at': now,
+                'updated_at': now
+            })
+            item_rows[order_id] = [
+                {
+                    'id': uuid7(),
+                    'order_id': order_id,
+                    'menu_item_id': item['menu_item_id'],
+                    'menu_item_name': item['menu_item_name'],
+                    'quantity': item['quantity'],
+                    'unit_price': item['unit_price'],
+                    'total_price': item['total_price'],
+                    'special_instructions': item.get('special_instructions'),
+                    'status': 'preparing',
+                    'created_at': now,
+                    'updated_at': now
+                }
+                for item in order_data['items']
+            ]
+            index_by_order_id[order_id] = index
+            if key is not None:
+                new_keys.add(key)
+        
+        created_orders = []
+        if order_rows:
+            for row, order_number in zip(order_rows, generate_order_numbers(len(order_rows))):
+                row['order_number'] = order_number
+            
+            # A concurrent replay of the same keys waits on our rows (or we on
+            # theirs) and then skips them instead of failing the batch
+            created_ids = set(db.session.execute(
+                insert(Order)
+                .values(order_rows)
+                .on_conflict_do_nothing(index_elements=[Order.idempotency_key])
+                .returning(Order.id)
+            ).scalars())
+            
+            created_orders = [row for row in order_rows if row['id'] in created_ids]
+            lost_keys = [row['idempotency_key'] for row in order_rows if row['id'] not in created_ids]
+            if lost_keys:
+                existing_orders.update(find_orders_by_key(lost_keys))
+            
+            new_item_rows = [item for row in created_orders for item in item_rows[row['id']]]
+            if new_item_rows:
+                db.session.execute(insert(OrderItem).values(new_item_rows))
+            
+            for row in order_rows:
+                if row['id'] not in created_ids:
+                    replayed.append((index_by_order_id[row['id']], row['idempotency_key']))
+            # Only the inserted orders join the kitchen queue
+            get_kitchen_scheduler().cancel(row['id'] for row in order_rows if row['id'] not in created_ids)
+        
+        get_order_events().publish_many([
+            order_event('order.created', SimpleNamespace(
+                **row, items=[SimpleNamespace(**item) for item in item_rows[row['id']]]
+            ))
+            for row in created_orders
+        ])
+        db.session.commit()
+        
+        for row in created_orders:
+            index = index_by_order_id[row['id']]
+            results[index] = {
+                'index': index,
+                'idempotency_key': row['idempotency_key'],
+                'status': 'created',
+                'order': {
+                    'id': row['id'],
+                    'order_number': row['order_number'],
+                    'status': row['status'],
+                    'final_amount': float(row['final_amount'])
+                }
+            }
+        
+        created_by_key = {row['idempotency_key']: row for row in created_orders if row['idempotency_key']}
+        for index, key in replayed:
+            order = existing_orders.get(key) or SimpleNamespace(**created_by_key[key])
+            results[index] = {
+                'index': index,
+                'idempotency_key': key,
+                'status': 'existing',
+                'order': {'id': order.id, 'order_number': order.order_number, 'status': order.status}
+            }
+        
+        summary = {status: 0 for status in ('created', 'existing', 'rejected', 'invalid')}
+        for result in results:
+            summary[result['status']] += 1
+        
+        print(f"[AUDIT] Bulk order creation by {user_role} {user_id}: {summary}")
+        
+        return jsonify({
+            'success': True,
+            'message': f"{summary['created']} orders created",
+            'data': {
+                'results': results,
+                'summary': summary
+            }
+        }), 200
+        
+    except IntegrityError as e:
+        db.session.rollback()
+        print(f"IntegrityError: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Database integrity error',
+            'error': str(e.orig) if hasattr(e, 'orig') else str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in bulk_create_orders: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': 'Error creating orders',
+            'error': str(e)
+        }), 500
+
+
+@order_bp.route('/<uuid:order_id>/status', methods=['PUT'])
+@query_budget(7)
+@permission_required('order.update')
+@swag_from(update_order_status_spec)
+def update_order_status(order_id):
+    """Update order status - PROTECTED: Chef, Manager"""
+    try:
+        claims = get_jwt()
+        user_id = claims.get('sub')
+        user_role = claims.get('role')
+        
         order = Order.query.get(order_id)
         
         if not order:
@@ -330,12 +755,13 @@ def update_order_status(order_id):
            for item in order.items:
                item.status = new_status
         
+        publish_order_event('order.status_changed', order)
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': 'Order status updated successfully',
-            'data': order_schema.dump(order)
+            'data': serialize_order(order)
         }), 200
         
     except Exception as e:
@@ -350,7 +776,8 @@ def update_order_status(order_id):
         }), 500
 
 
-@order_bp.route('/<string:order_id>/items/<string:item_id>/status', methods=['PUT'])
+@order_bp.route('/<uuid:order_id>/items/<uuid:item_id>/status', methods=['PUT'])
+@query_budget(8)
 @permission_required('order.update')
 @swag_from(update_order_item_status_spec)
 def update_order_item_status(order_id, item_id):
@@ -360,15 +787,6 @@ def update_order_item_status(order_id, item_id):
         user_id = claims.get('sub')
         user_role = claims.get('role')
         
-        try:
-            uuid.UUID(order_id)
-            uuid.UUID(item_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid ID format'
-            }), 400
-        
         order = Order.query.get(order_id)
         
         if not order:
@@ -405,12 +823,13 @@ def update_order_item_status(order_id, item_id):
         if all_items_ready and order.status != 'ready':
             order.status = 'ready'
         
+        publish_order_event('order_item.status_changed', order, order_item)
         db.session.commit()
         
         return jsonify({
             'success': True,
             'message': 'Order item status updated successfully',
-            'data': order_schema.dump(order)
+            'data': serialize_order(order)
         }), 200
         
     except Exception as e:
@@ -425,24 +844,138 @@ def update_order_item_status(order_id, item_id):
         }), 500
 
 
-@order_bp.route('/<string:order_id>/pay', methods=['POST'])
-@permission_required('order.update_payment')
-@swag_from(process_payment_spec)
-def pay_order(order_id):
-    """Process payment for order - PROTECTED: Cashier, Manager"""
+@order_bp.route('/items/status', methods=['PUT'])
+@query_budget(4)
+@permission_required('order.update')
+@swag_from(bulk_update_order_item_status_spec)
+def bulk_update_order_item_status():
+    """Update the status of many order items in one transaction - PROTECTED
+
+    Items are updated with one UPDATE per target status and orders whose
+    items are now all ready/delivered are rolled up to 'ready' in SQL. Only
+    the changes are returned, not the full orders.
+    """
     try:
         claims = get_jwt()
         user_id = claims.get('sub')
         user_role = claims.get('role')
         
         try:
-            uuid.UUID(order_id)
-        except ValueError:
+            data = order_item_status_bulk_update_schema.load(request.json)
+        except ValidationError as err:
             return jsonify({
                 'success': False,
-                'message': 'Invalid order ID format'
+                'message': 'Validation error',
+                'errors': err.messages
             }), 400
         
+        # Last entry wins when the same item is listed more than once
+        requested = {}
+        for entry in data['updates']:
+            requested[(str(entry['order_id']), str(entry['item_id']))] = entry['status']
+        
+        keys_by_status = {}
+        for key, status in requested.items():
+            keys_by_status.setdefault(status, []).append(key)
+        
+        now = italy_now()
+        updated_items = []
+        for status, keys in keys_by_status.items():
+            result = db.session.execute(
+                update(OrderItem)
+                .where(tuple_(OrderItem.order_id, OrderItem.id).in_(keys))
+                .values(status=status, updated_at=now)
+                .returning(OrderItem.id, OrderItem.order_id, OrderItem.status),
+                execution_options={'synchronize_session': False}
+            )
+            updated_items.extend(result.all())
+        
+        touched_order_ids = {item.order_id for item in updated_items}
+        
+        ready_order_ids = set()
+        orders = {}
+        if touched_order_ids:
+            pending_items = exists().where(
+                OrderItem.order_id == Order.id,
+                OrderItem.status.notin_(['ready', 'delivered'])
+            )
+            result = db.session.execute(
+                update(Order)
+                .where(Order.id.in_(touched_order_ids), Order.status != 'ready', ~pending_items)
+                .values(status='ready', updated_at=now)
+                .returning(Order.id),
+                execution_options={'synchronize_session': False}
+            )
+            ready_order_ids = set(result.scalars())
+            
+            orders = {
+                order.id: order
+                for order in db.session.execute(
+                    select(Order.id, Order.order_number, Order.table_number, Order.status)
+                    .where(Order.id.in_(touched_order_ids))
+                )
+            }
+            
+            events = [
+                order_event('order_item.status_changed', orders[item.order_id], item)
+                for item in updated_items
+            ]
+            events.extend(
+                order_event('order.status_changed', orders[order_id])
+                for order_id in ready_order_ids
+            )
+            get_order_events().publish_many(events)
+        
+        db.session.commit()
+        
+        updated_keys = {(item.order_id, item.id) for item in updated_items}
+        not_found = [
+            {'order_id': order_id, 'item_id': item_id}
+            for order_id, item_id in requested
+            if (order_id, item_id) not in updated_keys
+        ]
+        
+        print(f"[AUDIT] {len(updated_items)} order items updated in bulk by {user_role} {user_id}")
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(updated_items)} order items updated successfully',
+            'data': {
+                'items': [
+                    {'order_id': item.order_id, 'item_id': item.id, 'status': item.status}
+                    for item in updated_items
+                ],
+                'orders': [
+                    {'order_id': order_id, 'status': orders[order_id].status}
+                    for order_id in ready_order_ids
+                ],
+                'not_found': not_found
+            }
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in bulk_update_order_item_status: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': 'Error updating order items status',
+            'error': str(e)
+        }), 500
+
+
+@order_bp.route('/<uuid:order_id>/pay', methods=['POST'])
+@query_budget(5)
+@permission_required('order.update_payment')
+@swag_from(process_payment_spec)
+def pay_order(order_id):
+    """Process payment for order - PROTECTED: Cashier, Manager"""
+    try:
+        claims = get_jwt()
+        user_id = claims.get('sub')
+        user_role = claims.get('role')
+        
         order = Order.query.get(order_id)
         
         if not order:
@@ -484,7 +1017,7 @@ def pay_order(order_id):
         return jsonify({
             'success': True,
             'message': 'Payment processed successfully',
-            'data': order_schema.dump(order),
+            'data': serialize_order(order),
             'payment_info': {
                 'method': payment_method,
                 'amount': float(order.final_amount),
@@ -504,7 +1037,8 @@ def pay_order(order_id):
         }), 500
 
 
-@order_bp.route('/<string:order_id>', methods=['DELETE'])
+@order_bp.route('/<uuid:order_id>', methods=['DELETE'])
+@query_budget(4)
 @role_required('manager')
 @swag_from(delete_order_spec)
 def delete_order(order_id):
@@ -513,14 +1047,6 @@ def delete_order(order_id):
         claims = get_jwt()
         user_id = claims.get('sub')
         
-        try:
-            uuid.UUID(order_id)
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'message': 'Invalid order ID format'
-            }), 400
-        
         # Find order using ORM
         order = Order.query.get(order_id)
         
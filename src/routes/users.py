@@ -17,21 +17,34 @@ from docs.user_docs import (
 from models import db, CheckIn, User
 from datetime import datetime, timezone
 from auth import role_required, authentication_required
+from query_budget import query_budget
+from serializers import serialize_checkin
+from projections import USER, CHECKIN
 
 user_bp = Blueprint('users', __name__)
 
 # ========== USER COLLECTION ==========
 
 @user_bp.route('/', methods=['GET'])
+@query_budget(1)
 @role_required('manager')
 @swag_from(get_all_users_spec)
 def get_users():
     """Get list of all users (Collection)"""
     try:
-        users = User.query.all()
+        try:
+            projection = USER.for_request(request.args)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid fields or view',
+                'error': str(e)
+            }), 400
+        
+        users = projection.fetch(User.query)
         return jsonify({
             'success': True,
-            'data': [user.to_dict() for user in users]
+            'data': projection.serialize(users)
         }), 200
     except Exception as e:
         return jsonify({
@@ -63,6 +76,7 @@ def create_user():
 # ========== INDIVIDUAL USER RESOURCE ==========
 
 @user_bp.route('/me', methods=['GET'])
+@query_budget(1)
 @authentication_required()
 @swag_from(get_current_user_spec)
 def get_current_user():
@@ -89,7 +103,8 @@ def get_current_user():
         }), 500
 
 
-@user_bp.route('/<user_id>', methods=['GET'])
+@user_bp.route('/<uuid:user_id>', methods=['GET'])
+@query_budget(1)
 @role_required('manager')
 @swag_from(get_user_by_id_spec)
 def get_user(user_id):
@@ -115,7 +130,8 @@ def get_user(user_id):
         }), 500
 
 
-@user_bp.route('/<user_id>', methods=['PUT'])
+@user_bp.route('/<uuid:user_id>', methods=['PUT'])
+@query_budget(2)
 @role_required('manager')
 @swag_from(update_user_spec)
 def update_user(user_id):
@@ -146,7 +162,8 @@ def update_user(user_id):
         }), 500
 
 
-@user_bp.route('/<user_id>', methods=['PATCH'])
+@user_bp.route('/<uuid:user_id>', methods=['PATCH'])
+@query_budget(3)
 @role_required('manager')
 def partial_update_user(user_id):
     """Partially update user (only provided fields)"""
@@ -177,7 +194,8 @@ def partial_update_user(user_id):
         }), 500
 
 
-@user_bp.route('/<user_id>', methods=['DELETE'])
+@user_bp.route('/<uuid:user_id>', methods=['DELETE'])
+@query_budget(3)
 @role_required('manager')
 @swag_from(delete_user_spec)
 def delete_user(user_id):
@@ -207,7 +225,8 @@ def delete_user(user_id):
 
 # ========== CHECK-IN SUB-RESOURCE ==========
 
-@user_bp.route('/<user_id>/checkins', methods=['GET'])
+@user_bp.route('/<uuid:user_id>/checkins', methods=['GET'])
+@query_budget(1)
 @authentication_required()
 @swag_from(get_user_checkins_spec)
 def get_user_checkins(user_id):
@@ -220,11 +239,11 @@ def get_user_checkins(user_id):
                 'message': 'Unauthorized'
             }), 403
         
-        checkins = CheckIn.query.filter_by(user_id=user_id).order_by(CheckIn.check_in_time.desc()).all()
+        checkins = CHECKIN.fetch(CheckIn.query.filter_by(user_id=user_id).order_by(CheckIn.check_in_time.desc()))
         
         return jsonify({
             'success': True,
-            'data': [checkin.to_dict() for checkin in checkins]
+            'data': [serialize_checkin(checkin) for checkin in checkins]
         }), 200
     except Exception as e:
         return jsonify({
@@ -234,7 +253,8 @@ def get_user_checkins(user_id):
         }), 500
 
 
-@user_bp.route('/<user_id>/checkins', methods=['POST'])
+@user_bp.route('/<uuid:user_id>/checkins', methods=['POST'])
+@query_budget(3)
 @authentication_required()
 @swag_from(create_checkin_spec)
 def create_checkin(user_id):
@@ -283,7 +303,8 @@ def create_checkin(user_id):
         }), 500
 
 
-@user_bp.route('/<user_id>/checkins/current', methods=['GET'])
+@user_bp.route('/<uuid:user_id>/checkins/current', methods=['GET'])
+@query_budget(1)
 @authentication_required()
 @swag_from(get_current_checkin_spec)
 def get_current_checkin(user_id):
@@ -319,7 +340,8 @@ def get_current_checkin(user_id):
         }), 500
 
 
-@user_bp.route('/<user_id>/checkins/<checkin_id>', methods=['GET'])
+@user_bp.route('/<uuid:user_id>/checkins/<uuid:checkin_id>', methods=['GET'])
+@query_budget(1)
 @authentication_required()
 def get_checkin(user_id, checkin_id):
     """Get specific check-in by ID"""
@@ -354,7 +376,8 @@ def get_checkin(user_id, checkin_id):
         }), 500
 
 
-@user_bp.route('/<user_id>/checkins/<checkin_id>', methods=['PUT'])
+@user_bp.route('/<uuid:user_id>/checkins/<uuid:checkin_id>', methods=['PUT'])
+@query_budget(3)
 @authentication_required()
 @swag_from(update_checkin_spec)
 def update_checkin(user_id, checkin_id):
@@ -402,7 +425,8 @@ def update_checkin(user_id, checkin_id):
         }), 500
 
 
-@user_bp.route('/<user_id>/checkins/<checkin_id>', methods=['DELETE'])
+@user_bp.route('/<uuid:user_id>/checkins/<uuid:checkin_id>', methods=['DELETE'])
+@query_budget(2)
 @role_required('manager')
 @swag_from(delete_checkin_spec)
 def delete_checkin(user_id, checkin_id):
@@ -434,7 +458,9 @@ def delete_checkin(user_id, checkin_id):
             'error': str(e)
         }), 500
 
-@user_bp.route('/<user_id>/password', methods=['PUT'])
+@user_bp.route('/me/password', methods=['PUT'], defaults={'user_id': 'me'})
+@user_bp.route('/<uuid:user_id>/password', methods=['PUT'])
+@query_budget(3)
 @authentication_required()
 @swag_from(update_password_spec)
 def update_user_password(user_id):
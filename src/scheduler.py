@@ -0,0 +1,165 @@
+"""
+Kitchen queue model used to estimate order completion times.
+
+The kitchen is a set of parallel stations, each preparing one unit of an
+order item at a time, first come first served. A min-heap keeps the time at
+which every station becomes free, so scheduling an order of k units costs
+O(k log stations): each unit goes to the station that frees up first.
+
+The heap is built from the items still 'preparing' in the database on the
+first order of a worker, then rebuilt in a background thread once it is
+older than KITCHEN_SCHEDULER_REFRESH seconds, which picks up items completed
+in the meantime and orders created by other gunicorn workers. Orders keep
+being scheduled on the current heap while it is rebuilt. In between,
+orders created by this worker are added incrementally: an order's ETA is
+computed on a copy of the heap kept for the current transaction, and its
+items are only queued on the shared heap once the transaction commits, so
+that orders rolled back (or not inserted) do not delay the others.
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from models import db, OrderItem, MenuItem, italy_now
+
+DEFAULT_PREPARATION_TIME = 15
+
+
+class KitchenScheduler:
+    """Earliest-free-station list scheduling of order items"""
+
+    def __init__(self, stations=4, refresh_interval=30):
+        self.stations = stations
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._free_at = None
+        self._built_at = None
+        self._refreshing = False
+
+    def rebuild(self):
+        """Rebuild the station heap from the items currently being prepared"""
+        rows = db.session.query(
+            OrderItem.created_at, OrderItem.quantity, MenuItem.preparation_time
+        ).join(
+            MenuItem, OrderItem.menu_item_id == MenuItem.id
+        ).filter(
+            OrderItem.status == 'preparing'
+        ).order_by(OrderItem.created_at).all()
+
+        # Replay the queue from the oldest item still being prepared
+        now = italy_now()
+        free_at = [datetime.min] * self.stations
+        for created_at, quantity, preparation_time in rows:
+            self._queue(free_at, created_at or now, preparation_time, quantity)
+        # Items past their expected time are assumed to be about to finish
+        free_at = [max(free, now) for free in free_at]
+        heapq.heapify(free_at)
+
+        with self._lock:
+            self._free_at = free_at
+            self._built_at = time.monotonic()
+
+    def schedule(self, items, now=None, key=None):
+        """Estimated completion time of a new order placed at `now`, from the
+        (preparation_time, quantity) of its items
+
+        The items are queued on the shared heap when the current transaction
+        commits; cancel(keys) drops the orders of the transaction that were
+        not written after all.
+        """
+        if self._built_at is None:
+            self.rebuild()
+        elif time.monotonic() - self._built_at > self.refresh_interval:
+            self._refresh_in_background()
+
+        now = now or italy_now()
+        session = db.session()
+        if session.get_transaction() is None:
+            # The reservation lives until the transaction's commit or rollback
+            session.begin()
+        # Orders of the same transaction queue behind each other
+        owner, free_at = session.info.get('kitchen_heap', (None, None))
+        if owner is not self:
+            with self._lock:
+                free_at = list(self._free_at)
+            session.info['kitchen_heap'] = (self, free_at)
+        completion_time = now
+        for preparation_time, quantity in items:
+            completion_time = max(completion_time, self._queue(free_at, now, preparation_time, quantity))
+        session.info.setdefault('kitchen_reservations', []).append((self, key, now, items))
+        return completion_time
+
+    def cancel(self, keys):
+        """Drop the pending reservations of the orders `keys` of the current transaction"""
+        keys = set(keys)
+        reservations = db.session().info.get('kitchen_reservations', [])
+        reservations[:] = [reservation for reservation in reservations if reservation[1] not in keys]
+
+    def commit_reservations(self, reservations):
+        """Queue the items of committed orders on the shared heap"""
+        with self._lock:
+            for now, items in reservations:
+                for preparation_time, quantity in items:
+                    self._queue(self._free_at, now, preparation_time, quantity)
+
+    @staticmethod
+    def _queue(free_at, now, preparation_time, quantity):
+        """Queue quantity units on the station heap; returns when the last one is ready"""
+        if preparation_time is None:
+            preparation_time = DEFAULT_PREPARATION_TIME
+        finish = now
+        for _ in range(quantity or 1):
+            finish = max(free_at[0], now) + timedelta(minutes=preparation_time)
+            heapq.heapreplace(free_at, finish)
+        return finish
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self.rebuild()
+            except Exception as e:
+                print(f"[SCHEDULER] Kitchen queue rebuild failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh, name='kitchen-scheduler-refresh', daemon=True).start()
+
+
+@event.listens_for(db.session, 'after_commit')
+def _commit_kitchen_reservations(session):
+    session.info.pop('kitchen_heap', None)
+    reservations = {}
+    for scheduler, key, now, items in session.info.pop('kitchen_reservations', []):
+        reservations.setdefault(scheduler, []).append((now, items))
+    for scheduler, scheduled in reservations.items():
+        scheduler.commit_reservations(scheduled)
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_kitchen_reservations(session, previous_transaction):
+    session.info.pop('kitchen_heap', None)
+    session.info.pop('kitchen_reservations', None)
+
+
+def init_scheduler(app):
+    """Create the kitchen scheduler configured by KITCHEN_STATIONS"""
+    scheduler = KitchenScheduler(
+        app.config['KITCHEN_STATIONS'],
+        app.config['KITCHEN_SCHEDULER_REFRESH']
+    )
+    app.extensions['kitchen_scheduler'] = scheduler
+    return scheduler
+
+
+def get_kitchen_scheduler():
+    return current_app.extensions['kitchen_scheduler']
@@ -0,0 +1,57 @@
+"""
+Ranked text search over menu items and products.
+
+Two index-backed matches are combined:
+- full-text: the generated search_vector column (Italian stemming, name
+  weighted above description) matched with websearch_to_tsquery, so
+  "pizze" finds "Pizza" and quoted phrases / -exclusions work
+- trigram: word_similarity between the query and the name (pg_trgm), so
+  typos and partial words ("margheritta", "marg") still match
+
+Both conditions are served by GIN indexes and results are ranked by the
+better of the two scores.
+"""
+from flask import current_app
+from sqlalchemy import func, or_
+from models import db
+
+SEARCH_CONFIG = 'italian'
+MIN_QUERY_LENGTH = 2
+
+
+def parse_search_params(args):
+    """Return (terms, limit) from the q and limit query parameters
+
+    Raises ValueError when q is missing or too short or limit is out of range.
+    """
+    terms = (args.get('q') or '').strip()
+    if len(terms) < MIN_QUERY_LENGTH:
+        raise ValueError(f"q must be at least {MIN_QUERY_LENGTH} characters long")
+
+    limit = args.get('limit')
+    if limit is None:
+        return terms, current_app.config['SEARCH_LIMIT']
+    limit = int(limit)
+    if not 1 <= limit <= current_app.config['SEARCH_MAX_LIMIT']:
+        raise ValueError(f"limit out of range: {limit}")
+    return terms, limit
+
+
+def ranked_search(model, terms, columns=None):
+    """Query of (model instance, score) rows matching terms, best matches first
+
+    With `columns`, rows hold those columns followed by the score instead.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, terms)
+    score = func.greatest(
+        func.ts_rank_cd(model.search_vector, tsquery),
+        func.word_similarity(terms, model.name)
+    )
+    entities = columns or (model,)
+    return db.session.query(*entities, score.label('score')).filter(
+        or_(
+            model.search_vector.op('@@')(tsquery),
+            # terms <% name, written with the indexed column on the left
+            model.name.op('%>')(terms)
+        )
+    ).order_by(score.desc(), model.name)
@@ -0,0 +1,138 @@
+"""
+Precompiled row serializers shared by the routes and the models' to_dict.
+
+Each serializer is generated once at import from a field list: its source
+is a single function that reads every attribute into a local and returns
+one dict literal, with the conversion of each field written inline. There
+is no per-field dispatch or per-row loop over field objects as in
+marshmallow's dump, and the output is the same: keys in the same order,
+None kept as None, Decimals as floats and datetimes as ISO 8601 strings.
+
+The golden tests in tests/test_serializers.py pin the wire format.
+"""
+
+# Expression templates by field kind, {v} being the attribute value
+KINDS = {
+    'raw': '{v}',
+    'str': 'None if {v} is None else str({v})',
+    'int': 'None if {v} is None else int({v})',
+    'float': 'None if {v} is None else float({v})',
+    'float_or_zero': 'float({v}) if {v} else 0',
+    'datetime': '{v}.isoformat() if {v} else None',
+    'list_or_empty': '{v} or []',
+    'dict_or_empty': '{v} or {{}}',
+}
+
+
+def nested_many(serializer):
+    """Field kind serializing a list of related rows with serializer"""
+    return ('nested', serializer)
+
+
+def compile_serializer(name, fields):
+    """Build `name(obj) -> dict` from (attribute, kind) pairs
+
+    The generated source is kept in the function's `source` attribute, the
+    field list in `fields` and the attribute names it reads in `attributes`.
+    """
+    namespace = {}
+    lines = [f"def {name}(obj):"]
+    entries = []
+    for i, (attribute, kind) in enumerate(fields):
+        value = f"v{i}"
+        lines.append(f"    {value} = obj.{attribute}")
+        if isinstance(kind, tuple):
+            nested = f"_nested{i}"
+            namespace[nested] = kind[1]
+            expression = f"None if {value} is None else [{nested}(row) for row in {value}]"
+        else:
+            expression = KINDS[kind].format(v=value)
+        entries.append(f"        {attribute!r}: {expression},")
+    lines.append("    return {")
+    lines.extend(entries)
+    lines.append("    }")
+
+    source = '\n'.join(lines) + '\n'
+    exec(compile(source, f"<serializer {name}>", 'exec'), namespace)
+    function = namespace[name]
+    function.source = source
+    function.fields = tuple(fields)
+    function.attributes = tuple(attribute for attribute, kind in fields)
+    return function
+
+
+serialize_user = compile_serializer('serialize_user', [
+    ('id', 'raw'),
+    ('username', 'raw'),
+    ('email', 'raw'),
+    ('role', 'raw'),
+    ('full_name', 'raw'),
+    ('is_active', 'raw'),
+    ('created_at', 'datetime'),
+    ('last_login', 'datetime'),
+])
+
+serialize_checkin = compile_serializer('serialize_checkin', [
+    ('id', 'raw'),
+    ('user_id', 'raw'),
+    ('check_in_time', 'datetime'),
+    ('check_out_time', 'datetime'),
+])
+
+serialize_menu_item = compile_serializer('serialize_menu_item', [
+    ('id', 'raw'),
+    ('name', 'raw'),
+    ('description', 'raw'),
+    ('price', 'float_or_zero'),
+    ('category', 'raw'),
+    ('is_available', 'raw'),
+    ('preparation_time', 'raw'),
+    ('allergens', 'list_or_empty'),
+    ('nutritional_info', 'dict_or_empty'),
+    ('created_at', 'datetime'),
+    ('updated_at', 'datetime'),
+])
+
+serialize_order_item = compile_serializer('serialize_order_item', [
+    ('id', 'str'),
+    ('menu_item_id', 'str'),
+    ('menu_item_name', 'str'),
+    ('quantity', 'int'),
+    ('unit_price', 'float'),
+    ('total_price', 'float'),
+    ('special_instructions', 'str'),
+    ('status', 'str'),
+    ('created_at', 'datetime'),
+    ('updated_at', 'datetime'),
+])
+
+serialize_order = compile_serializer('serialize_order', [
+    ('id', 'str'),
+    ('order_number', 'str'),
+    ('table_number', 'int'),
+    ('customer_name', 'str'),
+    ('order_type', 'str'),
+    ('status', 'str'),
+    ('total_amount', 'float'),
+    ('tax_amount', 'float'),
+    ('discount_amount', 'float'),
+    ('final_amount', 'float'),
+    ('special_instructions', 'str'),
+    ('estimated_completion_time', 'datetime'),
+    ('items', nested_many(serialize_order_item)),
+    ('created_at', 'datetime'),
+    ('updated_at', 'datetime'),
+])
+
+serialize_product = compile_serializer('serialize_product', [
+    ('id', 'str'),
+    ('ean', 'str'),
+    ('name', 'str'),
+    ('description', 'str'),
+    ('price', 'float'),
+    ('quantity', 'int'),
+    ('category', 'str'),
+    ('image_url', 'str'),
+    ('created_at', 'datetime'),
+    ('updated_at', 'datetime'),
+])
@@ -0,0 +1,165 @@
+"""
+Slow-query log with sampled query plans.
+
+Every SQL statement slower than SLOW_QUERY_THRESHOLD milliseconds is
+printed and kept, with its bound parameters and the endpoint that issued
+it, in a ring buffer of the last SLOW_QUERY_LOG_SIZE entries of the worker
+(GET /api/diagnostics/slow-queries, managers only).
+
+A slow statement is also explained, at most once every
+SLOW_QUERY_EXPLAIN_INTERVAL seconds per worker. A read-only SELECT is run
+again under EXPLAIN (ANALYZE, BUFFERS) to capture its actual plan, so the
+request that hit it pays for it twice. Any other statement only gets its
+estimated plan (plain EXPLAIN, which does not execute it). ANALYZE would
+apply writes again, and it would repeat the side effects of a SELECT
+that locks rows (FOR UPDATE/SHARE) or calls nextval(), pg_notify() or
+advisory locks. Those effects are not all undone by a rollback.
+
+The EXPLAIN runs on the same connection, inside the request's transaction
+(same snapshot, same locks), within a savepoint rolled back afterwards.
+A failure therefore leaves the transaction usable.
+"""
+import re
+import threading
+import time
+from collections import deque
+from flask import request, current_app, has_request_context
+from sqlalchemy import event
+from models import db, italy_now
+
+# Bound parameters not to be shown, matched on the parameter name
+MASKED_PARAMETERS = ('password',)
+
+# Statements EXPLAIN accepts; only read-only SELECTs are run with ANALYZE
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+# A SELECT that locks rows or calls a function with side effects
+NOT_READ_ONLY = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+)?UPDATE\b|\bFOR\s+(?:KEY\s+)?SHARE\b"
+    r"|\b(?:nextval|setval|pg_notify|pg_(?:try_)?advisory\w*|txid_current|pg_current_xact_id|pg_sleep)\s*\(",
+    re.IGNORECASE
+)
+
+
+def loggable(value):
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def loggable_parameters(parameters):
+    """Bound parameters as JSON-friendly values, passwords masked"""
+    if isinstance(parameters, dict):
+        return {
+            name: '***' if any(masked in name for masked in MASKED_PARAMETERS) else loggable(value)
+            for name, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [loggable(value) for value in parameters]
+    return loggable(parameters)
+
+
+def is_read_only_select(statement):
+    return statement.lstrip().upper().startswith('SELECT') and not NOT_READ_ONLY.search(statement)
+
+
+def explain(cursor, statement, parameters):
+    """Query plan of a statement (actual for read-only SELECTs, else estimated), or the error"""
+    command = 'EXPLAIN (ANALYZE, BUFFERS) ' if is_read_only_select(statement) else 'EXPLAIN '
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute('SAVEPOINT slow_query_explain')
+        try:
+            explain_cursor.execute(command + statement, parameters)
+            return '\n'.join(row[0] for row in explain_cursor.fetchall())
+        finally:
+            # Undo whatever the statement did when run again
+            explain_cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            explain_cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        explain_cursor.close()
+
+
+class SlowQueryLog:
+    """Ring buffer of the slow statements of this worker"""
+
+    def __init__(self, threshold, size, explain_interval):
+        # threshold in milliseconds, explain_interval in seconds (0: no EXPLAIN)
+        self.threshold = threshold
+        self.explain_interval = explain_interval
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+        self._next_explain = 0.0
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = (time.perf_counter() - conn.info['slow_query_start'].pop()) * 1000
+        if duration < self.threshold:
+            return
+
+        plan = None
+        if (
+            not executemany
+            and conn.dialect.name == 'postgresql'
+            and statement.lstrip().upper().startswith(EXPLAINABLE)
+            and self._take_explain_slot()
+        ):
+            plan = explain(cursor, statement, parameters)
+
+        if has_request_context():
+            endpoint, method, path = request.endpoint, request.method, request.path
+        else:
+            endpoint = method = path = None
+        entry = {
+            'time': italy_now().isoformat(),
+            'duration_ms': round(duration, 1),
+            'endpoint': endpoint,
+            'method': method,
+            'path': path,
+            'statement': statement,
+            'parameters': (
+                f"{len(parameters)} parameter sets" if executemany else loggable_parameters(parameters)
+            ),
+            'explain': plan
+        }
+        with self._lock:
+            self._entries.append(entry)
+        print(f"[SLOW QUERY] {duration:.0f} ms in {endpoint or 'background task'}: "
+              f"{' '.join(statement.split())[:300]} {entry['parameters']}")
+
+    def _take_explain_slot(self):
+        if not self.explain_interval:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_explain:
+                return False
+            self._next_explain = now + self.explain_interval
+            return True
+
+    def entries(self):
+        """Logged statements, most recent first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+
+def init_slow_query_log(app):
+    """Create the slow-query log configured by the SLOW_QUERY_* settings"""
+    log = SlowQueryLog(
+        app.config['SLOW_QUERY_THRESHOLD'],
+        app.config['SLOW_QUERY_LOG_SIZE'],
+        app.config['SLOW_QUERY_EXPLAIN_INTERVAL']
+    )
+    app.extensions['slow_queries'] = log
+    if app.config['SLOW_QUERY_LOG_ENABLED']:
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', log.before_cursor_execute)
+            event.listen(db.engine, 'after_cursor_execute', log.after_cursor_execute)
+    return log
+
+
+def get_slow_query_log():
+    return current_app.extensions['slow_queries']
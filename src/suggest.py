@@ -0,0 +1,140 @@
+"""
+Search-as-you-type suggestions for menu item names.
+
+Each worker keeps the names of the available menu items in a sorted array
+with one key per word start ("pizza margherita" and "margherita"), so a
+prefix lookup is a bisect plus a short scan and never touches Postgres.
+Keys are lowercased and stripped of accents: "tiramisu" finds "Tiramisù".
+
+The index is replaced as a whole on every change (copy-on-write), so
+lookups read it without locking. Menu writes made by this worker are
+applied incrementally after their commit; writes made by other workers are
+picked up by comparing the 'menu' cache version, checked at most every
+MENU_SUGGEST_MAX_AGE seconds.
+"""
+import bisect
+import threading
+import time
+import unicodedata
+from flask import current_app
+from cache import get_version
+from models import db, MenuItem
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def name_keys(item_id, name):
+    """Index keys of a name: the name from each of its word starts"""
+    words = normalize(name).split(' ')
+    return [(' '.join(words[i:]), item_id) for i in range(len(words)) if words[i]]
+
+
+class PrefixIndex:
+    """Immutable sorted array of (key, id) searched with bisect"""
+    __slots__ = ('names', 'keys')
+
+    def __init__(self, names, keys=None):
+        self.names = names
+        if keys is None:
+            keys = sorted(key for item_id, name in names.items() for key in name_keys(item_id, name))
+        self.keys = keys
+
+    def search(self, prefix, limit):
+        """Return up to limit {id, name} dicts whose name has a word starting with prefix"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        for i in range(bisect.bisect_left(self.keys, (prefix,)), len(self.keys)):
+            key, item_id = self.keys[i]
+            if not key.startswith(prefix):
+                break
+            if item_id not in seen:
+                seen.add(item_id)
+                results.append({'id': item_id, 'name': self.names[item_id]})
+                if len(results) == limit:
+                    break
+        return results
+
+    def without(self, item_id):
+        """Copy of the index without item_id"""
+        if item_id not in self.names:
+            return self
+        names = {key: value for key, value in self.names.items() if key != item_id}
+        keys = [entry for entry in self.keys if entry[1] != item_id]
+        return PrefixIndex(names, keys)
+
+    def with_item(self, item_id, name):
+        """Copy of the index with item_id named name (added or renamed)"""
+        index = self.without(item_id)
+        names = dict(index.names)
+        names[item_id] = name
+        keys = list(index.keys)
+        for entry in name_keys(item_id, name):
+            bisect.insort(keys, entry)
+        return PrefixIndex(names, keys)
+
+
+class MenuSuggestions:
+    """Per-worker prefix index over the names of available menu items"""
+
+    def __init__(self, max_age=5):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._index = PrefixIndex({})
+        self._version = None
+        self._checked_at = None
+
+    def rebuild(self):
+        """Reload the index from the database"""
+        # Read the version before the data, as VersionedCache does
+        version = get_version('menu')
+        rows = db.session.query(MenuItem.id, MenuItem.name).filter(MenuItem.is_available == True).all()
+        index = PrefixIndex({row.id: row.name for row in rows})
+        with self._lock:
+            self._index = index
+            self._version = version
+            self._checked_at = time.monotonic()
+
+    def suggest(self, prefix, limit):
+        """Names of available menu items matching prefix, in key order"""
+        if self._checked_at is None or time.monotonic() - self._checked_at > self.max_age:
+            if get_version('menu') != self._version:
+                self.rebuild()
+            else:
+                self._checked_at = time.monotonic()
+        return self._index.search(prefix, limit)
+
+    def apply(self, version, item_id, name=None, is_available=False):
+        """Apply a committed menu write that bumped the 'menu' version to version
+
+        The item is dropped unless it is available. When the index is not at
+        the previous version (another worker wrote in between) it is marked
+        stale and rebuilt on the next lookup instead.
+        """
+        with self._lock:
+            if self._version != version - 1:
+                self._checked_at = None
+                return
+            if is_available:
+                self._index = self._index.with_item(item_id, name)
+            else:
+                self._index = self._index.without(item_id)
+            self._version = version
+
+
+def init_suggestions(app):
+    """Create the menu suggestion index configured by MENU_SUGGEST_MAX_AGE"""
+    suggestions = MenuSuggestions(app.config['MENU_SUGGEST_MAX_AGE'])
+    app.extensions['menu_suggestions'] = suggestions
+    return suggestions
+
+
+def get_menu_suggestions():
+    return current_app.extensions['menu_suggestions']
@@ -48,6 +48,10 @@ swagger_template = {
         {
             "name": "Inventory",
             "description": "Product inventory management"
+        },
+        {
+            "name": "Diagnostics",
+            "description": "Runtime statistics for managers"
         }
     ]
 }
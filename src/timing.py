@@ -0,0 +1,106 @@
+"""
+Per-request phase timers, reported in the Server-Timing header.
+
+With SERVER_TIMING_ENABLED every response carries e.g.
+
+    Server-Timing: auth;dur=0.4, db;dur=3.1;desc="2 queries", ser;dur=1.2, app;dur=2.0, total;dur=6.7
+
+in milliseconds, so a slow request seen from a tablet's dev tools or
+curl -v tells whether the time went into JWT verification (auth), SQL
+statements (db), turning rows into dicts and JSON (ser) or the rest of the
+view (app). total runs from the first before_request hook to the last
+after_request hook, compression included. For streamed responses the
+header is sent before the body: only the work done until then is counted.
+
+When disabled, no hook is registered and the timers reduce to a lookup
+in flask.g.
+
+SQL statements are counted and timed with SQLAlchemy engine events for
+every request (g.db_statements and g.db_time), for this header and for
+the Prometheus metrics.
+"""
+import time
+from contextlib import contextmanager
+from flask import g, has_request_context
+from sqlalchemy import event
+from models import db
+
+
+def add_time(phase, seconds):
+    """Add seconds to a phase of the current request (no-op when timing is off)"""
+    timings = g.get('server_timing')
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase):
+    """Time the enclosed block as part of phase"""
+    if g.get('server_timing') is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(phase, time.perf_counter() - start)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context():
+        g.db_statements = g.get('db_statements', 0) + 1
+        g.db_time = g.get('db_time', 0.0) + elapsed
+
+
+def track_statements(app):
+    """Count and time the SQL statements of each request (once per app)"""
+    if app.extensions.get('statement_tracking'):
+        return
+    app.extensions['statement_tracking'] = True
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+
+def format_server_timing(timings, db_statements, db_time, total):
+    """Server-Timing header value, durations in milliseconds"""
+    auth = timings.get('auth', 0.0)
+    ser = timings.get('ser', 0.0)
+    return ', '.join([
+        f"auth;dur={auth * 1000:.1f}",
+        f'db;dur={db_time * 1000:.1f};desc="{db_statements} queries"',
+        f"ser;dur={ser * 1000:.1f}",
+        f"app;dur={max(total - auth - db_time - ser, 0.0) * 1000:.1f}",
+        f"total;dur={total * 1000:.1f}",
+    ])
+
+
+def init_server_timing(app):
+    """Register the Server-Timing hooks when SERVER_TIMING_ENABLED
+
+    Register it before the other after_request hooks: hooks run in reverse
+    order, so total then includes them.
+    """
+    if not app.config['SERVER_TIMING_ENABLED']:
+        return
+    track_statements(app)
+
+    @app.before_request
+    def start_server_timing():
+        g.server_timing = {}
+        g.server_timing_start = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing_header(response):
+        start = g.get('server_timing_start')
+        if start is not None:
+            response.headers['Server-Timing'] = format_server_timing(
+                g.server_timing, g.get('db_statements', 0), g.get('db_time', 0.0),
+                time.perf_counter() - start
+            )
+        return response
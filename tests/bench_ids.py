@@ -0,0 +1,59 @@
+"""
+Benchmark random (uuid4) against time-ordered (uuid7) primary keys
+Inserts the same number of rows into two scratch tables, committing in small
+batches like the order endpoints do, and compares insert throughput and the
+size of the primary key index.
+Run with: python tests/bench_ids.py [rows]
+"""
+import sys
+import time
+import uuid
+from pathlib import Path
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from config import Config
+from models import uuid7
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+BATCH_SIZE = 500
+
+GENERATORS = {
+    'uuid4': lambda: str(uuid.uuid4()),
+    'uuid7': uuid7,
+}
+
+
+def run(engine, name, generate_id):
+    table = f"bench_ids_{name}"
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        connection.execute(text(f"CREATE TABLE {table} (id uuid PRIMARY KEY, created_at timestamp NOT NULL DEFAULT now(), payload text)"))
+
+    insert = text(f"INSERT INTO {table} (id, payload) VALUES (:id, :payload)")
+    start = time.perf_counter()
+    for offset in range(0, ROWS, BATCH_SIZE):
+        rows = [{'id': generate_id(), 'payload': 'x' * 40} for _ in range(min(BATCH_SIZE, ROWS - offset))]
+        with engine.begin() as connection:
+            connection.execute(insert, rows)
+    elapsed = time.perf_counter() - start
+
+    with engine.begin() as connection:
+        index_size = connection.execute(text(f"SELECT pg_relation_size('{table}_pkey')")).scalar()
+        connection.execute(text(f"DROP TABLE {table}"))
+
+    return elapsed, index_size
+
+
+def main():
+    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+    print(f"Inserting {ROWS} rows in batches of {BATCH_SIZE}\n")
+    print(f"{'generator':<10} {'seconds':>8} {'rows/s':>10} {'pkey size':>12}")
+    for name, generate_id in GENERATORS.items():
+        elapsed, index_size = run(engine, name, generate_id)
+        print(f"{name:<10} {elapsed:>8.2f} {ROWS / elapsed:>10.0f} {index_size / 1024 / 1024:>10.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark the JSON provider on a large orders listing
+Encodes 10k orders, cycling the sample orders of tests/test_serializers.py
+through serialize_order as GET /api/orders/ does, with Flask's default
+provider and with the orjson provider the app uses, through the same
+jsonify() path the endpoints take. A second payload keeps the stored
+datetimes and Decimals as Python objects.
+Run with: python tests/bench_json.py [orders]
+"""
+import sys
+import time
+from pathlib import Path
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from json_provider import OrJSONProvider
+from serializers import serialize_order
+from test_serializers import build_rows
+
+ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+ROUNDS = 5
+
+
+def keep_types(row, serialized):
+    """The serialized fields with the column values as stored (datetimes, Decimals)"""
+    data = {key: getattr(row, key) for key in serialized if key != 'items'}
+    if 'items' in serialized:
+        data['items'] = [keep_types(item, dumped) for item, dumped in zip(row.items, serialized['items'])]
+    return data
+
+
+def bench(provider_class, payload):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    with app.app_context():
+        best = float('inf')
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            response = jsonify({'success': True, 'data': payload, 'count': len(payload)})
+            best = min(best, time.perf_counter() - start)
+    return best, len(response.get_data())
+
+
+def main():
+    orders = build_rows()['orders']
+    serialized = [serialize_order(order) for order in orders]
+    native = [keep_types(order, dumped) for order, dumped in zip(orders, serialized)]
+    payloads = {
+        'serialized': [serialized[i % len(orders)] for i in range(ORDERS)],
+        'native types': [native[i % len(orders)] for i in range(ORDERS)],
+    }
+    print(f"Encoding {ORDERS} orders, best of {ROUNDS}\n")
+    print(f"{'payload':<14} {'provider':<10} {'ms':>9} {'bytes':>12}")
+    for name, payload in payloads.items():
+        results = {}
+        for label, provider_class in (('stdlib', DefaultJSONProvider), ('orjson', OrJSONProvider)):
+            elapsed, size = bench(provider_class, payload)
+            results[label] = elapsed
+            print(f"{name:<14} {label:<10} {elapsed * 1000:>9.1f} {size:>12}")
+        print(f"{'':<14} {'speedup':<10} {results['stdlib'] / results['orjson']:>9.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark the precompiled serializers against marshmallow dump
+Serializes the same orders (with their items) and products with the schemas
+the routes used before and with the generated serializers.
+Run with: python tests/bench_serializers.py [rows]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from routes.orders import OrderSchema
+from routes.inventory import ProductSchema
+from serializers import serialize_order, serialize_product
+from test_serializers import build_rows
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+ROUNDS = 5
+
+
+def best_of(function, rows):
+    best = float('inf')
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        function(rows)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    samples = build_rows()
+    cases = {
+        'orders': (samples['orders'], OrderSchema(many=True), serialize_order),
+        'products': (samples['products'], ProductSchema(many=True), serialize_product),
+    }
+    print(f"Serializing {ROWS} rows, best of {ROUNDS}\n")
+    print(f"{'rows':<10} {'marshmallow ms':>15} {'compiled ms':>12} {'speedup':>8}")
+    for name, (sample, schema, serialize) in cases.items():
+        rows = [sample[i % len(sample)] for i in range(ROWS)]
+        before = best_of(schema.dump, rows)
+        after = best_of(lambda rows: [serialize(row) for row in rows], rows)
+        print(f"{name:<10} {before * 1000:>15.1f} {after * 1000:>12.1f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
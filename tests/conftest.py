@@ -0,0 +1,116 @@
+"""
+pytest fixtures for the API tests in test_apis.py
+test_apis.py also runs as a script (python tests/test_apis.py). Under pytest
+its test functions run against the server at BASE_URL, with the fixtures
+below providing the tokens and data main() passes them, and a test fails
+when it logs a [FAIL]. The API tests are skipped when no server answers.
+
+Every request of the API tests is checked against the server's SQL
+statement budgets (src/query_budget.py): with QUERY_BUDGET_MODE=log or
+raise on the server (log by default in development), budgeted endpoints
+answer with X-Query-Budget: <statements>/<budget>, and a test fails when
+one of its requests went over budget.
+Run with: python -m pytest tests/test_apis.py
+"""
+import os
+from datetime import datetime
+import pytest
+import requests
+import test_apis
+from test_apis import BASE_URL, HEADERS, login_user
+
+
+@pytest.fixture(scope='session')
+def api_server():
+    try:
+        available = requests.get(f"{BASE_URL}/health", timeout=5).status_code == 200
+    except requests.RequestException:
+        available = False
+    if not available:
+        pytest.skip(f"No API server at {BASE_URL}")
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request, monkeypatch):
+    """Fail the test when one of its requests exceeded its SQL statement budget"""
+    if request.module is not test_apis:
+        yield
+        return
+    request.getfixturevalue('api_server')
+
+    exceeded = []
+    send = requests.Session.send
+
+    def checked_send(session, prepared, **kwargs):
+        response = send(session, prepared, **kwargs)
+        budget = response.headers.get('X-Query-Budget')
+        if budget:
+            statements, limit = (int(n) for n in budget.split('/'))
+            if statements > limit:
+                exceeded.append(f"{prepared.method} {prepared.path_url}: {statements} SQL statements, budget {limit}")
+        return response
+
+    monkeypatch.setattr(requests.Session, 'send', checked_send)
+    failed = test_apis.stats['failed']
+    yield
+    assert not exceeded, "Query budget exceeded:\n" + "\n".join(exceeded)
+    assert test_apis.stats['failed'] == failed, f"{test_apis.stats['failed'] - failed} API checks failed, see [FAIL] above"
+
+
+@pytest.fixture(scope='session')
+def token(api_server):
+    """Manager access token"""
+    token = login_user("manager", os.getenv('MANAGER_PASSWORD', 'changemeplease!'))
+    if not token:
+        pytest.fail("Manager login failed")
+    return token
+
+
+@pytest.fixture(scope='session')
+def manager_token(token):
+    return token
+
+
+@pytest.fixture(scope='session')
+def waiter(token):
+    """(user_id, access token) of a waiter created for the session"""
+    suffix = datetime.now().strftime('%H%M%S%f')
+    user_data = {
+        "username": f"pytest_waiter_{suffix}",
+        "email": f"pytest_waiter_{suffix}@test.com",
+        "password": "TestPass123!",
+        "full_name": "Pytest Waiter",
+        "role": "waiter"
+    }
+    auth_headers = {**HEADERS, "Authorization": f"Bearer {token}"}
+    response = requests.post(f"{BASE_URL}/api/auth/register", headers=auth_headers, json=user_data)
+    if response.status_code != 201:
+        pytest.fail(f"Waiter creation failed - Status: {response.status_code}, Response: {response.text}")
+    user_id = response.json()['user']['id']
+    yield user_id, login_user(user_data['username'], user_data['password'])
+    requests.delete(f"{BASE_URL}/api/users/{user_id}", headers=auth_headers)
+
+
+@pytest.fixture(scope='session')
+def user_id(waiter):
+    return waiter[0]
+
+
+@pytest.fixture(scope='session')
+def user_token(waiter):
+    return waiter[1]
+
+
+@pytest.fixture(scope='session')
+def order_data(api_server):
+    """Order payload for an available menu item"""
+    response = requests.get(f"{BASE_URL}/api/menu/available", headers=HEADERS)
+    items = response.json().get('data', []) if response.status_code == 200 else []
+    if not items:
+        pytest.skip("No available menu item to order")
+    return {
+        "table_number": 5,
+        "customer_name": "Test Customer",
+        "order_type": "dine_in",
+        "items": [{"menu_item_id": items[0]['id'], "quantity": 2}]
+    }
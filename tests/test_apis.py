@@ -7,7 +7,9 @@ Tests all endpoints with proper authentication and authorization
 import requests
 import json
 import sys
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
 import os
 from dotenv import load_dotenv
 from pathlib import Path
@@ -153,6 +155,25 @@ def test_authentication():
     
     return token
 
+def wait_for_suggestion(prefix, item_id, present, timeout=8):
+    """Poll /api/menu/suggest until every worker agrees on whether item_id is suggested"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            responses = [requests.get(f"{BASE_URL}/api/menu/suggest", params={"q": prefix}) for _ in range(8)]
+            if all(
+                response.status_code == 200
+                and any(item['id'] == item_id for item in response.json().get('data', [])) == present
+                for response in responses
+            ):
+                return True
+        except Exception as e:
+            log_info(f"GET /api/menu/suggest exception - Error: {str(e)}")
+        if time.time() > deadline:
+            return False
+        time.sleep(0.5)
+
+
 def test_menu_items(token):
     """Test menu item endpoints"""
     log_section("TEST: Menu Items")
@@ -185,6 +206,45 @@ def test_menu_items(token):
     except Exception as e:
         log_error(f"GET /api/menu/available exception - Error: {str(e)}")
     
+    # Test the summary view of the menu
+    log_info("Testing GET /api/menu/?view=summary...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/", params={"view": "summary"})
+        items = response.json().get('data', [])
+        
+        if response.status_code == 200 and all(set(item) == {'id', 'name', 'price', 'category', 'is_available'} for item in items):
+            log_success(f"GET /api/menu/?view=summary - {len(items)} items with summary fields only")
+        else:
+            log_error(f"GET /api/menu/?view=summary failed - Status: {response.status_code}, Response: {response.text[:300]}")
+    except Exception as e:
+        log_error(f"GET /api/menu/?view=summary exception - Error: {str(e)}")
+    
+    # Test an unknown category is rejected rather than cached
+    log_info("Testing GET /api/menu/?category=unknown...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/", params={"category": "unknown"})
+        
+        if response.status_code == 400:
+            log_success("GET /api/menu/?category=unknown - Correctly rejected")
+        else:
+            log_error(f"Unknown category should return 400 - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/menu/?category=unknown exception - Error: {str(e)}")
+    
+    # Test conditional GET (ETag / If-None-Match)
+    log_info("Testing GET /api/menu/ with If-None-Match...")
+    menu_etag = None
+    try:
+        menu_etag = requests.get(f"{BASE_URL}/api/menu/").headers.get('ETag')
+        response = requests.get(f"{BASE_URL}/api/menu/", headers={"If-None-Match": menu_etag or ''})
+        
+        if menu_etag and response.status_code == 304 and not response.content:
+            log_success(f"GET /api/menu/ with matching ETag {menu_etag} - 304 Not Modified")
+        else:
+            log_error(f"GET /api/menu/ with matching ETag should return 304 - ETag: {menu_etag}, Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/menu/ If-None-Match exception - Error: {str(e)}")
+    
     # Test POST create menu item (protected)
     log_info("Testing POST /api/menu/ (create)...")
     menu_data = {
@@ -193,7 +253,7 @@ def test_menu_items(token):
         "price": 15.99,
         "category": "main",
         "preparation_time": 20,
-        "allergens": ["gluten", "dairy"],
+        "allergens": ["Gluten", "dairy"],
         "nutritional_info": {
             "calories": 450,
             "protein": 25
@@ -211,6 +271,10 @@ def test_menu_items(token):
             data = response.json()
             created_item_id = data.get('data', {}).get('id')
             log_success(f"POST /api/menu/ - Created item ID: {created_item_id}")
+            if data['data'].get('allergens') == ["gluten", "dairy"]:
+                log_success("POST /api/menu/ - Allergens stored lowercase")
+            else:
+                log_error(f"POST /api/menu/ - Allergens not normalised: {data['data'].get('allergens')}")
         else:
             log_error(f"POST /api/menu/ failed - Status: {response.status_code}, Response: {response.text}")
     except Exception as e:
@@ -232,6 +296,98 @@ def test_menu_items(token):
     except Exception as e:
         log_error(f"POST /api/menu/ no-auth test exception - Error: {str(e)}")
     
+    # Test menu search (public), with a typo in the description words
+    if created_item_id:
+        search_terms = f"{menu_data['name']} automatd"
+        log_info(f"Testing GET /api/menu/search?q={search_terms}...")
+        try:
+            response = requests.get(f"{BASE_URL}/api/menu/search", params={"q": search_terms})
+            
+            if response.status_code == 200:
+                results = response.json().get('data', [])
+                if results and results[0].get('id') == created_item_id:
+                    log_success(f"GET /api/menu/search - Created item ranked first (score {results[0].get('score')})")
+                else:
+                    log_error(f"GET /api/menu/search - Created item not ranked first: {[item.get('name') for item in results]}")
+            else:
+                log_error(f"GET /api/menu/search failed - Status: {response.status_code}, Response: {response.text}")
+        except Exception as e:
+            log_error(f"GET /api/menu/search exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/menu/search with a too short query...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/search", params={"q": "a"})
+        
+        if response.status_code == 400:
+            log_success("GET /api/menu/search?q=a correctly rejected - Status: 400")
+        else:
+            log_error(f"GET /api/menu/search?q=a should return 400 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/menu/search?q=a exception - Error: {str(e)}")
+    
+    # Test search-as-you-type suggestions: a word prefix of the new item, case
+    # insensitive, seen by every worker within MENU_SUGGEST_MAX_AGE
+    if created_item_id:
+        suggest_prefix = menu_data['name'].split()[-1][:4]
+        log_info(f"Testing GET /api/menu/suggest?q=DISH {suggest_prefix}...")
+        if wait_for_suggestion(f"DISH {suggest_prefix}", created_item_id, present=True):
+            log_success("GET /api/menu/suggest - Created item suggested by every worker")
+        else:
+            log_error("GET /api/menu/suggest - Created item not suggested")
+    
+    log_info("Testing GET /api/menu/suggest without q...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/suggest")
+        
+        if response.status_code == 400:
+            log_success("GET /api/menu/suggest without q correctly rejected - Status: 400")
+        else:
+            log_error(f"GET /api/menu/suggest without q should return 400 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/menu/suggest without q exception - Error: {str(e)}")
+    
+    # Test allergen exclusion filter on both menu listings
+    if created_item_id:
+        for path, allergens in (("/api/menu/", "gluten"), ("/api/menu/available", "dairy, GLUTEN")):
+            log_info(f"Testing GET {path}?exclude_allergens={allergens}...")
+            try:
+                response = requests.get(f"{BASE_URL}{path}", params={"exclude_allergens": allergens})
+                
+                if response.status_code == 200:
+                    items = response.json().get('data', [])
+                    offending = [item['id'] for item in items if 'gluten' in item.get('allergens', [])]
+                    if not offending and all(item['id'] != created_item_id for item in items):
+                        log_success(f"GET {path}?exclude_allergens={allergens} - {len(items)} items, none with gluten")
+                    else:
+                        log_error(f"GET {path}?exclude_allergens={allergens} returned items with gluten: {offending or [created_item_id]}")
+                else:
+                    log_error(f"GET {path}?exclude_allergens={allergens} failed - Status: {response.status_code}, Response: {response.text}")
+            except Exception as e:
+                log_error(f"GET {path}?exclude_allergens={allergens} exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/menu/?exclude_allergens=gluten,kryptonite...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/", params={"exclude_allergens": "gluten,kryptonite"})
+        
+        if response.status_code == 400:
+            log_success("GET /api/menu/?exclude_allergens with an unknown allergen correctly rejected - Status: 400")
+        else:
+            log_error(f"GET /api/menu/?exclude_allergens with an unknown allergen should return 400 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/menu/?exclude_allergens unknown allergen exception - Error: {str(e)}")
+    
+    if created_item_id and menu_etag:
+        log_info("Testing GET /api/menu/ with stale ETag after creating an item...")
+        try:
+            response = requests.get(f"{BASE_URL}/api/menu/", headers={"If-None-Match": menu_etag})
+            
+            if response.status_code == 200 and response.headers.get('ETag') != menu_etag:
+                log_success(f"GET /api/menu/ with stale ETag - 200, new ETag {response.headers.get('ETag')}")
+            else:
+                log_error(f"GET /api/menu/ with stale ETag should return 200 - Status: {response.status_code}")
+        except Exception as e:
+            log_error(f"GET /api/menu/ stale ETag exception - Error: {str(e)}")
+    
     if created_item_id:
         # Test GET single menu item
         log_info(f"Testing GET /api/menu/{created_item_id}...")
@@ -267,6 +423,27 @@ def test_menu_items(token):
         except Exception as e:
             log_error(f"PUT /api/menu/{created_item_id} exception - Error: {str(e)}")
         
+        # Test that the update is visible on every worker (menu cache invalidation)
+        log_info(f"Testing GET /api/menu/{created_item_id} after update (cache invalidation)...")
+        try:
+            prices = set()
+            for _ in range(8):
+                response = requests.get(f"{BASE_URL}/api/menu/{created_item_id}")
+                prices.add(response.json().get('data', {}).get('price'))
+            
+            if prices == {update_data['price']}:
+                log_success(f"GET /api/menu/{created_item_id} - Updated price served on every request")
+            else:
+                log_error(f"GET /api/menu/{created_item_id} served stale data after update - Prices: {prices}")
+        except Exception as e:
+            log_error(f"GET /api/menu/{created_item_id} after update exception - Error: {str(e)}")
+        
+        log_info("Testing GET /api/menu/suggest after the item became unavailable...")
+        if wait_for_suggestion(menu_data['name'], created_item_id, present=False):
+            log_success("GET /api/menu/suggest - Unavailable item no longer suggested")
+        else:
+            log_error("GET /api/menu/suggest - Unavailable item still suggested")
+        
         # Test PUT without authentication
         log_info(f"Testing PUT /api/menu/{created_item_id} without authentication...")
         try:
@@ -363,6 +540,78 @@ def test_orders(token):
     except Exception as e:
         log_error(f"GET /api/orders/ no-auth test exception - Error: {str(e)}")
     
+    # The event stream takes a short-lived stream token in the URL
+    log_info("Testing POST /api/orders/events/token...")
+    stream_token = None
+    try:
+        response = requests.post(f"{BASE_URL}/api/orders/events/token", headers={**HEADERS, "Authorization": f"Bearer {token}"})
+        if response.status_code == 201 and response.json().get('token'):
+            stream_token = response.json()['token']
+            log_success(f"POST /api/orders/events/token - Expires in {response.json()['expires_in']}s")
+        else:
+            log_error(f"POST /api/orders/events/token failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"POST /api/orders/events/token exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/events with an access token in the URL (should fail)...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/orders/events", params={"jwt": token}, stream=True, timeout=10)
+        response.close()
+        if response.status_code == 401:
+            log_success("GET /api/orders/events correctly refused an access token in the URL")
+        else:
+            log_error(f"GET /api/orders/events accepted an access token in the URL - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/orders/events access token test exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/ with a stream token (should fail)...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/orders/", headers={**HEADERS, "Authorization": f"Bearer {stream_token}"})
+        if response.status_code == 401:
+            log_success("GET /api/orders/ correctly refused a stream token")
+        else:
+            log_error(f"GET /api/orders/ accepted a stream token - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/orders/ stream token test exception - Error: {str(e)}")
+    
+    # HEAD requests never start the stream body: they must not hold stream
+    # slots (ORDER_EVENTS_MAX_STREAMS per worker)
+    log_info("Testing HEAD /api/orders/events, then GET...")
+    try:
+        for _ in range(20):
+            requests.head(f"{BASE_URL}/api/orders/events", params={"jwt": stream_token}, timeout=10)
+        with requests.get(f"{BASE_URL}/api/orders/events", params={"jwt": stream_token}, stream=True, timeout=10) as response:
+            first_line = next(response.iter_lines(decode_unicode=True), None) if response.status_code == 200 else None
+        if response.status_code == 200 and first_line and first_line.startswith('retry: 3000'):
+            log_success("GET /api/orders/events - Stream opened after 20 HEAD requests")
+        else:
+            log_error(f"GET /api/orders/events after HEAD requests - Status: {response.status_code}, First line: {first_line}")
+    except Exception as e:
+        log_error(f"GET /api/orders/events after HEAD requests exception - Error: {str(e)}")
+    
+    # Subscribe to the kitchen event stream before creating the order
+    log_info("Subscribing to GET /api/orders/events (SSE)...")
+    received_events = []
+    
+    def listen_order_events():
+        try:
+            with requests.get(
+                f"{BASE_URL}/api/orders/events",
+                params={"jwt": stream_token},
+                stream=True,
+                timeout=10
+            ) as response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith('data: '):
+                        received_events.append(json.loads(line[len('data: '):]))
+                        return
+        except Exception as e:
+            log_info(f"Order events listener stopped - {str(e)}")
+    
+    events_listener = threading.Thread(target=listen_order_events, daemon=True)
+    events_listener.start()
+    time.sleep(1)
+    
     # Test POST create order
     log_info("Testing POST /api/orders/ (create)...")
     order_data = {
@@ -391,11 +640,35 @@ def test_orders(token):
             created_order_id = data.get('data', {}).get('id')
             order_number = data.get('data', {}).get('order_number')
             log_success(f"POST /api/orders/ - Created order {order_number}, ID: {created_order_id}")
+            
+            # 2 x 12.50 with 10% tax
+            final_amount = data.get('data', {}).get('final_amount')
+            if final_amount == 27.5:
+                log_success("POST /api/orders/ - Order priced correctly (27.50)")
+            else:
+                log_error(f"POST /api/orders/ - Wrong order total: {final_amount}, expected 27.5")
+            
+            # The kitchen cannot finish before the 15 minutes the pizza takes
+            created_at = datetime.fromisoformat(data['data']['created_at'])
+            eta = datetime.fromisoformat(data['data']['estimated_completion_time'])
+            if eta - created_at >= timedelta(minutes=15):
+                log_success(f"POST /api/orders/ - Estimated completion in {int((eta - created_at).total_seconds() // 60)} minutes")
+            else:
+                log_error(f"POST /api/orders/ - Estimated completion before preparation time: {eta}")
         else:
             log_error(f"POST /api/orders/ failed - Status: {response.status_code}, Response: {response.text}")
     except Exception as e:
         log_error(f"POST /api/orders/ exception - Error: {str(e)}")
     
+    # Test that the creation was pushed on the event stream
+    log_info("Testing order.created event delivery on GET /api/orders/events...")
+    events_listener.join(timeout=10)
+    if received_events and received_events[0].get('type') == 'order.created' \
+            and received_events[0].get('order_id') == created_order_id:
+        log_success(f"GET /api/orders/events - Received order.created for {received_events[0].get('order_number')}")
+    else:
+        log_error(f"GET /api/orders/events - order.created not received, got: {received_events}")
+    
     # Test POST order without authentication
     log_info("Testing POST /api/orders/ without authentication...")
     try:
@@ -412,6 +685,238 @@ def test_orders(token):
     except Exception as e:
         log_error(f"POST /api/orders/ no-auth test exception - Error: {str(e)}")
     
+    # Test malformed order IDs do not match the order routes
+    log_info("Testing GET /api/orders/not-a-uuid...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/not-a-uuid",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        )
+        
+        if response.status_code == 404:
+            log_success("GET /api/orders/not-a-uuid correctly rejected - Status: 404")
+        else:
+            log_error(f"GET /api/orders/not-a-uuid should return 404 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/orders/not-a-uuid exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/bulk (POST only)...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/bulk",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        )
+        
+        if response.status_code == 405:
+            log_success("GET /api/orders/bulk correctly rejected - Status: 405")
+        else:
+            log_error(f"GET /api/orders/bulk should return 405 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/orders/bulk exception - Error: {str(e)}")
+    
+    log_info("Testing POST /api/orders/ with a malformed menu_item_id...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            json={"table_number": 5, "order_type": "dine_in", "items": [{"menu_item_id": "not-a-uuid", "quantity": 1}]}
+        )
+        
+        if response.status_code == 400:
+            log_success("POST /api/orders/ correctly rejected a malformed menu_item_id - Status: 400")
+        else:
+            log_error(f"POST /api/orders/ should reject a malformed menu_item_id - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"POST /api/orders/ malformed menu_item_id exception - Error: {str(e)}")
+    
+    # Test POST bulk create with idempotency keys, then replay the same batch
+    log_info("Testing POST /api/orders/bulk (offline backlog)...")
+    idempotency_key = f"test-tablet-{int(time.time() * 1000)}"
+    bulk_data = {
+        "orders": [
+            {**order_data, "idempotency_key": idempotency_key},
+            {**order_data, "idempotency_key": idempotency_key},
+            {**order_data, "items": []}
+        ]
+    }
+    bulk_order_id = None
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/orders/bulk",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            json=bulk_data
+        )
+        
+        if response.status_code == 200:
+            results = response.json().get('data', {}).get('results', [])
+            statuses = [result.get('status') for result in results]
+            if statuses == ['created', 'existing', 'invalid'] \
+                    and results[0]['order']['id'] == results[1]['order']['id']:
+                bulk_order_id = results[0]['order']['id']
+                log_success(f"POST /api/orders/bulk - Per-order results: {statuses}")
+            else:
+                log_error(f"POST /api/orders/bulk returned unexpected results: {results}")
+        else:
+            log_error(f"POST /api/orders/bulk failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"POST /api/orders/bulk exception - Error: {str(e)}")
+    
+    log_info("Testing POST /api/orders/bulk replay (same idempotency key)...")
+    try:
+        response = requests.post(
+            f"{BASE_URL}/api/orders/bulk",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            json={"orders": bulk_data["orders"][:1]}
+        )
+        
+        results = response.json().get('data', {}).get('results', []) if response.status_code == 200 else []
+        if results and results[0].get('status') == 'existing' and results[0]['order']['id'] == bulk_order_id:
+            log_success("POST /api/orders/bulk replay - Existing order returned, nothing created")
+        else:
+            log_error(f"POST /api/orders/bulk replay failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"POST /api/orders/bulk replay exception - Error: {str(e)}")
+    
+    # Test keyset pagination
+    log_info("Testing GET /api/orders/?limit=1 (keyset pagination)...")
+    first_page_ids = []
+    next_cursor = None
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            params={"limit": 1}
+        )
+        
+        data = response.json()
+        if response.status_code == 200 and len(data.get('data', [])) <= 1 and 'next_cursor' in data:
+            first_page_ids = [order['id'] for order in data['data']]
+            next_cursor = data['next_cursor']
+            log_success(f"GET /api/orders/?limit=1 - Retrieved {len(first_page_ids)} order, next_cursor: {bool(next_cursor)}")
+        else:
+            log_error(f"GET /api/orders/?limit=1 failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/orders/?limit=1 exception - Error: {str(e)}")
+    
+    if next_cursor:
+        log_info("Testing GET /api/orders/ with cursor (second page)...")
+        try:
+            response = requests.get(
+                f"{BASE_URL}/api/orders/",
+                headers={**HEADERS, "Authorization": f"Bearer {token}"},
+                params={"limit": 1, "cursor": next_cursor}
+            )
+            
+            data = response.json()
+            page_ids = [order['id'] for order in data.get('data', [])]
+            if response.status_code == 200 and page_ids and not set(page_ids) & set(first_page_ids):
+                log_success(f"GET /api/orders/ with cursor - Retrieved next page: {page_ids}")
+            else:
+                log_error(f"GET /api/orders/ with cursor failed - Status: {response.status_code}, Response: {response.text}")
+        except Exception as e:
+            log_error(f"GET /api/orders/ with cursor exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/ with invalid cursor...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            params={"cursor": "not-a-cursor"}
+        )
+        
+        if response.status_code == 400:
+            log_success("GET /api/orders/ with invalid cursor correctly rejected - Status: 400")
+        else:
+            log_error(f"GET /api/orders/ with invalid cursor should return 400 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/orders/ invalid cursor exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/?stream=true&limit=5 (streamed response)...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            params={"stream": "true", "limit": 5}
+        )
+        
+        data = response.json()
+        if response.status_code == 200 and data.get('count') == len(data.get('data', [])) and 'next_cursor' in data:
+            log_success(f"GET /api/orders/?stream=true - Streamed {data['count']} orders")
+        else:
+            log_error(f"GET /api/orders/?stream=true failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/orders/?stream=true exception - Error: {str(e)}")
+    
+    # Test sparse fieldsets and the summary view (paginated, streamed)
+    for params, order_keys, item_keys in (
+        ({"fields": "order_number,items.status", "limit": 5}, {'order_number', 'items'}, {'status'}),
+        ({"view": "summary", "limit": 5}, {'id', 'order_number', 'table_number', 'status', 'items'}, {'id', 'menu_item_name', 'quantity', 'status'}),
+        ({"fields": "order_number,table_number", "stream": "true", "limit": 5}, {'order_number', 'table_number'}, None),
+    ):
+        log_info(f"Testing GET /api/orders/ with {params}...")
+        try:
+            response = requests.get(
+                f"{BASE_URL}/api/orders/",
+                headers={**HEADERS, "Authorization": f"Bearer {token}"},
+                params=params
+            )
+            
+            orders = response.json().get('data', []) if response.status_code == 200 else None
+            if orders and all(
+                set(order) == order_keys and all(set(item) == item_keys for item in order.get('items', []))
+                for order in orders
+            ):
+                log_success(f"GET /api/orders/ with {params} - {len(orders)} orders with only {sorted(order_keys)}")
+            else:
+                log_error(f"GET /api/orders/ with {params} returned unexpected fields - Status: {response.status_code}, Response: {response.text[:300]}")
+        except Exception as e:
+            log_error(f"GET /api/orders/ with {params} exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/?fields=password_hash...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            params={"fields": "order_number,password_hash"}
+        )
+        
+        if response.status_code == 400:
+            log_success("GET /api/orders/ with an unknown field correctly rejected - Status: 400")
+        else:
+            log_error(f"GET /api/orders/ with an unknown field should return 400 - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/orders/ unknown field exception - Error: {str(e)}")
+    
+    # Test that listing orders costs a constant number of queries (no N+1 on items)
+    log_info("Testing GET /api/orders/ query count is independent of the number of orders...")
+    try:
+        requests.post(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            json=order_data
+        )
+        single = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            params={"limit": 1}
+        )
+        many = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            params={"limit": 20}
+        )
+        
+        if 'X-Query-Count' not in many.headers:
+            log_info("X-Query-Count header not exposed (SQLALCHEMY_RECORD_QUERIES disabled), skipping")
+        elif many.json().get('count', 0) < 2:
+            log_error(f"Query count test needs at least 2 orders - Response: {many.text}")
+        elif single.headers['X-Query-Count'] == many.headers['X-Query-Count']:
+            log_success(f"GET /api/orders/ - {many.headers['X-Query-Count']} queries for both 1 and {many.json()['count']} orders")
+        else:
+            log_error(f"GET /api/orders/ query count grows with orders - 1 order: {single.headers['X-Query-Count']}, {many.json()['count']} orders: {many.headers['X-Query-Count']}")
+    except Exception as e:
+        log_error(f"GET /api/orders/ query count test exception - Error: {str(e)}")
+    
     if created_order_id:
         # Test GET single order
         log_info(f"Testing GET /api/orders/{created_order_id}...")
@@ -497,6 +1002,68 @@ def test_orders(token):
                 log_error(f"PUT /api/orders/{created_order_id}/items/{created_order_item_id}/status failed - Status: {response.status_code}, Response: {response.text}")
         except Exception as e:
             log_error(f"PUT /api/orders/{created_order_id}/items/{created_order_item_id}/status exception - Error: {str(e)}")
+
+        # Test PUT bulk update status on order items
+        log_info("Testing PUT /api/orders/items/status (bulk update)...")
+        missing_item_id = "00000000-0000-0000-0000-000000000000"
+        try:
+            response = requests.put(
+                f"{BASE_URL}/api/orders/items/status",
+                headers={**HEADERS, "Authorization": f"Bearer {token}"},
+                json={"updates": [
+                    {"order_id": created_order_id, "item_id": created_order_item_id, "status": "delivered"},
+                    {"order_id": created_order_id, "item_id": missing_item_id, "status": "delivered"}
+                ]}
+            )
+
+            if response.status_code == 200:
+                data = response.json().get('data', {})
+                items = data.get('items', [])
+                not_found = data.get('not_found', [])
+                if (len(items) == 1 and items[0].get('item_id') == created_order_item_id
+                        and items[0].get('status') == 'delivered'
+                        and [entry.get('item_id') for entry in not_found] == [missing_item_id]):
+                    log_success("PUT /api/orders/items/status - Updated 1 item, reported 1 missing")
+                else:
+                    log_error(f"PUT /api/orders/items/status returned an unexpected diff: {data}")
+            else:
+                log_error(f"PUT /api/orders/items/status failed - Status: {response.status_code}, Response: {response.text}")
+        except Exception as e:
+            log_error(f"PUT /api/orders/items/status exception - Error: {str(e)}")
+    
+    # Test that new orders are priced with the updated menu price
+    log_info("Testing order pricing after a menu price change...")
+    try:
+        response = requests.put(
+            f"{BASE_URL}/api/menu/{menu_item_id}",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            json={"price": 14.0}
+        )
+        response = requests.post(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"},
+            json=order_data
+        )
+        
+        if response.status_code == 201:
+            repriced_order = response.json().get('data', {})
+            # 2 x 14.00 with 10% tax
+            if repriced_order.get('final_amount') == 30.8:
+                log_success("POST /api/orders/ - New menu price applied (30.80)")
+            else:
+                log_error(f"POST /api/orders/ - Stale price after menu update: {repriced_order.get('final_amount')}, expected 30.8")
+            requests.delete(
+                f"{BASE_URL}/api/orders/{repriced_order.get('id')}",
+                headers={**HEADERS, "Authorization": f"Bearer {token}"}
+            )
+        else:
+            log_error(f"POST /api/orders/ after price change failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"Order pricing after menu update exception - Error: {str(e)}")
+    
+    # Test order numbers stay unique with many waiters creating orders at once
+    if menu_item_id:
+        test_concurrent_order_numbers(token, order_data)
     
     # Clean up test menu item
     if menu_item_id:
@@ -518,6 +1085,73 @@ def test_orders(token):
     
     return created_order_id
 
+def test_concurrent_order_numbers(token, order_data, bulk_clients=10, bulk_size=200, single_clients=5, single_orders=20):
+    """Create thousands of orders concurrently and check that no order number collides"""
+    expected = bulk_clients * bulk_size + single_clients * single_orders
+    log_info(f"Testing concurrent order creation ({expected} orders, {bulk_clients + single_clients} clients)...")
+    auth_headers = {**HEADERS, "Authorization": f"Bearer {token}"}
+    created = []
+    failures = []
+    lock = threading.Lock()
+    
+    def bulk_client():
+        try:
+            response = requests.post(
+                f"{BASE_URL}/api/orders/bulk",
+                headers=auth_headers,
+                json={"orders": [order_data] * bulk_size},
+                timeout=60
+            )
+            if response.status_code != 200:
+                raise Exception(f"Status: {response.status_code}, Response: {response.text[:200]}")
+            orders = [result.get('order') for result in response.json()['data']['results'] if result.get('status') == 'created']
+            with lock:
+                created.extend(orders)
+        except Exception as e:
+            with lock:
+                failures.append(str(e))
+    
+    def single_client():
+        for _ in range(single_orders):
+            try:
+                response = requests.post(f"{BASE_URL}/api/orders/", headers=auth_headers, json=order_data, timeout=30)
+                if response.status_code != 201:
+                    raise Exception(f"Status: {response.status_code}, Response: {response.text[:200]}")
+                with lock:
+                    created.append(response.json()['data'])
+            except Exception as e:
+                with lock:
+                    failures.append(str(e))
+    
+    clients = [threading.Thread(target=bulk_client) for _ in range(bulk_clients)]
+    clients += [threading.Thread(target=single_client) for _ in range(single_clients)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    
+    order_numbers = [order['order_number'] for order in created]
+    if failures:
+        log_error(f"Concurrent order creation - {len(failures)} requests failed, first: {failures[0]}")
+    elif len(order_numbers) != expected or len(set(order_numbers)) != expected:
+        log_error(f"Concurrent order creation - {len(order_numbers)} orders created, {len(set(order_numbers))} unique numbers, expected {expected}")
+    else:
+        log_success(f"Concurrent order creation - {expected} orders, no order number collisions")
+    
+    # Clean up the created orders
+    order_ids = [order['id'] for order in created]
+    
+    def delete_orders(ids):
+        for order_id in ids:
+            requests.delete(f"{BASE_URL}/api/orders/{order_id}", headers=auth_headers, timeout=30)
+    
+    cleaners = [threading.Thread(target=delete_orders, args=(order_ids[i::10],)) for i in range(10)]
+    for cleaner in cleaners:
+        cleaner.start()
+    for cleaner in cleaners:
+        cleaner.join()
+
+
 def test_user_management(token):
     """Test user management endpoints"""
     log_section("TEST: User Management")
@@ -1004,6 +1638,234 @@ def test_checkins(user_id, user_token):
     
     return checkin_id
 
+def test_compression(token):
+    """Test response compression negotiation"""
+    log_section("TEST: Response Compression")
+    
+    for encoding in ("gzip", "br"):
+        log_info(f"Testing GET /api/menu/ with Accept-Encoding: {encoding}...")
+        try:
+            response = requests.get(f"{BASE_URL}/api/menu/", headers={"Accept-Encoding": encoding})
+            etag = response.headers.get('ETag', '')
+            
+            if encoding == "br" and response.headers.get('Content-Encoding') != "br":
+                log_info("Brotli not available on the server - skipping")
+                continue
+            if response.status_code == 200 and response.headers.get('Content-Encoding') == encoding and etag.startswith('W/'):
+                log_success(f"GET /api/menu/ - {encoding} encoded, weak ETag {etag}, {len(response.json().get('data', []))} items decoded")
+            else:
+                log_error(f"GET /api/menu/ with {encoding} not compressed - Status: {response.status_code}, Headers: {dict(response.headers)}")
+                continue
+            
+            response = requests.get(f"{BASE_URL}/api/menu/", headers={"Accept-Encoding": encoding, "If-None-Match": etag})
+            if response.status_code == 304:
+                log_success(f"GET /api/menu/ with weak ETag and {encoding} - 304 Not Modified")
+            else:
+                log_error(f"GET /api/menu/ with weak ETag should return 304 - Status: {response.status_code}")
+        except Exception as e:
+            log_error(f"GET /api/menu/ with {encoding} exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/menu/ with Accept-Encoding: identity...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/", headers={"Accept-Encoding": "identity"})
+        
+        if response.status_code == 200 and 'Content-Encoding' not in response.headers and 'Accept-Encoding' in response.headers.get('Vary', ''):
+            log_success("GET /api/menu/ with identity - sent uncompressed, Vary: Accept-Encoding")
+        else:
+            log_error(f"GET /api/menu/ with identity should not be compressed - Headers: {dict(response.headers)}")
+    except Exception as e:
+        log_error(f"GET /api/menu/ with identity exception - Error: {str(e)}")
+    
+    log_info("Testing GET /health below the compression threshold...")
+    try:
+        response = requests.get(f"{BASE_URL}/health", headers={"Accept-Encoding": "gzip"})
+        
+        if response.status_code == 200 and 'Content-Encoding' not in response.headers:
+            log_success(f"GET /health - {len(response.content)} bytes sent uncompressed")
+        else:
+            log_error(f"GET /health should not be compressed - Headers: {dict(response.headers)}")
+    except Exception as e:
+        log_error(f"GET /health exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/orders/?stream=true with Accept-Encoding: gzip...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}", "Accept-Encoding": "gzip"},
+            params={"stream": "true", "limit": 20}
+        )
+        data = response.json()
+        
+        if response.status_code == 200 and response.headers.get('Content-Encoding') == 'gzip' and data.get('count') == len(data.get('data', [])):
+            log_success(f"GET /api/orders/?stream=true - gzip stream with {data['count']} orders decoded")
+        else:
+            log_error(f"GET /api/orders/?stream=true with gzip failed - Status: {response.status_code}, Headers: {dict(response.headers)}")
+    except Exception as e:
+        log_error(f"GET /api/orders/?stream=true with gzip exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/diagnostics/compression...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/diagnostics/compression",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        )
+        
+        if response.status_code == 200:
+            log_success(f"GET /api/diagnostics/compression - Worker {response.json().get('worker')}: {response.json().get('data')}")
+        else:
+            log_error(f"GET /api/diagnostics/compression failed - Status: {response.status_code}, Response: {response.text}")
+    except Exception as e:
+        log_error(f"GET /api/diagnostics/compression exception - Error: {str(e)}")
+
+
+def test_metrics():
+    """Test the Prometheus metrics endpoint"""
+    log_section("TEST: Metrics")
+    
+    log_info("Testing GET /metrics after menu requests...")
+    try:
+        for _ in range(10):
+            requests.get(f"{BASE_URL}/api/menu/available")
+        response = requests.get(f"{BASE_URL}/metrics")
+        
+        expected = (
+            'ristosmart_http_requests_total{blueprint="menu",endpoint="menu.get_available_menu_items",method="GET",status="200"}',
+            'ristosmart_http_request_duration_seconds_bucket{blueprint="menu",endpoint="menu.get_available_menu_items"',
+            'ristosmart_db_statements_per_request_count{blueprint="menu",endpoint="menu.get_available_menu_items"',
+        )
+        missing = [series for series in expected if series not in response.text]
+        if response.status_code == 200 and not missing:
+            log_success("GET /metrics - Latency, status and SQL series reported for menu.get_available_menu_items")
+        else:
+            log_error(f"GET /metrics failed - Status: {response.status_code}, Missing: {missing}")
+    except Exception as e:
+        log_error(f"GET /metrics exception - Error: {str(e)}")
+
+
+def test_slow_queries(token):
+    """Test the slow-query log endpoint"""
+    log_section("TEST: Slow-query log")
+    
+    log_info("Testing GET /api/diagnostics/slow-queries...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/diagnostics/slow-queries",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        )
+        data = response.json()
+        if response.status_code == 200 and isinstance(data.get('data'), list) and 'threshold_ms' in data:
+            log_success(f"GET /api/diagnostics/slow-queries - {data['count']} slow statements over {data['threshold_ms']} ms on worker {data['worker']}")
+        else:
+            log_error(f"GET /api/diagnostics/slow-queries failed - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/diagnostics/slow-queries exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/diagnostics/slow-queries with invalid limit...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/diagnostics/slow-queries?limit=0",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        )
+        if response.status_code == 400:
+            log_success("GET /api/diagnostics/slow-queries?limit=0 - Correctly rejected")
+        else:
+            log_error(f"Invalid limit should return 400 - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"Invalid limit test exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/diagnostics/slow-queries without token...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/diagnostics/slow-queries")
+        if response.status_code == 401:
+            log_success("GET /api/diagnostics/slow-queries - Correctly requires authentication")
+        else:
+            log_error(f"Slow-query log should require authentication - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"Unauthenticated slow-query log exception - Error: {str(e)}")
+
+
+def test_profiler(token):
+    """Test the on-demand request profiler and periodic sampling"""
+    log_section("TEST: Profiler")
+    auth_headers = {**HEADERS, "Authorization": f"Bearer {token}"}
+    
+    log_info("Testing GET /api/orders/ with X-Profile: 1...")
+    profile_name = None
+    try:
+        response = requests.get(f"{BASE_URL}/api/orders/", headers={**auth_headers, "X-Profile": "1"})
+        profile_name = response.headers.get('X-Profile')
+        if response.status_code == 200 and profile_name:
+            log_success(f"GET /api/orders/ - Profile stored: {profile_name} ({response.headers.get('X-Profile-Samples')} samples)")
+        else:
+            log_error(f"Profiled request failed - Status: {response.status_code}, X-Profile: {profile_name}")
+    except Exception as e:
+        log_error(f"Profiled request exception - Error: {str(e)}")
+    
+    if profile_name:
+        log_info("Testing GET /api/diagnostics/profiles/{name}...")
+        try:
+            response = requests.get(f"{BASE_URL}/api/diagnostics/profiles/{profile_name}", headers=auth_headers)
+            lines = response.text.splitlines()
+            if response.status_code == 200 and all(line.rsplit(' ', 1)[-1].isdigit() for line in lines):
+                log_success(f"GET /api/diagnostics/profiles/{{name}} - {len(lines)} collapsed stacks")
+            else:
+                log_error(f"Profile download failed - Status: {response.status_code}, Response: {response.text[:200]}")
+        except Exception as e:
+            log_error(f"Profile download exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/diagnostics/profiles/{name} with an unknown profile...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/diagnostics/profiles/missing.collapsed", headers=auth_headers)
+        if response.status_code == 404:
+            log_success("GET /api/diagnostics/profiles/missing.collapsed - Correctly returned 404")
+        else:
+            log_error(f"Unknown profile should return 404 - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"Unknown profile exception - Error: {str(e)}")
+    
+    log_info("Testing X-Profile without manager token...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/menu/available", headers={**HEADERS, "X-Profile": "1"})
+        if response.status_code == 200 and 'X-Profile' not in response.headers:
+            log_success("GET /api/menu/available - X-Profile ignored without manager token")
+        else:
+            log_error(f"X-Profile should be ignored without manager token - Status: {response.status_code}, X-Profile: {response.headers.get('X-Profile')}")
+    except Exception as e:
+        log_error(f"Unauthenticated X-Profile exception - Error: {str(e)}")
+    
+    log_info("Testing GET /api/diagnostics/sampling...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/diagnostics/sampling", headers=auth_headers)
+        data = response.json()
+        if response.status_code == 200 and isinstance(data.get('data'), dict):
+            log_success(f"GET /api/diagnostics/sampling - Enabled: {data.get('enabled')}, {len(data['data'])} endpoints sampled on worker {data.get('worker')}")
+        else:
+            log_error(f"GET /api/diagnostics/sampling failed - Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/diagnostics/sampling exception - Error: {str(e)}")
+
+
+def test_server_timing(token):
+    """Test the Server-Timing header"""
+    log_section("TEST: Server-Timing")
+    
+    log_info("Testing Server-Timing on GET /api/orders/...")
+    try:
+        response = requests.get(
+            f"{BASE_URL}/api/orders/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        )
+        header = response.headers.get('Server-Timing', '')
+        phases = [metric.split(';')[0].strip() for metric in header.split(',') if metric.strip()]
+        missing = [phase for phase in ('auth', 'db', 'ser', 'total') if phase not in phases]
+        if response.status_code == 200 and not missing:
+            log_success(f"GET /api/orders/ - Server-Timing: {header}")
+        else:
+            log_error(f"Server-Timing failed - Status: {response.status_code}, Missing: {missing}, Header: {header!r}")
+    except Exception as e:
+        log_error(f"Server-Timing exception - Error: {str(e)}")
+
+
 def test_inventory(token):
     """Test inventory/product endpoints"""
     log_section("TEST: Inventory/Products")
@@ -1026,6 +1888,25 @@ def test_inventory(token):
     except Exception as e:
         log_error(f"GET /api/inventory/ exception - Error: {str(e)}")
     
+    # Test conditional GET (ETag / If-None-Match)
+    log_info("Testing GET /api/inventory/ with If-None-Match...")
+    try:
+        etag = requests.get(
+            f"{BASE_URL}/api/inventory/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}"}
+        ).headers.get('ETag')
+        response = requests.get(
+            f"{BASE_URL}/api/inventory/",
+            headers={**HEADERS, "Authorization": f"Bearer {token}", "If-None-Match": etag or ''}
+        )
+        
+        if etag and response.status_code == 304 and not response.content:
+            log_success(f"GET /api/inventory/ with matching ETag {etag} - 304 Not Modified")
+        else:
+            log_error(f"GET /api/inventory/ with matching ETag should return 304 - ETag: {etag}, Status: {response.status_code}")
+    except Exception as e:
+        log_error(f"GET /api/inventory/ If-None-Match exception - Error: {str(e)}")
+    
     # Test GET all products without authentication
     log_info("Testing GET /api/inventory/ without authentication...")
     try:
@@ -1068,6 +1949,28 @@ def test_inventory(token):
     except Exception as e:
         log_error(f"POST /api/inventory/ exception - Error: {str(e)}")
     
+    # Test product search, with a typo in the name
+    if created_product_id:
+        search_terms = product_data['name'].replace("Product", "Prodcut")
+        log_info(f"Testing GET /api/inventory/search?q={search_terms}...")
+        try:
+            response = requests.get(
+                f"{BASE_URL}/api/inventory/search",
+                headers={**HEADERS, "Authorization": f"Bearer {token}"},
+                params={"q": search_terms}
+            )
+            
+            if response.status_code == 200:
+                results = response.json().get('data', [])
+                if any(product.get('id') == created_product_id for product in results):
+                    log_success(f"GET /api/inventory/search - Found created product among {len(results)} results")
+                else:
+                    log_error(f"GET /api/inventory/search - Created product not found: {[product.get('name') for product in results]}")
+            else:
+                log_error(f"GET /api/inventory/search failed - Status: {response.status_code}, Response: {response.text}")
+        except Exception as e:
+            log_error(f"GET /api/inventory/search exception - Error: {str(e)}")
+    
     # Test POST create product with invalid data (missing required fields)
     log_info("Testing POST /api/inventory/ with invalid data (missing fields)...")
     invalid_product_data = {
@@ -1148,10 +2051,10 @@ def test_inventory(token):
                 headers={**HEADERS, "Authorization": f"Bearer {token}"}
             )
             
-            if response.status_code == 400:
-                log_success("GET /api/inventory/invalid-uuid correctly rejected - Status: 400")
+            if response.status_code == 404:
+                log_success("GET /api/inventory/invalid-uuid correctly rejected - Status: 404")
             else:
-                log_error(f"GET /api/inventory/invalid-uuid should return 400 - Status: {response.status_code}, Response: {response.text}")
+                log_error(f"GET /api/inventory/invalid-uuid should return 404 - Status: {response.status_code}, Response: {response.text}")
         except Exception as e:
             log_error(f"GET /api/inventory/invalid-uuid exception - Error: {str(e)}")
         
@@ -1539,6 +2442,21 @@ def main():
     
     # Test inventory/products
     test_inventory(token)
+    
+    # Test response compression
+    test_compression(token)
+    
+    # Test metrics
+    test_metrics()
+    
+    # Test Server-Timing
+    test_server_timing(token)
+    
+    # Test slow-query log
+    test_slow_queries(token)
+    
+    # Test profiler
+    test_profiler(token)
         
     # Test user management
     created_user_id, new_user_token = test_user_management(token)
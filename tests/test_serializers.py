@@ -0,0 +1,136 @@
+"""
+Golden tests for the precompiled serializers
+Each model's sample rows are serialized and rendered through the app's JSON
+provider, and the bytes are compared with tests/golden/serializers.json,
+recorded from the marshmallow schemas and to_dict methods the serializers
+replaced. Edge cases covered: None columns, Decimal amounts, a zero menu
+price, non-ASCII text and nested order items.
+Run with: python -m pytest tests/test_serializers.py
+"""
+import json
+import sys
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from flask import Flask
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from json_provider import OrJSONProvider
+from models import User, CheckIn, MenuItem, Order, OrderItem, Product
+from serializers import (
+    serialize_user,
+    serialize_checkin,
+    serialize_menu_item,
+    serialize_order,
+    serialize_product
+)
+
+GOLDEN_PATH = Path(__file__).parent / 'golden' / 'serializers.json'
+
+CREATED_AT = datetime(2026, 3, 14, 12, 30, 5, 123456)
+UPDATED_AT = datetime(2026, 3, 14, 13, 0)
+
+
+def build_rows():
+    """Sample model instances (not attached to a session), by golden name"""
+    users = [
+        User(id='0195a1b2-0000-7000-8000-000000000001', username='mario', email='mario@ristosmart.it',
+             role='waiter', full_name='Mario Rossi', is_active=True,
+             created_at=CREATED_AT, last_login=UPDATED_AT),
+        User(id='0195a1b2-0000-7000-8000-000000000002', username='chef', email='chef@ristosmart.it',
+             role='chef', full_name=None, is_active=False, created_at=None, last_login=None),
+    ]
+    checkins = [
+        CheckIn(id='0195a1b2-0000-7000-8000-000000000011', user_id=users[0].id,
+                check_in_time=CREATED_AT, check_out_time=UPDATED_AT),
+        CheckIn(id='0195a1b2-0000-7000-8000-000000000012', user_id=users[1].id,
+                check_in_time=CREATED_AT, check_out_time=None),
+    ]
+    menu_items = [
+        MenuItem(id='0195a1b2-0000-7000-8000-000000000021', name='Pizza Margherita',
+                 description='Pomodoro, mozzarella, basilico', price=8.5, category='main',
+                 is_available=True, preparation_time=12, allergens=['gluten', 'lactose'],
+                 nutritional_info={'calories': 800}, created_at=CREATED_AT, updated_at=UPDATED_AT),
+        MenuItem(id='0195a1b2-0000-7000-8000-000000000022', name='Tiramisù', description=None,
+                 price=0.0, category='dessert', is_available=False, preparation_time=5,
+                 allergens=None, nutritional_info=None, created_at=None, updated_at=None),
+    ]
+    orders = [
+        Order(id='0195a1b2-0000-7000-8000-000000000031', order_number='ORD-20260314-000001',
+              table_number=7, customer_name='Famiglia Bianchi', status='preparing', order_type='dine_in',
+              total_amount=Decimal('25.50'), tax_amount=Decimal('0.00'), discount_amount=Decimal('0.00'),
+              final_amount=Decimal('25.50'), special_instructions='Senza cipolla',
+              estimated_completion_time=UPDATED_AT, created_at=CREATED_AT, updated_at=CREATED_AT,
+              items=[
+                  OrderItem(id='0195a1b2-0000-7000-8000-000000000041', menu_item_id=menu_items[0].id,
+                            menu_item_name='Pizza Margherita', quantity=3, unit_price=Decimal('8.50'),
+                            total_price=Decimal('25.50'), special_instructions=None, status='preparing',
+                            created_at=CREATED_AT, updated_at=CREATED_AT),
+                  OrderItem(id='0195a1b2-0000-7000-8000-000000000042', menu_item_id=menu_items[1].id,
+                            menu_item_name='Tiramisù', quantity=1, unit_price=Decimal('0.00'),
+                            total_price=Decimal('0.00'), special_instructions='Ben freddo', status='ready',
+                            created_at=CREATED_AT, updated_at=UPDATED_AT),
+              ]),
+        Order(id='0195a1b2-0000-7000-8000-000000000032', order_number='ORD-20260314-000002',
+              table_number=None, customer_name=None, status='cancelled', order_type='takeout',
+              total_amount=Decimal('0.00'), tax_amount=Decimal('0.00'), discount_amount=Decimal('0.00'),
+              final_amount=Decimal('0.00'), special_instructions=None, estimated_completion_time=None,
+              created_at=CREATED_AT, updated_at=None, items=[]),
+    ]
+    products = [
+        Product(id='0195a1b2-0000-7000-8000-000000000051', ean='8001234567890', name='Farina 00',
+                description='Sacco da 25 kg', price=Decimal('18.90'), quantity=12, category='dry goods',
+                image_url='https://example.com/farina.png', created_at=CREATED_AT, updated_at=UPDATED_AT),
+        Product(id='0195a1b2-0000-7000-8000-000000000052', ean='80012345', name='Caffè in grani',
+                description=None, price=Decimal('0.00'), quantity=0, category=None, image_url=None,
+                created_at=None, updated_at=None),
+    ]
+    return {
+        'users': users,
+        'checkins': checkins,
+        'menu_items': menu_items,
+        'orders': orders,
+        'products': products,
+    }
+
+
+SERIALIZERS = {
+    'users': serialize_user,
+    'checkins': serialize_checkin,
+    'menu_items': serialize_menu_item,
+    'orders': serialize_order,
+    'products': serialize_product,
+}
+
+
+def render(payload):
+    """Response body of jsonify({'success': True, 'data': payload})"""
+    app = Flask(__name__)
+    app.json = OrJSONProvider(app)
+    with app.app_context():
+        return app.json.response({'success': True, 'data': payload}).get_data(as_text=True)
+
+
+def load_golden():
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_serializers_match_golden():
+    golden = load_golden()
+    for name, rows in build_rows().items():
+        serialize = SERIALIZERS[name]
+        assert render([serialize(row) for row in rows]) == golden[name], name
+
+
+def test_to_dict_matches_golden():
+    golden = load_golden()
+    for name, rows in build_rows().items():
+        assert render([row.to_dict() for row in rows]) == golden[name], name
+
+
+if __name__ == "__main__":
+    test_serializers_match_golden()
+    test_to_dict_matches_golden()
+    print("Serializers match the golden output")